@@ -0,0 +1,108 @@
+"""
+Load test for the async course create view. Fires CONCURRENCY simultaneous
+POST /api/courses/create/ requests at core.asgi.application in-process (httpx
+ASGITransport), with Gemini replaced by a coroutine that sleeps for
+GEMINI_LATENCY and YouTube served by the local fake server. Courses are
+written to the MongoDB at MONGODB_URI, so point it at a scratch database.
+
+A sync view under ASGI runs its requests one at a time on Django's shared
+thread, so the serial bound printed below is what the same load costs there.
+
+Usage (from backend/):
+    MONGODB_URI=mongodb://localhost:27017/bench python -m benchmarks.bench_async_create
+"""
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.fake_youtube import start_fake_youtube
+
+CONCURRENCY = 200
+GEMINI_LATENCY = 1.0
+YOUTUBE_LATENCY = 0.2
+MODULES = 7
+SUBTOPICS = 4
+
+
+def fake_course_data(title):
+    return {
+        'modules': [
+            {
+                'title': f'Module {m}',
+                'subtopics': [
+                    {
+                        'title': f'Lesson {s}',
+                        'video_url': f'search:{title} module {m} lesson {s}',
+                        'content': 'Lorem ipsum dolor sit amet. ' * 40,
+                    }
+                    for s in range(SUBTOPICS)
+                ],
+            }
+            for m in range(MODULES)
+        ]
+    }
+
+
+async def fake_generate_course_async(title, description, category, strategy=None):
+    await asyncio.sleep(GEMINI_LATENCY)
+    return fake_course_data(title)
+
+
+async def run(application):
+    import httpx
+
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=120) as client:
+        async def create(index):
+            start = time.perf_counter()
+            response = await client.post(
+                '/api/courses/create/',
+                json={
+                    'title': f'Benchmark course {index}',
+                    'description': 'Async create load test',
+                    'category': 'Other',
+                    'reuse': False,
+                },
+                headers={'X-Demo-User': 'benchmark'}
+            )
+            assert response.status_code == 201, response.text
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(create(index) for index in range(CONCURRENCY)))
+        return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    server, search_url = start_fake_youtube(latency=YOUTUBE_LATENCY)
+    os.environ['GEMINI_API_KEY'] = os.environ.get('GEMINI_API_KEY', 'benchmark')
+    os.environ['YOUTUBE_API_KEY'] = 'benchmark'
+    os.environ['YOUTUBE_SEARCH_URL'] = search_url
+    os.environ['COURSE_ASYNC_VIEWS'] = 'True'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    from core.asgi import application
+    from courses.models import Course, SubtopicContent
+    from utils.gemini_service import gemini_service
+
+    gemini_service.generate_course_async = fake_generate_course_async
+
+    elapsed, latencies = asyncio.run(run(application))
+    serial = CONCURRENCY * (GEMINI_LATENCY + YOUTUBE_LATENCY)
+
+    print(f"requests: {CONCURRENCY} concurrent, fake Gemini {GEMINI_LATENCY:.1f}s, "
+          f"fake YouTube {YOUTUBE_LATENCY * 1000:.0f}ms")
+    print(f"wall time:  {elapsed:.2f}s ({CONCURRENCY / elapsed:.1f} courses/s)")
+    print(f"latency:    p50 {statistics.median(latencies):.2f}s, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f}s, max {latencies[-1]:.2f}s")
+    print(f"serial bound (one request at a time): {serial:.0f}s")
+
+    for course in Course.objects(user_id='benchmark').only('id'):
+        SubtopicContent.objects(course_id=str(course.pk)).delete()
+    Course.objects(user_id='benchmark').delete()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
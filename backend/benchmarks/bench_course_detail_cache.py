@@ -0,0 +1,81 @@
+"""
+Compares CourseDetailView latency on the render-cache hit path with the
+uncached path (load, hydrate, serialize, render). Requires MONGODB_URI and
+a reachable REDIS_URL.
+
+Usage (from backend/):
+    python -m benchmarks.bench_course_detail_cache
+"""
+import os
+import statistics
+import time
+
+ITERATIONS = 200
+MODULES = 7
+SUBTOPICS = 4
+PARAGRAPH = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12
+USER_ID = 'benchmark-detail'
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, sorted(samples)[int(iterations * 0.95)] * 1000
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    django.setup()
+    from django.test import RequestFactory
+    from courses.models import Module, Subtopic
+    from courses.render_cache import render_cache
+    from courses.services import save_course
+    from courses.views import CourseDetailView
+    from utils.redis_client import redis_client
+
+    if not redis_client:
+        raise SystemExit("Redis is not available; the render cache is disabled.")
+
+    modules = [
+        Module(title=f'Module {m}', order=m, subtopics=[
+            Subtopic(title=f'Lesson {s}', video_url='https://www.youtube.com/watch?v=x',
+                     content='\n\n'.join([PARAGRAPH] * 3), order=s)
+            for s in range(SUBTOPICS)
+        ])
+        for m in range(MODULES)
+    ]
+    course = save_course(USER_ID, 'Benchmark course', 'Render cache benchmark', 'Other', '', modules)
+    pk = str(course.pk)
+
+    view = CourseDetailView.as_view()
+    factory = RequestFactory()
+
+    def get():
+        response = view(factory.get(f'/api/courses/{pk}/', HTTP_X_DEMO_USER=USER_ID), pk=pk)
+        assert response.status_code == 200
+
+    def uncached():
+        render_cache.invalidate(pk)
+        get()
+
+    try:
+        get()
+        miss_p50, miss_p95 = timed(uncached, ITERATIONS)
+        get()
+        hit_p50, hit_p95 = timed(get, ITERATIONS)
+
+        print(f"uncached: p50 {miss_p50:.2f}ms, p95 {miss_p95:.2f}ms")
+        print(f"cached:   p50 {hit_p50:.2f}ms, p95 {hit_p95:.2f}ms")
+        print(f"speedup:  {miss_p50 / hit_p50:.1f}x (p50)")
+    finally:
+        course.delete()
+        render_cache.invalidate(pk)
+
+
+if __name__ == '__main__':
+    main()
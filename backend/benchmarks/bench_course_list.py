@@ -0,0 +1,83 @@
+"""
+Checks that paginated course listing is served by the (user_id, -created_at,
+-_id) index with no in-memory sort, and compares first-page and deep-page
+latency. Requires MONGODB_URI.
+
+Usage (from backend/):
+    python -m benchmarks.bench_course_list
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+COURSES = 5000
+PAGE_SIZE = 24
+USER_ID = 'benchmark-list'
+
+
+def plan_stages(plan):
+    stages = [plan.get('stage')]
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        stages += plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    django.setup()
+    from courses.models import Course
+    from courses.pagination import decode_cursor, paginate
+
+    Course.ensure_indexes()
+    now = datetime.utcnow()
+    Course._get_collection().insert_many([
+        {
+            'user_id': USER_ID,
+            'title': f'Course {i}',
+            'description': 'Pagination benchmark',
+            'category': 'Other',
+            'modules': [],
+            'total_subtopics': 0,
+            'completed_subtopics': 0,
+            'created_at': now - timedelta(seconds=i // 3),
+            'updated_at': now,
+        }
+        for i in range(COURSES)
+    ])
+
+    try:
+        queryset = Course.objects(user_id=USER_ID).exclude('modules')
+
+        cursor, timings = None, []
+        while True:
+            start = time.perf_counter()
+            courses, cursor = paginate(queryset, after=cursor, page_size=PAGE_SIZE)
+            timings.append(time.perf_counter() - start)
+            if not cursor:
+                break
+
+        created_at, course_id = decode_cursor(paginate(queryset, page_size=COURSES - PAGE_SIZE)[1])
+        deep_query = queryset.filter(__raw__={
+            'created_at': {'$lte': created_at},
+            '$or': [{'created_at': {'$lt': created_at}}, {'_id': {'$lt': course_id}}],
+        }).order_by('-created_at', '-id').limit(PAGE_SIZE + 1)
+        stages = plan_stages(deep_query.explain()['queryPlanner']['winningPlan'])
+
+        assert 'IXSCAN' in stages, f"expected an index scan, got {stages}"
+        assert 'SORT' not in stages, f"unexpected in-memory sort in {stages}"
+
+        print(f"deep page plan: {' <- '.join(stages)}")
+        print(f"pages: {len(timings)} x {PAGE_SIZE}")
+        print(f"first page: {timings[0] * 1000:.2f}ms, last page: {timings[-1] * 1000:.2f}ms, "
+              f"avg: {sum(timings) / len(timings) * 1000:.2f}ms")
+    finally:
+        Course._get_collection().delete_many({'user_id': USER_ID})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Races concurrent course creates for one user against its course_limit, on a
+throwaway test database. The previous wiring (can_create_course, generate,
+then increment_courses) lets every racer through; quota.reserve() must grant
+exactly course_limit slots, and only granted requests may reach generation.
+
+Usage (from backend/):
+    python -m benchmarks.bench_course_quota
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RACERS = 20
+COURSE_LIMIT = 3
+GENERATION_TIME = 0.05
+
+
+def race(attempt):
+    from django.db import connection
+
+    barrier = threading.Barrier(RACERS)
+    generations = []
+    lock = threading.Lock()
+
+    def racer():
+        barrier.wait()
+        try:
+            if attempt():
+                with lock:
+                    generations.append(1)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=RACERS) as executor:
+        for future in [executor.submit(racer) for _ in range(RACERS)]:
+            future.result()
+    return len(generations)
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    from django.db import connection
+    from courses import quota
+    from users.models import User
+
+    connection.creation.create_test_db(verbosity=0)
+    user = User.objects.create_user('quota-bench@example.com', 'password', course_limit=COURSE_LIMIT)
+
+    def legacy():
+        racer = User.objects.get(pk=user.pk)
+        if not racer.can_create_course():
+            return False
+        time.sleep(GENERATION_TIME)
+        racer.increment_courses()
+        return True
+
+    def reserved():
+        try:
+            quota.reserve(User.objects.get(pk=user.pk))
+        except quota.QuotaExceeded:
+            return False
+        time.sleep(GENERATION_TIME)
+        return True
+
+    legacy_generations = race(legacy)
+    print(f"legacy check-then-increment: {legacy_generations} of {RACERS} racers generated "
+          f"(limit {COURSE_LIMIT})")
+
+    User.objects.filter(pk=user.pk).update(courses_created=0)
+    generations = race(reserved)
+    user.refresh_from_db()
+    assert generations == COURSE_LIMIT, f"{generations} generations for a limit of {COURSE_LIMIT}"
+    assert user.courses_created == COURSE_LIMIT, user.courses_created
+    print(f"atomic reservation:          {generations} of {RACERS} racers generated")
+
+    quota.release(user.pk)
+    user.refresh_from_db()
+    assert user.courses_created == COURSE_LIMIT - 1
+    assert quota.reserve(user) == user.pk
+
+    start = time.perf_counter()
+    for _ in range(200):
+        quota.release(user.pk)
+        quota.reserve(user)
+    print(f"reserve + release: {(time.perf_counter() - start) / 200 * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Golden check and microbenchmark for the fast read path. Builds raw course
+documents in memory, verifies the fast transformers render byte-identical
+JSON to the mongoengine + DRF serializer path, then times both. No database
+is needed: the slow path hydrates with Course._from_son like a query would.
+
+Usage (from backend/):
+    python -m benchmarks.bench_fast_read_path
+"""
+import os
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+ITERATIONS = 500
+MODULES = 7
+SUBTOPICS = 4
+PARAGRAPH = "Lorem ipsum dolor sit amet, consectetur adipiscing elit — ünïcødé   \"quoted\". " * 8
+
+
+def make_doc(with_counters=True):
+    doc = {
+        '_id': ObjectId(),
+        'user_id': 'benchmark',
+        'title': 'Benchmark course',
+        'description': 'Fast read path benchmark',
+        'thumbnail': '',
+        'category': 'Other',
+        'current_module_index': 2,
+        'current_subtopic_index': 1,
+        'modules': [
+            {
+                'title': f'Module {m}',
+                'order': m,
+                'subtopics': [
+                    {
+                        'title': f'Lesson {s}',
+                        'video_url': 'https://www.youtube.com/watch?v=x',
+                        'content': '\n\n'.join([PARAGRAPH] * 3),
+                        'order': s,
+                        'completed': (m + s) % 3 == 0,
+                    }
+                    for s in range(SUBTOPICS)
+                ],
+            }
+            for m in range(MODULES)
+        ],
+        'created_at': datetime(2024, 5, 1, 12, 30, 15, 123000),
+        'updated_at': datetime(2024, 5, 2, 8, 0, 0, 456000),
+        'version': 7,
+    }
+    if with_counters:
+        doc['total_subtopics'] = MODULES * SUBTOPICS
+        doc['completed_subtopics'] = sum(
+            subtopic['completed'] for module in doc['modules'] for subtopic in module['subtopics']
+        )
+    return doc
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+    from courses import fast_serializers
+    from courses.models import Course
+    from courses.serializers import CourseDetailSerializer, CourseListSerializer, CourseOutlineSerializer
+    from utils.renderers import ORJSONRenderer
+
+    json_renderer, orjson_renderer = JSONRenderer(), ORJSONRenderer()
+
+    for with_counters in (True, False):
+        doc = make_doc(with_counters)
+        list_doc = {key: value for key, value in doc.items() if key != 'modules'}
+        cases = [
+            ('detail', CourseDetailSerializer(Course._from_son(doc)).data,
+             fast_serializers.course_detail(doc, {})),
+            ('outline', CourseOutlineSerializer(Course._from_son(doc)).data,
+             fast_serializers.course_outline(doc)),
+            ('list', CourseListSerializer(Course._from_son(list_doc)).data,
+             fast_serializers.course_list_item(list_doc)),
+        ]
+        for name, slow, fast in cases:
+            expected = json_renderer.render(slow)
+            assert json_renderer.render(fast) == expected, f"{name} output differs (json)"
+            assert orjson_renderer.render(fast) == expected, f"{name} output differs (orjson)"
+    print("golden: fast path output is byte-identical for detail, outline and list")
+
+    doc = make_doc()
+    slow = timed(lambda: json_renderer.render(CourseDetailSerializer(Course._from_son(doc)).data))
+    fast = timed(lambda: json_renderer.render(fast_serializers.course_detail(doc, {})))
+    fastest = timed(lambda: orjson_renderer.render(fast_serializers.course_detail(doc, {})))
+
+    print(f"detail, {MODULES * SUBTOPICS} subtopics, per read:")
+    print(f"  mongoengine + DRF + json: {slow:.3f}ms")
+    print(f"  raw + transformer + json: {fast:.3f}ms ({slow / fast:.1f}x)")
+    print(f"  raw + transformer + orjson: {fastest:.3f}ms ({slow / fastest:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Resuming a cut-off course generation versus regenerating it. A fake model
+cuts its first course response off at CUT_AT of its length; continuation
+prompts are answered with the modules after the ones already written. The
+resumed course must equal the full course, and the output tokens paid are
+compared with a full retry. The streaming path is checked the same way.
+
+Usage (from backend/):
+    python -m benchmarks.bench_generation_resume
+"""
+import json
+import os
+import re
+import threading
+
+from benchmarks.bench_generation_strategy import FakeResponse, course_data
+
+CUT_AT = 0.6
+
+
+class TruncatingModel:
+    def __init__(self):
+        self.course = course_data()
+        self.output_tokens = 0
+        self._cut = True
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt):
+        if 'response was cut off' in prompt:
+            written = len(re.findall(r'^\d+\. ', prompt.split('already complete:')[1].split('Continue the course')[0], re.M))
+            text = json.dumps({'modules': self.course['modules'][written:]})
+        else:
+            text = json.dumps(self.course, indent=2)
+            with self._lock:
+                if self._cut:
+                    self._cut = False
+                    text = text[:int(len(text) * CUT_AT)]
+        with self._lock:
+            self.output_tokens += len(text) // 4
+        return text
+
+    def generate_content(self, prompt, stream=False):
+        text = self._respond(prompt)
+        if stream:
+            return [FakeResponse(text[index:index + 200]) for index in range(0, len(text), 200)]
+        return FakeResponse(text)
+
+
+def main():
+    os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+    os.environ['REDIS_URL'] = 'redis://127.0.0.1:1/0'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    django.setup()
+    from utils.gemini_service import gemini_service
+    from utils.metrics import metrics
+
+    model = gemini_service.model = TruncatingModel()
+    data = gemini_service.generate_course('Resume benchmark', 'Cut-off response', 'Other', strategy='single')
+    assert data == model.course, "resumed course differs from the full course"
+    resumed_tokens = model.output_tokens
+    full_tokens = len(json.dumps(model.course, indent=2)) // 4
+    retry_tokens = int(full_tokens * CUT_AT) + full_tokens
+
+    model = gemini_service.model = TruncatingModel()
+    streamed = list(gemini_service.generate_course_stream('Resume benchmark', 'Cut-off stream', 'Other'))
+    assert streamed == model.course['modules'], "resumed stream differs from the full course"
+
+    saved = metrics.snapshot()['counters']['gemini.continuation_tokens_saved']
+    print(f"course cut off at {CUT_AT:.0%} of {full_tokens} output tokens")
+    print(f"full retry:  {retry_tokens} output tokens")
+    print(f"resumed:     {resumed_tokens} output tokens ({retry_tokens - resumed_tokens} fewer)")
+    print(f"tokens saved (metric, single + stream): {saved}")
+
+
+if __name__ == '__main__':
+    main()
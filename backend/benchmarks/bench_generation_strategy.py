@@ -0,0 +1,118 @@
+"""
+Compares the "single" and "outline" Gemini generation strategies against a
+fake model whose latency is a fixed time-to-first-token plus a per-token cost
+for the output it returns. One module call fails once with truncated JSON to
+exercise the per-module retry. Both strategies must assemble the same
+course_data.
+
+Usage (from backend/):
+    python -m benchmarks.bench_generation_strategy
+"""
+import json
+import os
+import re
+import threading
+import time
+
+FIRST_TOKEN_LATENCY = 0.4
+TOKEN_LATENCY = 0.004
+MODULES = 7
+SUBTOPICS = 4
+PARAGRAPH = ("This lesson explains the idea step by step, with a worked example and the "
+             "mistakes beginners usually make along the way. ") * 4
+
+
+def course_data():
+    return {
+        'modules': [
+            {
+                'title': f'Module {m}',
+                'subtopics': [
+                    {
+                        'title': f'Module {m} lesson {s}',
+                        'video_url': f'search:module {m} lesson {s} tutorial',
+                        'content': '\n\n'.join([PARAGRAPH] * 3),
+                    }
+                    for s in range(SUBTOPICS)
+                ],
+            }
+            for m in range(MODULES)
+        ]
+    }
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Answers course, outline and module prompts; sleeps in proportion to the output length."""
+
+    def __init__(self, fail_module=None):
+        self.course = course_data()
+        self.fail_module = fail_module
+        self.calls = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        if 'Generate the outline' in prompt:
+            text = json.dumps({'modules': [
+                {'title': module['title'], 'subtopics': [
+                    {'title': subtopic['title'], 'video_url': subtopic['video_url']}
+                    for subtopic in module['subtopics']
+                ]}
+                for module in self.course['modules']
+            ]})
+        elif 'writing one module' in prompt:
+            title = re.search(r'lessons of the module \*\*(.+?)\*\*', prompt).group(1)
+            module = next(module for module in self.course['modules'] if module['title'] == title)
+            text = json.dumps({'subtopics': [
+                {'title': subtopic['title'], 'content': subtopic['content']} for subtopic in module['subtopics']
+            ]})
+            with self._lock:
+                if title == self.fail_module:
+                    self.fail_module = None
+                    text = text[:len(text) // 2]
+        else:
+            text = json.dumps(self.course)
+
+        tokens = len(text) // 4
+        with self._lock:
+            self.calls += 1
+            self.output_tokens += tokens
+        time.sleep(FIRST_TOKEN_LATENCY + tokens * TOKEN_LATENCY)
+        return FakeResponse(text)
+
+
+def main():
+    os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+    os.environ['REDIS_URL'] = 'redis://127.0.0.1:1/0'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from utils.gemini_service import gemini_service
+
+    results = {}
+    for strategy, fail_module in (('single', None), ('outline', 'Module 3')):
+        model = gemini_service.model = FakeModel(fail_module=fail_module)
+        start = time.perf_counter()
+        data = gemini_service.generate_course(f'Benchmark {strategy}', 'Strategy benchmark', 'Other', strategy=strategy)
+        results[strategy] = (data, time.perf_counter() - start, model.calls, model.output_tokens)
+
+    assert results['single'][0] == results['outline'][0], "strategies assembled different course_data"
+
+    print(f"course: {MODULES} modules x {SUBTOPICS} subtopics, fake model "
+          f"{FIRST_TOKEN_LATENCY * 1000:.0f}ms + {TOKEN_LATENCY * 1000:.0f}ms/token, "
+          f"{settings.GEMINI_MODULE_WORKERS} module workers")
+    for strategy, (_, elapsed, calls, tokens) in results.items():
+        print(f"{strategy:8} {elapsed:6.2f}s  {calls} call(s), {tokens} output tokens")
+    print(f"speedup: {results['single'][1] / results['outline'][1]:.1f}x "
+          f"(outline run includes one retried module)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Correctness and throughput check for the tolerant model output parser.
+Runs every sample of benchmarks/model_output_corpus.py through the previous
+regex + json.loads + validation path and through utils.model_json, asserts
+the new parser meets each sample's expectation, also when streamed, and
+times both.
+
+Usage (from backend/):
+    python -m benchmarks.bench_model_json
+"""
+import json
+import re
+import time
+
+from benchmarks.model_output_corpus import samples
+from utils.json_stream import ModuleStreamParser
+from utils.model_json import ModelJSONError, ModelJSONParser, parse_course
+
+ITERATIONS = 200
+
+
+def legacy_parse(response_text):
+    """The parsing GeminiService._parse_response did before utils.model_json."""
+    cleaned_text = response_text.strip()
+    if cleaned_text.startswith('```'):
+        json_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', cleaned_text, re.DOTALL)
+        if json_match:
+            cleaned_text = json_match.group(1)
+        else:
+            lines = cleaned_text.split('\n')
+            if lines[0].startswith('```'):
+                lines = lines[1:]
+            if lines[-1].startswith('```'):
+                lines = lines[:-1]
+            cleaned_text = '\n'.join(lines)
+
+    cleaned_text = cleaned_text.replace('\r', '')
+    cleaned_text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', cleaned_text)
+    course_data = json.loads(cleaned_text, strict=False)
+    if 'modules' not in course_data:
+        raise ValueError("Response missing 'modules' key")
+    for module in course_data['modules']:
+        if 'title' not in module or 'subtopics' not in module:
+            raise ValueError("Module missing required fields")
+        for subtopic in module['subtopics']:
+            if not all(key in subtopic for key in ['title', 'video_url', 'content']):
+                raise ValueError("Subtopic missing required fields")
+    return course_data
+
+
+def check(name, text, expected, mode):
+    try:
+        modules = parse_course(text).data['modules']
+    except ModelJSONError:
+        assert mode in ('error', 'salvage'), f"{name}: parser rejected the sample"
+        return 0
+    assert mode != 'error', f"{name}: parser accepted an invalid sample"
+    if mode == 'exact':
+        assert modules == expected, f"{name}: parsed modules differ"
+    else:
+        assert modules == expected[:len(modules)], f"{name}: salvaged modules differ"
+    return len(modules)
+
+
+def check_unicode_escapes():
+    parser = ModelJSONParser()
+    result = parser.parse('{"a": "caf\\u00')
+    assert not result.complete and result.data == {}, "cut-off \\u escape should stop parsing"
+    result = parser.parse('{"a": "b", "c": "d\\uZZZZ"}')
+    assert result.data == {'a': 'b'} and result.error, "malformed \\u escape should stop parsing"
+
+
+def check_stream(corpus, chunk_size=64):
+    """Streamed in chunks, every sample the parser recovers exactly gives the same modules."""
+    for name, text, expected, mode in corpus:
+        if mode != 'exact':
+            continue
+        parser = ModuleStreamParser()
+        modules = []
+        for start in range(0, len(text), chunk_size):
+            try:
+                modules += parser.feed(text[start:start + chunk_size])
+            except ModelJSONError:
+                break
+        assert modules == expected, f"{name}: streamed modules differ"
+
+
+def legacy_modules(text):
+    try:
+        return len(legacy_parse(text)['modules'])
+    except Exception:
+        return 0
+
+
+def timed(fn, texts):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for text in texts:
+            try:
+                fn(text)
+            except Exception:
+                pass
+    return time.perf_counter() - start
+
+
+def main():
+    check_unicode_escapes()
+    corpus = samples()
+    check_stream(corpus)
+    recovered = legacy_recovered = expected_total = 0
+    for name, text, expected, mode in corpus:
+        recovered += check(name, text, expected, mode)
+        legacy_recovered += legacy_modules(text)
+        expected_total += len(expected)
+    print(f"corpus: {len(corpus)} samples, {expected_total} modules")
+    print(f"modules recovered: legacy {legacy_recovered}, tolerant {recovered}")
+
+    clean = [text for name, text, _, _ in corpus if '/' not in name and text.startswith(('{', '`', 'H'))]
+    for label, texts in (('clean', clean), ('whole corpus', [sample[1] for sample in corpus])):
+        size = sum(len(text) for text in texts) * ITERATIONS / 1e6
+        legacy_time = timed(legacy_parse, texts)
+        tolerant_time = timed(parse_course, texts)
+        print(f"{label:12} legacy {size / legacy_time:6.1f} MB/s, tolerant {size / tolerant_time:6.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Checks that utils.managed_redis recovers from a Redis outage without a
+restart, and measures the managed client's overhead and pool behaviour.
+A local TCP proxy in front of REDIS_URL is cut and restored to simulate the
+outage.
+
+Usage (from backend/, with Redis running):
+    python -m benchmarks.bench_redis_recovery
+"""
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+ITERATIONS = 2000
+HEALTH_CHECK_INTERVAL = 0.2
+
+
+class ToggleProxy:
+    """Forwards TCP connections to Redis while `up`; cutting it drops every connection."""
+
+    def __init__(self, host, port):
+        self.target = (host, port)
+        self.up = True
+        self._sockets = []
+        self._listener = socket.create_server(('127.0.0.1', 0))
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client, _ = self._listener.accept()
+            if not self.up:
+                client.close()
+                continue
+            upstream = socket.create_connection(self.target)
+            self._sockets += [client, upstream]
+            for source, sink in ((client, upstream), (upstream, client)):
+                threading.Thread(target=self._pipe, args=(source, sink), daemon=True).start()
+
+    def _pipe(self, source, sink):
+        try:
+            while data := source.recv(65536):
+                sink.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, sink):
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+
+    def cut(self):
+        self.up = False
+        for sock in self._sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._sockets = []
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return time.monotonic()
+        time.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    import redis
+    from django.conf import settings
+    from utils.managed_redis import ManagedRedis
+
+    url = urlparse(settings.REDIS_URL)
+    raw = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        raw.ping()
+    except redis.ConnectionError:
+        raise SystemExit(f"Redis is not reachable at {settings.REDIS_URL}")
+
+    proxy = ToggleProxy(url.hostname or 'localhost', url.port or 6379)
+    managed = ManagedRedis(
+        f"redis://127.0.0.1:{proxy.port}{url.path or '/0'}",
+        max_connections=4, pool_timeout=2, socket_timeout=0.5,
+        health_check_interval=HEALTH_CHECK_INTERVAL
+    )
+
+    assert managed, "managed client should connect lazily on first use"
+    managed.set('bench:redis_recovery', 'ok')
+
+    for label, client in (('raw', raw), ('managed', managed)):
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            client.get('bench:redis_recovery')
+        print(f"{label:8} GET {(time.perf_counter() - start) / ITERATIONS * 1e6:7.1f} us")
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda _: managed.get('bench:redis_recovery'), range(2000)))
+    usage = managed.stats()['pool']
+    assert usage['created'] <= 4, usage
+    print(f"16 threads on a 4-connection pool: {usage}")
+
+    proxy.cut()
+    cut_at = time.monotonic()
+    try:
+        managed.get('bench:redis_recovery')
+    except (redis.ConnectionError, redis.TimeoutError):
+        pass
+    assert not managed, "a failed command should mark Redis down"
+    print(f"outage detected after {(time.monotonic() - cut_at) * 1000:.0f} ms")
+
+    proxy.up = True
+    restored_at = time.monotonic()
+    recovered_at = wait_for(lambda: bool(managed), HEALTH_CHECK_INTERVAL * 10)
+    assert managed.get('bench:redis_recovery') == 'ok'
+    stats = managed.stats()
+    assert stats['reconnects'] == 1, stats
+    print(f"re-enabled {(recovered_at - restored_at) * 1000:.0f} ms after Redis came back; {stats}")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        pipe = managed.pipeline(transaction=False)
+        pipe.set('bench:redis_recovery', 'ok')
+        pipe.get('bench:redis_recovery')
+        assert pipe.execute() == [True, 'ok']
+        script = managed.script("return redis.call('GET', KEYS[1])")
+        assert set(executor.map(lambda _: script(keys=['bench:redis_recovery']), range(50))) == {'ok'}
+    managed.delete('bench:redis_recovery')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Exercises utils.resilience against fault-injecting stubs: the local fake
+YouTube server (slow tail, outage, recovery) and a hanging fake Gemini model.
+Asserts breaker transitions, timeouts and hedging, and compares latency with
+the previous fixed-timeout calls.
+
+Usage (from backend/):
+    python -m benchmarks.bench_resilience
+"""
+import asyncio
+import logging
+import time
+
+import requests
+
+from benchmarks.fake_youtube import start_fake_youtube
+from utils.resilience import CLOSED, OPEN, CircuitOpen, Dependency, DependencyTimeout, transient_http_error
+
+CALLS = 100
+
+
+def youtube_request(search_url, term):
+    def request(timeout):
+        response = requests.get(search_url, params={'q': term}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    return request
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1], sum(latencies)
+
+
+def timed_calls(call, count):
+    latencies = []
+    for index in range(count):
+        start = time.perf_counter()
+        call(index)
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+
+def slow_tail(search_url):
+    """One request in 25 takes 1.5s instead of 30ms."""
+    fixed = timed_calls(lambda i: youtube_request(search_url, f"term {i}")(10), CALLS)
+
+    dependency = Dependency('youtube-hedged', max_timeout=10, hedge=True, transient=transient_http_error)
+    for index in range(40):
+        dependency.call(youtube_request(search_url, f"warmup {index}"))
+    hedged = timed_calls(lambda i: dependency.call(youtube_request(search_url, f"term {i}")), CALLS)
+
+    stats = dependency.stats()
+    assert stats['hedges'] > 0 and stats['hedge_wins'] > 0, stats
+    assert hedged[1] < fixed[1] / 2, (hedged, fixed)
+    for label, (p50, p99, total) in (('fixed', fixed), ('hedged', hedged)):
+        print(f"slow tail  {label:7} p50 {p50 * 1000:6.1f} ms  p99 {p99 * 1000:7.1f} ms  total {total:5.2f}s")
+    print(f"           hedges {stats['hedges']}, won {stats['hedge_wins']}, "
+          f"adaptive timeout {stats['operations']['default']['timeout']}s")
+
+
+def outage(server, search_url):
+    """Every request fails with 503, then the service recovers."""
+    handler = server.RequestHandlerClass
+    handler.fail_every = 1
+
+    def lookups(dependency):
+        start = time.perf_counter()
+        for index in range(28):
+            try:
+                dependency.call(youtube_request(search_url, f"outage {index}"))
+            except (CircuitOpen, requests.RequestException):
+                pass
+        return time.perf_counter() - start
+
+    unguarded = Dependency('youtube-no-breaker', max_timeout=10, failure_threshold=10 ** 9,
+                           backoff_base=0.05, transient=transient_http_error)
+    guarded = Dependency('youtube-breaker', max_timeout=10, reset_timeout=0.5,
+                         backoff_base=0.05, transient=transient_http_error)
+    unguarded_time = lookups(unguarded)
+    guarded_time = lookups(guarded)
+    stats = guarded.stats()
+    assert stats['breaker']['state'] == OPEN and stats['rejected'] > 20, stats
+    print(f"outage     28 lookups: no breaker {unguarded_time:.2f}s, breaker {guarded_time:.2f}s "
+          f"({stats['rejected']} rejected fast)")
+
+    handler.fail_every = 0
+    time.sleep(0.6)
+    guarded.call(youtube_request(search_url, 'recovered'))
+    assert guarded.breaker.state == CLOSED
+    print("recovery   half-open probe succeeded, circuit closed")
+
+
+class HangingModel:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return prompt
+
+
+def hung_gemini():
+    """A completion that never returns is abandoned at the (adaptive) timeout."""
+    dependency = Dependency('gemini-stub', max_timeout=0.5, min_timeout=0.05, retries=0,
+                            thread_timeouts=True, min_samples=20)
+    fast = HangingModel(0.005)
+    for _ in range(20):
+        dependency.call(lambda timeout: fast.generate_content('ok'))
+    adaptive = dependency.timeout()
+    assert adaptive < 0.5, adaptive
+
+    hanging = HangingModel(3)
+    start = time.perf_counter()
+    try:
+        dependency.call(lambda timeout: hanging.generate_content('hang'))
+        raise AssertionError("hanging call returned")
+    except DependencyTimeout:
+        pass
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.5, elapsed
+    print(f"hung model abandoned after {elapsed * 1000:.0f} ms (adaptive timeout {adaptive * 1000:.0f} ms, "
+          f"fixed 500 ms)")
+
+
+def async_hedge():
+    dependency = Dependency('async-stub', max_timeout=5, hedge=True, min_samples=20)
+    for _ in range(20):
+        dependency._tracker('default').add(0.01)
+    calls = []
+
+    async def request(timeout):
+        calls.append(timeout)
+        await asyncio.sleep(2 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    start = time.perf_counter()
+    result = asyncio.run(dependency.call_async(request))
+    elapsed = time.perf_counter() - start
+    assert result == 2 and elapsed < 0.5, (result, elapsed)
+    print(f"async hedge answered in {elapsed * 1000:.0f} ms instead of 2000 ms")
+
+
+def main():
+    logging.getLogger('utils.resilience').setLevel(logging.ERROR)
+    server, search_url = start_fake_youtube(latency=0.03, slow_every=25, slow_latency=1.5)
+    slow_tail(search_url)
+    server.RequestHandlerClass.slow_every = 0
+    outage(server, search_url)
+    hung_gemini()
+    async_hedge()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
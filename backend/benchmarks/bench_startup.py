@@ -0,0 +1,112 @@
+"""
+Measures startup in fresh interpreters: the import time of core.wsgi, the
+time to the first request (which loads the URLconf and, through it, every
+view module) and the wall time of `manage.py check`.
+
+Checks that startup is side-effect free: no service in utils.services is
+built, Redis and the Gemini SDK are not imported and nothing connects until
+a request needs it. It then repeats the run with WARM_UP_SERVICES set to the
+services this environment can reach, which is what importing the app used
+to cost. Set STARTUP_BUDGET_MS to also fail when lazy import + first request
+exceeds it.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 5
+# Imported only when the service that needs them is first used.
+LAZY_MODULES = ('redis', 'google.generativeai', 'requests')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import core.wsgi
+imported = time.perf_counter()
+
+def request(path):
+    from wsgiref.util import setup_testing_defaults
+    environ = {'PATH_INFO': path}
+    setup_testing_defaults(environ)
+    status = []
+    b''.join(core.wsgi.application(environ, lambda s, headers, exc_info=None: status.append(s)))
+    assert status[0].startswith('200'), status
+
+request('/ping/')
+first = time.perf_counter()
+request('/ping/')
+second = time.perf_counter()
+
+from utils.services import services
+print(json.dumps({
+    'import': imported - started,
+    'first_request': first - imported,
+    'second_request': second - first,
+    'loaded': [name for name in %r if name in sys.modules],
+    'services': services.stats(),
+}))
+""" % (LAZY_MODULES,)
+
+
+def probe(env):
+    output = subprocess.run([sys.executable, '-c', PROBE], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def median_run(env):
+    runs = [probe(env) for _ in range(RUNS)]
+    result = dict(runs[-1])
+    for key in ('import', 'first_request', 'second_request'):
+        result[key] = statistics.median(run[key] for run in runs)
+    return result
+
+
+def manage_check(env):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'manage.py', 'check'], env=env, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def report(label, result):
+    print(f"{label:8} import {result['import'] * 1000:7.1f} ms  first request {result['first_request'] * 1000:7.1f} ms  "
+          f"second {result['second_request'] * 1000:5.1f} ms")
+
+
+def main():
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='core.settings', WARM_UP_SERVICES='')
+
+    lazy = median_run(env)
+    report('lazy', lazy)
+    built = [name for name, stats in lazy['services'].items() if stats['initialized']]
+    assert not built, f"services built at startup: {built}"
+    assert 'redis' not in lazy['loaded'] and 'google.generativeai' not in lazy['loaded'], lazy['loaded']
+    print(f"         no service built; imported of {list(LAZY_MODULES)}: {lazy['loaded'] or 'none'}")
+
+    budget = os.getenv('STARTUP_BUDGET_MS')
+    if budget:
+        total = (lazy['import'] + lazy['first_request']) * 1000
+        assert total <= float(budget), f"startup took {total:.0f} ms, budget {budget} ms"
+
+    reachable = ['redis', 'youtube']
+    if os.getenv('GEMINI_API_KEY'):
+        reachable.append('gemini')
+    if os.getenv('MONGODB_URI'):
+        reachable.append('mongo')
+    warm = median_run(dict(env, WARM_UP_SERVICES=','.join(reachable)))
+    report('warm-up', warm)
+    print(f"         built at import: {[name for name, stats in warm['services'].items() if stats['initialized']]}")
+
+    print(f"manage.py check: {manage_check(env) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Measures the bytes exchanged with MongoDB per subtopic toggle, comparing the
+old load-mutate-save path with Course.toggle_subtopic, and checks that only
+writes that change a course bump the user's version. Requires MONGODB_URI.
+
+Usage (from backend/):
+    python -m benchmarks.bench_subtopic_toggle
+"""
+import os
+
+import bson
+from pymongo import monitoring
+
+MODULES = 7
+SUBTOPICS = 4
+PARAGRAPH = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12
+
+
+class ByteCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+
+    def reset(self):
+        self.sent = self.received = 0
+
+    def started(self, event):
+        self.sent += len(bson.encode(event.command))
+
+    def succeeded(self, event):
+        self.received += len(bson.encode(event.reply))
+
+    def failed(self, event):
+        pass
+
+
+def check_version_bumps(Course, CourseVersion, course_id):
+    def bumps(write):
+        start = CourseVersion.current('benchmark')
+        try:
+            write()
+        except (TypeError, ValueError):
+            pass
+        return CourseVersion.current('benchmark') - start
+
+    assert bumps(lambda: Course.toggle_subtopic(course_id, 'benchmark', 3, 2)) == 1
+    assert bumps(lambda: Course.toggle_subtopic(course_id, 'benchmark', 3, 99)) == 0
+    assert bumps(lambda: Course.set_position(course_id, 'benchmark', module_index='x')) == 0
+    assert bumps(lambda: Course.set_position(course_id, 'benchmark', module_index=2)) == 1
+    assert bumps(lambda: Course.set_position(course_id, 'benchmark', module_index=2)) == 0
+    print("version:          bumped once per changing write, never for rejected or no-op ones")
+
+
+def main():
+    counter = ByteCounter()
+    monitoring.register(counter)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    django.setup()
+    from courses.models import Course, CourseVersion, Module, Subtopic
+
+    course = Course(
+        user_id='benchmark',
+        title='Benchmark course',
+        description='Toggle benchmark',
+        category='Other',
+        modules=[
+            Module(title=f'Module {m}', order=m, subtopics=[
+                Subtopic(title=f'Lesson {s}', video_url='https://www.youtube.com/watch?v=x',
+                         content='\n\n'.join([PARAGRAPH] * 3), order=s)
+                for s in range(SUBTOPICS)
+            ])
+            for m in range(MODULES)
+        ]
+    )
+    course.save()
+
+    try:
+        counter.reset()
+        loaded = Course.objects.get(pk=course.pk, user_id='benchmark')
+        subtopic = loaded.modules[3].subtopics[2]
+        subtopic.completed = not subtopic.completed
+        loaded.save()
+        before = (counter.sent, counter.received)
+
+        counter.reset()
+        Course.toggle_subtopic(str(course.pk), 'benchmark', 3, 2)
+        after = (counter.sent, counter.received)
+
+        print(f"load + save:      {before[0]:>7} bytes sent, {before[1]:>7} bytes received")
+        print(f"atomic toggle:    {after[0]:>7} bytes sent, {after[1]:>7} bytes received")
+        print(f"reduction:        {sum(before) / sum(after):.1f}x")
+
+        check_version_bumps(Course, CourseVersion, str(course.pk))
+    finally:
+        course.delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares serial vs batched, concurrent video resolution for a 7-module, 4-subtopic course
+against a local fake YouTube server. Redis is pointed at an unused port so every
+lookup takes the HTTP path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_video_resolution
+"""
+import os
+import time
+
+from benchmarks.fake_youtube import start_fake_youtube
+
+LATENCY = 0.2
+MODULES = 7
+SUBTOPICS = 4
+
+
+def main():
+    server, search_url = start_fake_youtube(latency=LATENCY)
+    os.environ['YOUTUBE_API_KEY'] = 'benchmark'
+    os.environ['YOUTUBE_SEARCH_URL'] = search_url
+    os.environ['REDIS_URL'] = 'redis://127.0.0.1:1/0'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+    django.setup()
+    from utils.youtube_service import youtube_service
+
+    terms = [f"module {m} lesson {s} tutorial" for m in range(MODULES) for s in range(SUBTOPICS)]
+
+    start = time.perf_counter()
+    serial = {term: youtube_service._fetch_video(term) for term in terms}
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = youtube_service.search_videos(terms)
+    concurrent_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    youtube_service.search_videos(terms)
+    warm_time = time.perf_counter() - start
+
+    assert serial == concurrent, "concurrent resolution returned different videos"
+
+    print(f"terms: {len(terms)}, fake latency: {LATENCY * 1000:.0f}ms")
+    print(f"serial:     {serial_time:.2f}s")
+    print(f"concurrent: {concurrent_time:.2f}s ({youtube_service.max_workers} workers)")
+    print(f"speedup:    {serial_time / concurrent_time:.1f}x")
+    print(f"warm local cache: {warm_time * 1000:.2f}ms {youtube_service.cache_stats()}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
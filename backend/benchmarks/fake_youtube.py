@@ -0,0 +1,67 @@
+"""
+Local stand-in for the YouTube Data API search endpoint, used by the benchmarks.
+Every request sleeps for a fixed latency and returns a single video result.
+Faults can be injected: every `slow_every`-th request takes `slow_latency`
+instead, and every `fail_every`-th request answers `fail_status`. The
+settings live on the handler class (server.RequestHandlerClass) and can be
+changed while the server runs.
+"""
+import hashlib
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+    latency = 0.2
+    slow_every = 0
+    slow_latency = 0
+    fail_every = 0
+    fail_status = 503
+    counter = None
+
+    def do_GET(self):
+        number = next(self.counter)
+        if self.slow_every and number % self.slow_every == 0:
+            time.sleep(self.slow_latency)
+        else:
+            time.sleep(self.latency)
+        if self.fail_every and number % self.fail_every == 0:
+            self.send_response(self.fail_status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+        video_id = hashlib.md5(query.encode()).hexdigest()[:11]
+        body = json.dumps({'items': [{'id': {'videoId': video_id}}]}).encode()
+
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up, e.g. the losing half of a hedged request.
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_youtube(latency=0.2, **faults):
+    """
+    Starts the fake server on a free port and returns (server, search_url).
+    `faults` sets slow_every, slow_latency, fail_every and fail_status.
+    """
+    handler = type('Handler', (FakeYouTubeHandler,), {
+        'latency': latency, 'counter': itertools.count(1), **faults
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/youtube/v3/search"
@@ -0,0 +1,104 @@
+"""
+Corpus of model outputs for the tolerant parser in utils/model_json.py: the
+responses saved in benchmarks/corpus/, a larger synthetic course, and
+mutations of each that reproduce the defects seen in Gemini output.
+
+Every sample is (name, text, expected_modules, mode): in 'exact' mode the
+parser must recover expected_modules exactly, in 'salvage' mode a prefix of
+them (possibly empty), and in 'error' mode it must raise.
+"""
+import json
+import re
+from pathlib import Path
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'corpus'
+PARAGRAPH = ("Each lesson walks through the idea with a short example, then lists the "
+             "mistakes beginners make and how to avoid them. ")
+
+
+def synthetic_course(modules=7, subtopics=4):
+    return {
+        'modules': [
+            {
+                'title': f'Module {m}: Core concepts part {m}',
+                'subtopics': [
+                    {
+                        'title': f'Lesson {m}.{s}',
+                        'video_url': f'search:topic {m} lesson {s} tutorial',
+                        'content': '\n\n'.join([PARAGRAPH * 3] * 3),
+                    }
+                    for s in range(subtopics)
+                ],
+            }
+            for m in range(modules)
+        ]
+    }
+
+
+def clean_samples():
+    samples = []
+    for path in sorted(CORPUS_DIR.glob('*.txt')):
+        text = path.read_text()
+        expected = json.loads(text[text.index('{'):text.rindex('}') + 1])
+        samples.append((path.stem, text, expected['modules']))
+
+    course = synthetic_course()
+    samples.append(('synthetic_compact', json.dumps(course), course['modules']))
+    samples.append(('synthetic_fenced', f"```json\n{json.dumps(course, indent=2)}\n```", course['modules']))
+    return samples
+
+
+STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+
+def _in_strings(pattern, replacement, text):
+    """Applies a substitution inside JSON string literals only."""
+    return STRING_RE.sub(lambda match: re.sub(pattern, replacement, match.group(0)), text)
+
+
+def _outside_strings(pattern, replacement, text):
+    """Applies a substitution to the JSON structure, leaving string literals alone."""
+    parts = STRING_RE.split(text)
+    strings = STRING_RE.findall(text)
+    result = [re.sub(pattern, replacement, parts[0])]
+    for string, part in zip(strings, parts[1:]):
+        result.append(string)
+        result.append(re.sub(pattern, replacement, part))
+    return ''.join(result)
+
+
+MUTATIONS = [
+    ('crlf', lambda text: text.replace('\n', '\r\n'), 'exact'),
+    ('raw_newlines', lambda text: text.replace('\\n', '\n'), 'exact'),
+    ('unescaped_quotes', lambda text: text.replace('\\"', '"'), 'exact'),
+    ('trailing_commas', lambda text: _outside_strings(r'(\s*)([\]}])', r',\1\2', text), 'exact'),
+    ('missing_commas', lambda text: _outside_strings(r'}(\s*),(\s*){', r'}\1\2{', text), 'exact'),
+    ('control_chars', lambda text: _in_strings(r'\. ', '.\x0b\x00 ', text), 'exact'),
+    ('invalid_escapes', lambda text: _in_strings(r"'", r"\\'", text), 'exact'),
+    ('truncated_25', lambda text: text[:len(text) * 25 // 100], 'salvage'),
+    ('truncated_50', lambda text: text[:len(text) * 50 // 100], 'salvage'),
+    ('truncated_75', lambda text: text[:len(text) * 75 // 100], 'salvage'),
+    ('truncated_95', lambda text: text[:len(text) * 95 // 100], 'salvage'),
+    ('truncated_in_escape', lambda text: text[:text.rindex('\\n') + 1], 'salvage'),
+    ('malformed_tail', lambda text: '}, #'.join(text.rsplit('},', 1)), 'salvage'),
+]
+
+
+def samples():
+    result = []
+    for name, text, modules in clean_samples():
+        result.append((name, text, modules, 'exact'))
+        for mutation, mutate, mode in MUTATIONS:
+            result.append((f'{name}/{mutation}', mutate(text), modules, mode))
+    result.append(('no_json', "I'm sorry, I can't generate that course right now.", [], 'error'))
+    result.append(('empty_modules', '{"modules": []}', [], 'error'))
+
+    # A response cut off inside a \uXXXX escape, or with a malformed one,
+    # keeps the modules completed before it.
+    course = synthetic_course(modules=4, subtopics=2)
+    course['modules'][3]['subtopics'][1]['content'] += ' caf\u00e9'
+    text = json.dumps(course, ensure_ascii=True)
+    result.append(('cut_in_unicode_escape', text[:text.rindex('\\u00e9') + 5], course['modules'][:3], 'exact'))
+    result.append(('invalid_unicode_escape', text.replace('\\u00e9', '\\uZZZZ'), course['modules'][:3], 'exact'))
+    result.append(('invalid_unicode_escape_first', text.replace('Lesson 0.0', 'Lesson \\uZZZZ'), [], 'error'))
+    return result
@@ -63,15 +63,9 @@ DATABASES = {
     }
 }
 
+# Connected on first use by utils.services, not at import.
 MONGODB_URI = os.getenv('MONGODB_URI', '')
 
-if MONGODB_URI:
-    try:
-        import mongoengine
-        mongoengine.connect(host=MONGODB_URI)
-    except Exception:
-        pass
-
 AUTH_USER_MODEL = 'users.User'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -81,10 +75,14 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Set to 'utils.renderers.ORJSONRenderer' for faster JSON encoding.
+JSON_RENDERER = os.getenv('JSON_RENDERER', 'rest_framework.renderers.JSONRenderer')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework_simplejwt.authentication.JWTAuthentication'],
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
-    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_RENDERER_CLASSES': [JSON_RENDERER],
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
 }
 
 SIMPLE_JWT = {
@@ -113,6 +111,11 @@ CORS_ALLOW_HEADERS = [
     'x-demo-user', 
 ]
 
+CORS_EXPOSE_HEADERS = [
+    'x-next-cursor',
+    'etag',
+]
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -129,4 +132,84 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY', '')
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
+REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', '2'))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '2'))
+REDIS_HEALTH_CHECK_INTERVAL = float(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', '5'))
 YOUTUBE_CACHE_TTL = 2592000
+YOUTUBE_SEARCH_URL = os.getenv('YOUTUBE_SEARCH_URL', 'https://www.googleapis.com/youtube/v3/search')
+YOUTUBE_MAX_WORKERS = int(os.getenv('YOUTUBE_MAX_WORKERS', '8'))
+YOUTUBE_RESOLVE_DEADLINE = float(os.getenv('YOUTUBE_RESOLVE_DEADLINE', '15'))
+YOUTUBE_NEGATIVE_CACHE_TTL = int(os.getenv('YOUTUBE_NEGATIVE_CACHE_TTL', '600'))
+YOUTUBE_LOCAL_CACHE_SIZE = int(os.getenv('YOUTUBE_LOCAL_CACHE_SIZE', '2048'))
+YOUTUBE_LOCAL_CACHE_TTL = int(os.getenv('YOUTUBE_LOCAL_CACHE_TTL', '300'))
+YOUTUBE_SINGLE_FLIGHT_TTL = int(os.getenv('YOUTUBE_SINGLE_FLIGHT_TTL', '15'))
+# Single-flight locks are renewed while the leader works, so the TTL is only
+# how long a crashed leader keeps waiters blocked, not a bound on the work.
+GEMINI_SINGLE_FLIGHT_TTL = int(os.getenv('GEMINI_SINGLE_FLIGHT_TTL', '30'))
+# 'single' (one completion per course) or 'outline' (outline, then modules in parallel).
+GEMINI_GENERATION_STRATEGY = os.getenv('GEMINI_GENERATION_STRATEGY', 'single')
+GEMINI_MODULE_WORKERS = int(os.getenv('GEMINI_MODULE_WORKERS', '8'))
+GEMINI_MODULE_RETRIES = int(os.getenv('GEMINI_MODULE_RETRIES', '2'))
+# Continuation requests for the missing modules of a cut-off or broken response.
+GEMINI_CONTINUATION_RETRIES = int(os.getenv('GEMINI_CONTINUATION_RETRIES', '2'))
+
+# Resilience layer for Gemini and YouTube calls (utils/resilience.py). Timeouts
+# adapt to observed latency, between the _MIN value and the fixed one.
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '120'))
+GEMINI_TIMEOUT_MIN = float(os.getenv('GEMINI_TIMEOUT_MIN', '15'))
+GEMINI_RETRIES = int(os.getenv('GEMINI_RETRIES', '1'))
+GEMINI_HEDGE = os.getenv('GEMINI_HEDGE', 'False') == 'True'
+GEMINI_MAX_CONCURRENT_CALLS = int(os.getenv('GEMINI_MAX_CONCURRENT_CALLS', '32'))
+YOUTUBE_TIMEOUT = float(os.getenv('YOUTUBE_TIMEOUT', '10'))
+YOUTUBE_TIMEOUT_MIN = float(os.getenv('YOUTUBE_TIMEOUT_MIN', '1'))
+YOUTUBE_RETRIES = int(os.getenv('YOUTUBE_RETRIES', '2'))
+YOUTUBE_HEDGE = os.getenv('YOUTUBE_HEDGE', 'False') == 'True'
+
+CURRICULUM_CACHE_TTL = int(os.getenv('CURRICULUM_CACHE_TTL', '604800'))
+CURRICULUM_CACHE_MAX_ENTRIES = int(os.getenv('CURRICULUM_CACHE_MAX_ENTRIES', '10000'))
+SIMILAR_CURRICULUM_REUSE = os.getenv('SIMILAR_CURRICULUM_REUSE', 'True') == 'True'
+SIMILAR_CURRICULUM_THRESHOLD = float(os.getenv('SIMILAR_CURRICULUM_THRESHOLD', '0.7'))
+SIMILAR_CURRICULUM_MAX_CANDIDATES = int(os.getenv('SIMILAR_CURRICULUM_MAX_CANDIDATES', '50'))
+
+COURSE_LIST_PAGE_SIZE = int(os.getenv('COURSE_LIST_PAGE_SIZE', '24'))
+COURSE_LIST_MAX_PAGE_SIZE = int(os.getenv('COURSE_LIST_MAX_PAGE_SIZE', '100'))
+
+COURSE_RENDER_CACHE_TTL = int(os.getenv('COURSE_RENDER_CACHE_TTL', '3600'))
+# Serve list and detail reads from raw documents instead of mongoengine + DRF serializers.
+COURSE_FAST_READS = os.getenv('COURSE_FAST_READS', 'False') == 'True'
+# Serve course create and detail from the native async views (ASGI only).
+COURSE_ASYNC_VIEWS = os.getenv('COURSE_ASYNC_VIEWS', 'False') == 'True'
+ASYNC_MONGO_POOL_SIZE = int(os.getenv('ASYNC_MONGO_POOL_SIZE', '100'))
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', '100'))
+
+# Token buckets for the endpoints that call Gemini, as DRF-style rates: '10/hour'
+# allows a burst of 10 and refills fully over an hour.
+COURSE_RATE_LIMIT_ENABLED = os.getenv('COURSE_RATE_LIMIT_ENABLED', 'True') == 'True'
+COURSE_RATE_LIMITS = {
+    'free': os.getenv('COURSE_RATE_LIMIT_FREE', '10/hour'),
+    'pro': os.getenv('COURSE_RATE_LIMIT_PRO', '60/hour'),
+    'enterprise': os.getenv('COURSE_RATE_LIMIT_ENTERPRISE', '300/hour'),
+}
+COURSE_RATE_LIMIT_IP = os.getenv('COURSE_RATE_LIMIT_IP', '30/hour')
+
+COURSE_JOB_WORKERS = int(os.getenv('COURSE_JOB_WORKERS', '2'))
+COURSE_JOB_MAX_ATTEMPTS = int(os.getenv('COURSE_JOB_MAX_ATTEMPTS', '3'))
+COURSE_JOB_RETRY_BACKOFF = float(os.getenv('COURSE_JOB_RETRY_BACKOFF', '2'))
+COURSE_JOB_TTL = int(os.getenv('COURSE_JOB_TTL', '86400'))
+# A worker holds a lease on the job it runs (longer than any attempt can take)
+# and a short one while idle; jobs of workers whose lease lapses are requeued.
+COURSE_JOB_LEASE = int(os.getenv('COURSE_JOB_LEASE', '900'))
+COURSE_JOB_IDLE_LEASE = int(os.getenv('COURSE_JOB_IDLE_LEASE', '30'))
+COURSE_JOB_REAP_INTERVAL = float(os.getenv('COURSE_JOB_REAP_INTERVAL', '30'))
+COURSE_JOB_INPROCESS_WORKERS = os.getenv('COURSE_JOB_INPROCESS_WORKERS', 'True') == 'True'
+
+# Comma-separated services (mongo, redis, gemini, youtube) that core.wsgi and
+# core.asgi construct and connect at load time instead of on first use.
+WARM_UP_SERVICES = os.getenv('WARM_UP_SERVICES', '')
+
+# /metrics/ is open to staff sessions, to requests with
+# "Authorization: Bearer <METRICS_TOKEN>" when it is set, and to anyone in DEBUG.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
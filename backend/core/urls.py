@@ -13,6 +13,7 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/courses/', include('courses.urls')),
     path("ping/", views.ping, name="ping"),
+    path("metrics/", views.metrics_view, name="metrics"),
 ]
 
 if settings.DEBUG:
@@ -1,4 +1,35 @@
+import hmac
+
+from django.conf import settings
 from django.http import JsonResponse
 
+from courses.curriculum_cache import curriculum_cache
+from utils.metrics import metrics
+from utils.redis_client import redis_client
+from utils.resilience import dependency_stats
+from utils.services import services
+from utils.youtube_service import youtube_service
+
 def ping(request):
     return JsonResponse({"status": "ok"})
+
+
+def metrics_allowed(request):
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if hmac.compare_digest(authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+            return True
+    return settings.DEBUG or request.user.is_staff
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        return JsonResponse({'error': 'Not allowed'}, status=403)
+    snapshot = metrics.snapshot()
+    snapshot['curriculum_cache'] = curriculum_cache.stats()
+    snapshot['dependencies'] = dependency_stats()
+    snapshot['services'] = services.stats()
+    # Scraping metrics should not be what builds the Redis client or YouTube service.
+    snapshot['redis'] = redis_client.stats() if services.initialized('redis') else None
+    snapshot['video_cache'] = youtube_service.cache_stats() if services.initialized('youtube') else None
+    return JsonResponse(snapshot)
@@ -1,10 +1,12 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
 
-
-
+if settings.WARM_UP_SERVICES:
+    from utils.services import services
+    services.warm_up(settings.WARM_UP_SERVICES)
@@ -0,0 +1,105 @@
+"""
+asyncio versions of the course pipeline for the async views. Gemini, YouTube,
+Redis and the course writes are awaited natively (motor, redis.asyncio,
+httpx); the curriculum cache and similarity index, which are short local
+calls, run in a thread.
+"""
+from asgiref.sync import sync_to_async
+from mongoengine.errors import DoesNotExist
+from pymongo import ReturnDocument
+
+from utils.async_clients import get_async_db
+from utils.gemini_service import gemini_service
+from utils.youtube_service import youtube_service
+from . import fast_serializers
+from .models import CONTENT_PROJECTION, Course, CourseVersion, SubtopicContent, content_keys
+from .services import (
+    build_modules,
+    collect_search_terms,
+    find_reusable_curriculum,
+    new_course,
+    remember_curriculum,
+    restore_contents,
+)
+
+
+async def next_version(user_id):
+    document = await get_async_db()[CourseVersion._get_collection_name()].find_one_and_update(
+        {'_id': user_id},
+        {'$inc': {'version': 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return document['version']
+
+
+async def bump_version(course_id, user_id):
+    """Async Course.bump_version."""
+    version = await next_version(user_id)
+    await get_async_db()[Course._get_collection_name()].update_one(
+        Course._owner_filter(course_id, user_id), {'$max': {'version': version}}
+    )
+    return version
+
+
+async def get_version(course_id, user_id):
+    document = await get_async_db()[Course._get_collection_name()].find_one(
+        Course._owner_filter(course_id, user_id), {'version': 1}
+    )
+    if document is None:
+        raise DoesNotExist('Course not found')
+    return document.get('version', 0)
+
+
+async def read_course(course_id, user_id, outline):
+    """Returns (version, data) rendered by the fast transformers; raises DoesNotExist."""
+    db = get_async_db()
+    projection = {'modules.subtopics.content': 0} if outline else None
+    doc = await db[Course._get_collection_name()].find_one(
+        Course._owner_filter(course_id, user_id), projection
+    )
+    if doc is None:
+        raise DoesNotExist('Course not found')
+    if outline:
+        return doc.get('version', 0), fast_serializers.course_outline(doc)
+
+    cursor = db[SubtopicContent._get_collection_name()].find({'course_id': str(doc['_id'])}, CONTENT_PROJECTION)
+    contents = SubtopicContent.select([item async for item in cursor], content_keys(doc.get('modules', [])))
+    return doc.get('version', 0), fast_serializers.course_detail(doc, contents)
+
+
+async def save_course(user_id, title, description, category, thumbnail, modules, account_id=None):
+    db = get_async_db()
+    course, contents = new_course(user_id, title, description, category, thumbnail, modules, account_id)
+    course.validate()
+    result = await db[Course._get_collection_name()].insert_one(course.to_mongo())
+    course.id = result.inserted_id
+    # Only once the course is in the list may the list's ETag change.
+    course.version = await bump_version(course.pk, user_id)
+
+    restore_contents(course, contents)
+    documents = SubtopicContent.documents(str(course.pk), course.modules)
+    if documents:
+        await db[SubtopicContent._get_collection_name()].insert_many(documents, ordered=False)
+    return course
+
+
+async def generate_course(user_id, title, description, category, thumbnail='', generator=None,
+                          reuse_similar=True, strategy=None, account_id=None):
+    reused = await sync_to_async(find_reusable_curriculum, thread_sensitive=False)(
+        title, description, category, reuse_similar
+    )
+    if reused:
+        modules = build_modules(reused, {})
+    else:
+        generator = generator or gemini_service
+        course_data = await generator.generate_course_async(
+            title, description, category, strategy=strategy
+        )
+        videos = await youtube_service.search_videos_async(collect_search_terms(course_data))
+        modules = build_modules(course_data, videos)
+
+    course = await save_course(user_id, title, description, category, thumbnail, modules, account_id)
+    if not reused:
+        await sync_to_async(remember_curriculum, thread_sensitive=False)(course)
+    return course
@@ -0,0 +1,131 @@
+"""
+Native async versions of the course create and detail endpoints, served from
+core.asgi when COURSE_ASYNC_VIEWS is enabled. A create request waits on Gemini
+and YouTube without holding a worker thread, so one ASGI worker can keep many
+generations in flight. Responses, errors included, match the sync views byte for byte.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from mongoengine.errors import DoesNotExist
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import async_services, quota
+from .conditional import etag_matches, make_etag, with_etag
+from .jobs import course_jobs
+from .render_cache import render_cache
+from .serializers import CourseCreateSerializer, CourseDetailSerializer
+from .throttling import CourseGenerationThrottle, generation_buckets
+from .views import CourseCreateView, CourseDetailView, get_demo_user_id, json_renderer
+from utils.rate_limit import rate_limiter, retry_after
+
+course_detail_sync = CourseDetailView.as_view()
+
+
+def _json(data, status_code):
+    return HttpResponse(json_renderer.render(data), content_type='application/json', status=status_code)
+
+
+def _method_not_allowed(request, view_class):
+    response = _json({'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+    response['Allow'] = ', '.join(view_class().allowed_methods)
+    return response
+
+
+async def _authenticate(request):
+    """Runs the JWT authentication the DRF views use; returns the user or None."""
+    result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    return result[0] if result else None
+
+
+async def course_create(request):
+    if request.method != 'POST':
+        return _method_not_allowed(request, CourseCreateView)
+
+    demo_id = get_demo_user_id(request)
+    try:
+        user = await _authenticate(request)
+    except AuthenticationFailed as e:
+        return _json({'detail': e.detail}, status.HTTP_401_UNAUTHORIZED)
+
+    if settings.COURSE_RATE_LIMIT_ENABLED:
+        ident = CourseGenerationThrottle().get_ident(request)
+        wait = await rate_limiter.check_async(generation_buckets(demo_id, ident, user))
+        if wait:
+            response = _json({'detail': Throttled(int(retry_after(wait))).detail}, status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = retry_after(wait)
+            return response
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError as e:
+        return _json({'detail': f'JSON parse error - {e}'}, status.HTTP_400_BAD_REQUEST)
+
+    serializer = CourseCreateSerializer(data=payload)
+    if not serializer.is_valid():
+        return _json(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    title = serializer.validated_data['title']
+    description = serializer.validated_data['description']
+    category = serializer.validated_data['category']
+    thumbnail = serializer.validated_data.get('thumbnail', '')
+    reuse = serializer.validated_data['reuse']
+    strategy = serializer.validated_data.get('strategy')
+
+    try:
+        account_id = await sync_to_async(quota.reserve)(user)
+    except quota.QuotaExceeded as e:
+        return _json(e.data(), status.HTTP_403_FORBIDDEN)
+
+    if request.GET.get('async') in ('1', 'true'):
+        job = await sync_to_async(course_jobs.enqueue, thread_sensitive=False)(
+            demo_id, title, description, category, thumbnail, reuse, strategy, account_id=account_id
+        )
+        return _json(job, status.HTTP_202_ACCEPTED)
+
+    try:
+        course = await async_services.generate_course(
+            demo_id, title, description, category, thumbnail, reuse_similar=reuse, strategy=strategy,
+            account_id=account_id
+        )
+        return _json(CourseDetailSerializer(course).data, status.HTTP_201_CREATED)
+
+    except Exception as e:
+        await sync_to_async(quota.release)(account_id)
+        return _json({'error': f'Failed to generate course: {str(e)}'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def course_detail(request, pk):
+    if request.method == 'DELETE':
+        return await sync_to_async(course_detail_sync)(request, pk=pk)
+    if request.method != 'GET':
+        return _method_not_allowed(request, CourseDetailView)
+
+    demo_id = get_demo_user_id(request)
+    outline = request.GET.get('outline') in ('1', 'true')
+    variant = 'outline' if outline else 'full'
+    try:
+        version = await async_services.get_version(pk, demo_id)
+        etag = make_etag(pk, version, variant)
+        if etag_matches(request, etag):
+            return with_etag(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+        content = await render_cache.get_async(pk, version, variant)
+        if content is None:
+            version, data = await async_services.read_course(pk, demo_id, outline)
+            content = json_renderer.render(data)
+            etag = make_etag(pk, version, variant)
+            await render_cache.set_async(pk, version, variant, content)
+
+        return with_etag(HttpResponse(content, content_type='application/json'), etag)
+    except DoesNotExist:
+        return _json({'error': 'Course not found'}, status.HTTP_404_NOT_FOUND)
+
+
+# Django's csrf_exempt wraps views in a sync function; mark the coroutines directly.
+course_create.csrf_exempt = True
+course_detail.csrf_exempt = True
@@ -0,0 +1,34 @@
+import hashlib
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Strong ETag built from the given version components."""
+    return '"' + '-'.join(str(part) for part in parts) + '"'
+
+
+def make_list_etag(user_id, version, *params):
+    digest = hashlib.sha1('|'.join([user_id, *map(str, params)]).encode()).hexdigest()[:12]
+    return make_etag('list', version, digest)
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def not_modified(etag):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    response['ETag'] = etag
+    # Clients may cache, but must revalidate on every use.
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import re
+import time
+
+from django.conf import settings
+
+from utils.metrics import metrics
+from utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+NON_WORD_RE = re.compile(r'[^\w\s]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    text = NON_WORD_RE.sub(' ', text.lower())
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+class CurriculumCache:
+    """
+    Redis cache of fully resolved curricula (modules, subtopics and video URLs)
+    keyed by the normalized (title, description, category) of the request.
+    Entries expire after CURRICULUM_CACHE_TTL, and the oldest entries are
+    dropped once CURRICULUM_CACHE_MAX_ENTRIES is exceeded.
+    """
+
+    def __init__(self):
+        self.prefix = "curriculum:"
+        self.index_key = "curriculum:index"
+        self.ttl = settings.CURRICULUM_CACHE_TTL
+        self.max_entries = settings.CURRICULUM_CACHE_MAX_ENTRIES
+
+    def make_key(self, title, description, category):
+        normalized = '|'.join(normalize_text(part) for part in (title, description, category))
+        return f"{self.prefix}{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+    def get(self, title, description, category):
+        if not redis_client:
+            return None
+        try:
+            cached = redis_client.get(self.make_key(title, description, category))
+        except Exception as e:
+            logger.warning(f"Curriculum cache get error: {e}")
+            return None
+
+        if cached:
+            metrics.incr('curriculum_cache.hits')
+            return json.loads(cached)
+        metrics.incr('curriculum_cache.misses')
+        return None
+
+    def set(self, title, description, category, course_data):
+        if not redis_client:
+            return
+        key = self.make_key(title, description, category)
+        try:
+            pipe = redis_client.pipeline()
+            pipe.setex(key, self.ttl, json.dumps(course_data))
+            pipe.zadd(self.index_key, {key: time.time()})
+            pipe.zremrangebyscore(self.index_key, '-inf', time.time() - self.ttl)
+            pipe.zcard(self.index_key)
+            size = pipe.execute()[-1]
+
+            if size > self.max_entries:
+                evicted = [member for member, _ in redis_client.zpopmin(self.index_key, size - self.max_entries)]
+                if evicted:
+                    redis_client.delete(*evicted)
+                    metrics.incr('curriculum_cache.evictions', len(evicted))
+        except Exception as e:
+            logger.warning(f"Curriculum cache set error: {e}")
+
+    def stats(self):
+        counters = metrics.snapshot()['counters']
+        hits = counters.get('curriculum_cache.hits', 0)
+        misses = counters.get('curriculum_cache.misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': counters.get('curriculum_cache.evictions', 0),
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+
+def course_data_from_modules(modules):
+    """Converts built Module documents back into the generator's course_data shape."""
+    return {
+        'modules': [
+            {
+                'title': module.title,
+                'subtopics': [
+                    {
+                        'title': subtopic.title,
+                        'video_url': subtopic.video_url,
+                        'content': subtopic.content,
+                    }
+                    for subtopic in module.subtopics
+                ],
+            }
+            for module in modules
+        ]
+    }
+
+
+curriculum_cache = CurriculumCache()
@@ -0,0 +1,121 @@
+"""
+Dict transformers that turn raw course documents (from `as_pymongo()`) into
+exactly the structures CourseListSerializer, CourseDetailSerializer and
+CourseOutlineSerializer produce, without mongoengine hydration or DRF fields.
+Missing keys fall back to the same defaults the mongoengine models declare.
+"""
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from rest_framework import serializers
+
+
+def _build_datetime_formatter():
+    if settings.USE_TZ and settings.TIME_ZONE == 'UTC':
+        def format_datetime(value):
+            if not value:
+                return None
+            if value.tzinfo is None:
+                return value.isoformat() + 'Z'
+            value = value.astimezone(dt_timezone.utc).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return format_datetime
+    return serializers.DateTimeField().to_representation
+
+
+format_datetime = _build_datetime_formatter()
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def progress_percentage(doc):
+    total = doc.get('total_subtopics', 0)
+    if total:
+        return int((doc.get('completed_subtopics', 0) / total) * 100)
+
+    modules = doc.get('modules', [])
+    total = sum(len(module.get('subtopics', [])) for module in modules)
+    if total == 0:
+        return 0
+    completed = sum(
+        sum(1 for subtopic in module.get('subtopics', []) if subtopic.get('completed', False))
+        for module in modules
+    )
+    return int((completed / total) * 100)
+
+
+def course_list_item(doc):
+    return {
+        'id': str(doc['_id']),
+        'title': _str(doc.get('title')),
+        'description': _str(doc.get('description')),
+        'thumbnail': _str(doc.get('thumbnail', '')),
+        'category': _str(doc.get('category')),
+        'progress_percentage': progress_percentage(doc),
+        'created_at': format_datetime(doc.get('created_at')),
+    }
+
+
+def _subtopic(subtopic, content):
+    return {
+        'title': _str(subtopic.get('title')),
+        'video_url': _str(subtopic.get('video_url')),
+        'content': _str(content),
+        'order': int(subtopic.get('order', 0)),
+        'completed': bool(subtopic.get('completed', False)),
+    }
+
+
+def _subtopic_outline(subtopic):
+    return {
+        'title': _str(subtopic.get('title')),
+        'video_url': _str(subtopic.get('video_url')),
+        'order': int(subtopic.get('order', 0)),
+        'completed': bool(subtopic.get('completed', False)),
+    }
+
+
+def _course(doc, modules):
+    return {
+        'id': str(doc['_id']),
+        'title': _str(doc.get('title')),
+        'description': _str(doc.get('description')),
+        'thumbnail': _str(doc.get('thumbnail', '')),
+        'category': _str(doc.get('category')),
+        'current_module_index': int(doc.get('current_module_index', 0)),
+        'current_subtopic_index': int(doc.get('current_subtopic_index', 0)),
+        'modules': modules,
+        'progress_percentage': progress_percentage(doc),
+        'created_at': format_datetime(doc.get('created_at')),
+        'updated_at': format_datetime(doc.get('updated_at')),
+    }
+
+
+def course_detail(doc, contents):
+    """`contents` maps (module_index, subtopic_index) to bodies stored in SubtopicContent."""
+    modules = [
+        {
+            'title': _str(module.get('title')),
+            'order': int(module.get('order', 0)),
+            'subtopics': [
+                _subtopic(subtopic, contents.get((module_index, subtopic_index), subtopic.get('content', '')))
+                for subtopic_index, subtopic in enumerate(module.get('subtopics', []))
+            ],
+        }
+        for module_index, module in enumerate(doc.get('modules', []))
+    ]
+    return _course(doc, modules)
+
+
+def course_outline(doc):
+    modules = [
+        {
+            'title': _str(module.get('title')),
+            'order': int(module.get('order', 0)),
+            'subtopics': [_subtopic_outline(subtopic) for subtopic in module.get('subtopics', [])],
+        }
+        for module in doc.get('modules', [])
+    ]
+    return _course(doc, modules)
@@ -0,0 +1,271 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+
+from utils.metrics import metrics
+from utils.redis_client import redis_client
+from . import quota
+from .services import generate_course
+
+logger = logging.getLogger(__name__)
+
+
+class CourseJobQueue:
+    """
+    Background course generation.
+
+    Jobs are stored as Redis hashes and their ids pushed onto a Redis list.
+    Worker threads (in the web process or `manage.py run_course_workers`) move
+    each id atomically onto their own processing list (BLMOVE, Redis 6.2+)
+    and remove it once the job is done. Each processing list has a lease,
+    renewed every second while the worker waits and extended to
+    COURSE_JOB_LEASE while it runs a job. If a worker dies
+    mid-job, its lease expires and any worker's reaper puts the job back on
+    the queue, or fails it if that was its last attempt. Failed attempts are
+    retried with exponential backoff up to COURSE_JOB_MAX_ATTEMPTS. When Redis
+    is unavailable, jobs are kept in memory and run on a local thread pool
+    instead.
+    """
+
+    def __init__(self):
+        self.queue_key = "course_jobs:queue"
+        self.processing_prefix = "course_jobs:processing:"
+        # Sorted set of processing lists, scored by when their lease expires.
+        self.leases_key = "course_jobs:leases"
+        self.job_prefix = "course_job:"
+        self.worker_count = settings.COURSE_JOB_WORKERS
+        self.max_attempts = settings.COURSE_JOB_MAX_ATTEMPTS
+        self.retry_backoff = settings.COURSE_JOB_RETRY_BACKOFF
+        self.job_ttl = settings.COURSE_JOB_TTL
+        self.lease = settings.COURSE_JOB_LEASE
+        self.idle_lease = settings.COURSE_JOB_IDLE_LEASE
+        self.reap_interval = settings.COURSE_JOB_REAP_INTERVAL
+        # Object with a generate_course(title, description, category, strategy) method;
+        # None means the Gemini service. Swap in a fake for tests.
+        self.generator = None
+        self._local_jobs = {}
+        self._local_executor = None
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, user_id, title, description, category, thumbnail='', reuse_similar=True,
+                strategy=None, account_id=None):
+        """`account_id` holds a reserved quota slot, released if the job finally fails."""
+        now = datetime.utcnow().isoformat()
+        job = {
+            'id': uuid.uuid4().hex,
+            'user_id': user_id,
+            'title': title,
+            'description': description,
+            'category': category,
+            'thumbnail': thumbnail or '',
+            'reuse_similar': int(reuse_similar),
+            'strategy': strategy or '',
+            'account_id': '' if account_id is None else account_id,
+            'status': 'queued',
+            'attempts': 0,
+            'course_id': '',
+            'error': '',
+            'created_at': now,
+            'updated_at': now,
+        }
+
+        if redis_client:
+            try:
+                pipe = redis_client.pipeline()
+                pipe.hset(self._job_key(job['id']), mapping=job)
+                pipe.expire(self._job_key(job['id']), self.job_ttl)
+                pipe.rpush(self.queue_key, job['id'])
+                pipe.execute()
+                if settings.COURSE_JOB_INPROCESS_WORKERS:
+                    self.start_workers()
+                return self._public(job)
+            except Exception as e:
+                logger.warning(f"Redis job queue unavailable, running in-process: {e}")
+
+        with self._lock:
+            self._local_jobs[job['id']] = job
+            if self._local_executor is None:
+                self._local_executor = ThreadPoolExecutor(
+                    max_workers=self.worker_count, thread_name_prefix='course-job'
+                )
+        self._local_executor.submit(self._run_local, job['id'])
+        return self._public(job)
+
+    def get(self, job_id):
+        job = self._load(job_id)
+        return self._public(job) if job else None
+
+    def start_workers(self, count=None):
+        """Starts Redis queue worker threads once per process."""
+        with self._lock:
+            if self._workers:
+                return self._workers
+            for index in range(count or self.worker_count):
+                worker = threading.Thread(
+                    target=self.work, name=f'course-job-worker-{index}', daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+        return self._workers
+
+    def work(self, stop_event=None):
+        """Runs jobs from the Redis queue until stop_event is set."""
+        processing_key = f"{self.processing_prefix}{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        next_reap = 0
+        while not (stop_event and stop_event.is_set()):
+            try:
+                if time.monotonic() >= next_reap:
+                    next_reap = time.monotonic() + self.reap_interval
+                    self.reap()
+                self._renew_lease(processing_key, self.idle_lease)
+                job_id = redis_client.blmove(self.queue_key, processing_key, 1, 'LEFT', 'RIGHT')
+            except Exception as e:
+                logger.error(f"Course job queue error: {e}")
+                time.sleep(1)
+                continue
+            if not job_id:
+                continue
+
+            try:
+                self._renew_lease(processing_key, self.lease)
+            except Exception as e:
+                logger.warning(f"Could not extend lease for course job {job_id}: {e}")
+            retry = self._run_attempt(job_id)
+            if retry:
+                time.sleep(self._backoff(job_id))
+            self._finish(processing_key, job_id, retry)
+
+        try:
+            redis_client.zrem(self.leases_key, processing_key)
+        except Exception:
+            pass
+
+    def reap(self):
+        """
+        Recovers the jobs of workers whose lease expired: requeued, or failed
+        with their quota slot released if the lost attempt was the last one.
+        """
+        for processing_key in redis_client.zrangebyscore(self.leases_key, '-inf', time.time()):
+            # Only the reaper that removes the lease takes over the list.
+            if not redis_client.zrem(self.leases_key, processing_key):
+                continue
+            while (job_id := redis_client.lindex(processing_key, -1)) is not None:
+                job = self._load(job_id)
+                if job and job['status'] not in ('succeeded', 'failed'):
+                    if int(job['attempts']) >= self.max_attempts:
+                        self._update(job_id, status='failed', error='Failed to generate course: worker stopped')
+                        quota.release(self._account_id(job))
+                    else:
+                        self._update(job_id, status='queued')
+                        redis_client.lmove(processing_key, self.queue_key, 'RIGHT', 'LEFT')
+                        metrics.incr('course_jobs.requeued_expired')
+                        logger.warning(f"Requeued course job {job_id} from expired worker {processing_key}")
+                        continue
+                redis_client.rpop(processing_key)
+
+    def _renew_lease(self, processing_key, seconds):
+        redis_client.zadd(self.leases_key, {processing_key: time.time() + seconds})
+
+    def _finish(self, processing_key, job_id, requeue):
+        """Takes the job off the processing list, back onto the queue if it is to be retried."""
+        try:
+            pipe = redis_client.pipeline()
+            if requeue:
+                pipe.rpush(self.queue_key, job_id)
+            pipe.lrem(processing_key, 1, job_id)
+            pipe.execute()
+        except Exception as e:
+            if not requeue:
+                logger.error(f"Failed to remove finished course job {job_id}: {e}")
+                return
+            logger.error(f"Failed to requeue course job {job_id}: {e}")
+            self._update(job_id, status='failed', error=str(e))
+            quota.release(self._account_id(self._load(job_id) or {}))
+
+    def _run_local(self, job_id):
+        while self._run_attempt(job_id):
+            time.sleep(self._backoff(job_id))
+
+    def _run_attempt(self, job_id):
+        """Runs one attempt of a job. Returns True if it should be retried."""
+        job = self._load(job_id)
+        if not job or job['status'] in ('succeeded', 'failed'):
+            return False
+
+        attempts = int(job['attempts']) + 1
+        self._update(job_id, status='running', attempts=attempts)
+
+        try:
+            course = generate_course(
+                job['user_id'], job['title'], job['description'],
+                job['category'], job['thumbnail'], generator=self.generator,
+                reuse_similar=bool(int(job['reuse_similar'])),
+                strategy=job.get('strategy') or None,
+                account_id=self._account_id(job)
+            )
+        except Exception as e:
+            logger.warning(f"Course job {job_id} attempt {attempts} failed: {e}")
+            if attempts < self.max_attempts:
+                self._update(job_id, status='queued', error=str(e))
+                return True
+            self._update(job_id, status='failed', error=f'Failed to generate course: {str(e)}')
+            quota.release(self._account_id(job))
+            return False
+
+        self._update(job_id, status='succeeded', course_id=str(course.pk), error='')
+        return False
+
+    def _backoff(self, job_id):
+        job = self._load(job_id) or {}
+        return self.retry_backoff * 2 ** (int(job.get('attempts', 1)) - 1)
+
+    def _load(self, job_id):
+        if redis_client:
+            try:
+                job = redis_client.hgetall(self._job_key(job_id))
+                if job:
+                    return job
+            except Exception as e:
+                logger.warning(f"Redis job load error: {e}")
+        return self._local_jobs.get(job_id)
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = datetime.utcnow().isoformat()
+        with self._lock:
+            if job_id in self._local_jobs:
+                self._local_jobs[job_id].update(fields)
+                return
+        try:
+            redis_client.hset(self._job_key(job_id), mapping=fields)
+        except Exception as e:
+            logger.error(f"Redis job update error for {job_id}: {e}")
+
+    def _account_id(self, job):
+        account_id = job.get('account_id')
+        return int(account_id) if account_id not in (None, '') else None
+
+    def _job_key(self, job_id):
+        return f"{self.job_prefix}{job_id}"
+
+    def _public(self, job):
+        return {
+            'id': job['id'],
+            'user_id': job['user_id'],
+            'status': job['status'],
+            'attempts': int(job['attempts']),
+            'course_id': job['course_id'] or None,
+            'error': job['error'] or None,
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at'],
+        }
+
+
+course_jobs = CourseJobQueue()
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Backfills the denormalized total/completed subtopic counters on existing courses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every course instead of only those missing counters.'
+        )
+
+    def handle(self, *args, **options):
+        query = {} if options['all'] else {'total_subtopics': {'$exists': False}}
+
+        # Computed server-side in one pipeline update, so course bodies never
+        # leave the database.
+        result = Course._get_collection().update_many(query, [
+            {'$set': {
+                'total_subtopics': {'$sum': {'$map': {
+                    'input': {'$ifNull': ['$modules', []]},
+                    'as': 'module',
+                    'in': {'$size': {'$ifNull': ['$$module.subtopics', []]}},
+                }}},
+                'completed_subtopics': {'$sum': {'$map': {
+                    'input': {'$ifNull': ['$modules', []]},
+                    'as': 'module',
+                    'in': {'$size': {'$filter': {
+                        'input': {'$ifNull': ['$$module.subtopics', []]},
+                        'as': 'subtopic',
+                        'cond': {'$eq': ['$$subtopic.completed', True]},
+                    }}},
+                }}},
+            }},
+        ])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled progress counters on {result.modified_count} of {result.matched_count} course(s)"
+        ))
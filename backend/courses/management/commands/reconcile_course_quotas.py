@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.quota import reconcile
+
+
+class Command(BaseCommand):
+    help = "Resets each user's courses_created to the number of courses they own."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only reconcile this user id (repeatable).')
+
+    def handle(self, *args, **options):
+        corrected = reconcile(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled course counts for {corrected} user(s)"))
@@ -0,0 +1,34 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.jobs import course_jobs
+from utils.redis_client import redis_client
+
+
+class Command(BaseCommand):
+    help = 'Runs background course generation workers against the Redis job queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=course_jobs.worker_count)
+
+    def handle(self, *args, **options):
+        if not redis_client:
+            raise CommandError('Redis is not available; jobs run in-process instead.')
+
+        stop_event = threading.Event()
+        threads = [
+            threading.Thread(target=course_jobs.work, args=(stop_event,), daemon=True)
+            for _ in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+
+        self.stdout.write(self.style.SUCCESS(f"Started {len(threads)} course worker(s)"))
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
@@ -1,22 +1,52 @@
+from bson import ObjectId
+from bson.errors import InvalidId
 from mongoengine import Document, EmbeddedDocument, fields
+from mongoengine.errors import DoesNotExist
+from pymongo import ReturnDocument
 from datetime import datetime
+from utils.services import services
+
+
+class LazyConnectionDocument(Document):
+    """Connects to MongoDB the first time a collection is used, not at import."""
+    meta = {'abstract': True}
+
+    @classmethod
+    def _get_db(cls):
+        services.get('mongo')
+        return super()._get_db()
+
+
+CONTENT_PROJECTION = {'_id': 0, 'module_index': 1, 'subtopic_index': 1, 'content_key': 1, 'content': 1}
+
+
+def content_keys(modules):
+    """{module_index: content_key} for Module documents or raw module dicts."""
+    return {
+        index: (module.get('content_key') if isinstance(module, dict) else module.content_key) or ''
+        for index, module in enumerate(modules)
+    }
 
 
 class Subtopic(EmbeddedDocument):
     title = fields.StringField(required=True, max_length=255)
     video_url = fields.StringField(required=True)
-    content = fields.StringField(required=True)
+    # Empty for courses whose lesson bodies live in SubtopicContent.
+    content = fields.StringField(default='')
     order = fields.IntField(default=0)
     completed = fields.BooleanField(default=False)
 
 
 class Module(EmbeddedDocument):
     title = fields.StringField(required=True, max_length=255)
+    # Which SubtopicContent generation holds this module's lesson bodies; a
+    # regenerated module switches to a new one in the same update as its outline.
+    content_key = fields.StringField(default='')
     order = fields.IntField(default=0)
     subtopics = fields.ListField(fields.EmbeddedDocumentField(Subtopic))
 
 
-class Course(Document):
+class Course(LazyConnectionDocument):
     CATEGORY_CHOICES = [
         'AI', 'Web Development', 'Mobile Development', 'Data Science',
         'Cloud Computing', 'Cybersecurity', 'DevOps', 'Blockchain',
@@ -24,6 +54,8 @@ class Course(Document):
     ]
     
     user_id = fields.StringField(required=True)
+    # Signed-in user whose course quota the course counts against, if any.
+    account_id = fields.IntField()
     title = fields.StringField(required=True, max_length=255)
     description = fields.StringField(required=True)
     thumbnail = fields.StringField(default='')
@@ -31,16 +63,27 @@ class Course(Document):
     current_module_index = fields.IntField(default=0)
     current_subtopic_index = fields.IntField(default=0)
     modules = fields.ListField(fields.EmbeddedDocumentField(Module))
+    # Denormalized so course cards can show progress without loading modules.
+    total_subtopics = fields.IntField(default=0)
+    completed_subtopics = fields.IntField(default=0)
     created_at = fields.DateTimeField(default=datetime.utcnow)
     updated_at = fields.DateTimeField(default=datetime.utcnow)
+    # Taken from the owner's CourseVersion counter on every write; drives ETags.
+    version = fields.IntField(default=0)
     
     meta = {
         'collection': 'courses',
         'ordering': ['-created_at'],
-        'indexes': ['user_id', '-created_at']
+        'indexes': [
+            {'fields': ['user_id', '-created_at', '-id']},
+            {'fields': ['account_id'], 'sparse': True},
+        ]
     }
     
     def get_progress_percentage(self):
+        if self.total_subtopics:
+            return int((self.completed_subtopics / self.total_subtopics) * 100)
+
         total_subtopics = sum(len(module.subtopics) for module in self.modules)
         if total_subtopics == 0:
             return 0
@@ -49,3 +92,384 @@ class Course(Document):
             for module in self.modules
         )
         return int((completed_subtopics / total_subtopics) * 100)
+
+    def delete(self, *args, **kwargs):
+        super().delete(*args, **kwargs)
+        SubtopicContent.objects(course_id=str(self.pk)).delete()
+        CourseVersion.next(self.user_id)
+
+    def attach_contents(self):
+        """Fills in subtopic bodies stored outside the course document."""
+        contents = SubtopicContent.for_course(str(self.pk), content_keys(self.modules))
+        for module_index, module in enumerate(self.modules):
+            for subtopic_index, subtopic in enumerate(module.subtopics):
+                subtopic.content = contents.get((module_index, subtopic_index), subtopic.content)
+        return self
+
+    @classmethod
+    def get_version(cls, course_id, user_id):
+        """Returns the course's version with a single _id lookup; raises DoesNotExist."""
+        document = cls._get_collection().find_one(cls._owner_filter(course_id, user_id), {'version': 1})
+        if document is None:
+            raise DoesNotExist('Course not found')
+        return document.get('version', 0)
+
+    @classmethod
+    def get_lesson_contents(cls, course_id, user_id, lessons):
+        """
+        Returns {(module_index, subtopic_index): content} for the requested
+        lessons of a course the user owns; raises DoesNotExist otherwise.
+        """
+        document = cls._get_collection().find_one(
+            cls._owner_filter(course_id, user_id), {'modules.content_key': 1}
+        )
+        if document is None:
+            raise DoesNotExist('Course not found')
+
+        contents = SubtopicContent.for_course(str(course_id), content_keys(document.get('modules', [])), lessons)
+        missing = [lesson for lesson in lessons if lesson not in contents]
+        if missing:
+            # Courses created before lesson bodies were split out keep them inline.
+            legacy = cls.objects(pk=course_id).only('modules.subtopics.content').first()
+            for module_index, subtopic_index in missing:
+                if module_index < 0 or subtopic_index < 0:
+                    continue
+                try:
+                    content = legacy.modules[module_index].subtopics[subtopic_index].content
+                except IndexError:
+                    continue
+                if content:
+                    contents[(module_index, subtopic_index)] = content
+        return contents
+
+    @classmethod
+    def _owner_filter(cls, course_id, user_id):
+        try:
+            return {'_id': ObjectId(course_id), 'user_id': user_id}
+        except (InvalidId, TypeError):
+            raise DoesNotExist('Course not found')
+
+    @classmethod
+    def toggle_subtopic(cls, course_id, user_id, module_index, subtopic_index):
+        """
+        Atomically flips one subtopic's completed flag without loading the course.
+        Each attempt is a conditional update on the value it expects, so
+        concurrent toggles never overwrite each other. Returns the updated
+        subtopic as a dict, or None if the indices are out of range.
+        """
+        collection = cls._get_collection()
+        path = f"modules.{module_index}.subtopics.{subtopic_index}"
+        query = cls._owner_filter(course_id, user_id)
+        query[f"{path}.title"] = {'$exists': True}
+
+        for _ in range(3):
+            for expected, new_value in ((True, False), ({'$ne': True}, True)):
+                result = collection.update_one(
+                    {**query, f"{path}.completed": expected},
+                    {
+                        '$set': {f"{path}.completed": new_value, 'updated_at': datetime.utcnow()},
+                        '$inc': {'completed_subtopics': 1 if new_value else -1},
+                    }
+                )
+                if result.matched_count:
+                    cls.bump_version(course_id, user_id)
+                    return cls.get_subtopic(course_id, user_id, module_index, subtopic_index)
+            if not collection.count_documents(query, limit=1):
+                break
+
+        # Nothing matched: either the course or the subtopic does not exist.
+        return cls.get_subtopic(course_id, user_id, module_index, subtopic_index)
+
+    @classmethod
+    def replace_module(cls, course_id, user_id, module_index, module, content_key=''):
+        """
+        Atomically swaps one module in place, without its lesson bodies, and
+        adjusts the progress counters by the difference in a single update.
+        Only swaps while the module's bodies are still `content_key`, so of two
+        concurrent regenerations one wins. Returns False if the course or the
+        module does not exist or the module changed meanwhile.
+        """
+        query = cls._owner_filter(course_id, user_id)
+        query[f"modules.{module_index}"] = {'$exists': True}
+        query[f"modules.{module_index}.content_key"] = content_key or {'$in': ['', None]}
+
+        document = module.to_mongo().to_dict()
+        for subtopic in document.get('subtopics', []):
+            subtopic['content'] = ''
+        old_subtopics = {'$ifNull': [{'$arrayElemAt': ['$modules.subtopics', module_index]}, []]}
+        old_completed = {'$size': {'$filter': {
+            'input': old_subtopics, 'as': 'subtopic', 'cond': {'$eq': ['$$subtopic.completed', True]}
+        }}}
+        # Courses created before the counters were added keep 0 and fall back to counting.
+        has_counters = {'$gt': [{'$ifNull': ['$total_subtopics', 0]}, 0]}
+
+        result = cls._get_collection().update_one(query, [{'$set': {
+            'modules': {'$concatArrays': [
+                {'$slice': ['$modules', module_index]} if module_index else [],
+                [{'$literal': document}],
+                {'$slice': ['$modules', module_index + 1, {'$add': [{'$size': '$modules'}, 1]}]},
+            ]},
+            'total_subtopics': {'$cond': [
+                has_counters,
+                {'$add': [{'$subtract': ['$total_subtopics', {'$size': old_subtopics}]}, len(module.subtopics)]},
+                0
+            ]},
+            'completed_subtopics': {'$cond': [
+                has_counters,
+                {'$subtract': [{'$ifNull': ['$completed_subtopics', 0]}, old_completed]},
+                0
+            ]},
+            'updated_at': datetime.utcnow(),
+        }}])
+        if not result.matched_count:
+            return False
+        cls.bump_version(course_id, user_id)
+        return True
+
+    @classmethod
+    def replace_subtopic(cls, course_id, user_id, module_index, subtopic_index, subtopic, content_key=''):
+        """
+        Atomically overwrites one subtopic's outline in place and marks it not
+        completed, then stores its lesson body. Only writes while the module's
+        bodies are still `content_key`, so a module regenerated meanwhile is
+        left alone. Returns False if the subtopic does not exist or the module
+        changed.
+        """
+        collection = cls._get_collection()
+        path = f"modules.{module_index}.subtopics.{subtopic_index}"
+        query = cls._owner_filter(course_id, user_id)
+        query[f"{path}.title"] = {'$exists': True}
+        query[f"modules.{module_index}.content_key"] = content_key or {'$in': ['', None]}
+        changes = {
+            f"{path}.title": subtopic.title,
+            f"{path}.video_url": subtopic.video_url,
+            f"{path}.content": '',
+            f"{path}.completed": False,
+            'updated_at': datetime.utcnow(),
+        }
+
+        for _ in range(3):
+            for expected, update in (
+                (True, {'$set': changes, '$inc': {'completed_subtopics': -1}}),
+                ({'$ne': True}, {'$set': changes}),
+            ):
+                result = collection.update_one({**query, f"{path}.completed": expected}, update)
+                if result.matched_count:
+                    # The body is written once the outline matched, and the
+                    # version bumped after it so no ETag names the old body.
+                    SubtopicContent.replace_subtopic(
+                        str(course_id), module_index, subtopic_index, subtopic.content, content_key
+                    )
+                    cls.bump_version(course_id, user_id)
+                    return True
+            if not collection.count_documents(query, limit=1):
+                break
+        return False
+
+    @classmethod
+    def get_subtopic(cls, course_id, user_id, module_index, subtopic_index):
+        """Fetches a single subtopic as a dict; raises DoesNotExist for a missing course."""
+        pipeline = [
+            {'$match': cls._owner_filter(course_id, user_id)},
+            {'$project': {
+                '_id': 0,
+                'subtopic': {'$arrayElemAt': [
+                    {'$ifNull': [{'$arrayElemAt': ['$modules.subtopics', module_index]}, []]},
+                    subtopic_index
+                ]}
+            }},
+        ]
+        result = next(cls._get_collection().aggregate(pipeline), None)
+        if result is None:
+            raise DoesNotExist('Course not found')
+        return result.get('subtopic')
+
+    @classmethod
+    def set_position(cls, course_id, user_id, module_index=None, subtopic_index=None):
+        """
+        Atomically updates the learner's current position and returns the
+        stored values. Raises ValueError or TypeError for a non-integer index;
+        a position that does not change is not written.
+        """
+        position = {}
+        if module_index is not None:
+            position['current_module_index'] = int(module_index)
+        if subtopic_index is not None:
+            position['current_subtopic_index'] = int(subtopic_index)
+
+        collection = cls._get_collection()
+        query = cls._owner_filter(course_id, user_id)
+        projection = {'current_module_index': 1, 'current_subtopic_index': 1, 'updated_at': 1, 'version': 1}
+        document = None
+        if position:
+            document = collection.find_one_and_update(
+                {**query, '$or': [{field: {'$ne': value}} for field, value in position.items()]},
+                {'$set': {**position, 'updated_at': datetime.utcnow()}},
+                projection=projection,
+                return_document=ReturnDocument.AFTER
+            )
+        if document is None:
+            document = collection.find_one(query, projection)
+            if document is None:
+                raise DoesNotExist('Course not found')
+            return document
+        document['version'] = cls.bump_version(course_id, user_id)
+        return document
+
+    @classmethod
+    def bump_version(cls, course_id, user_id):
+        """
+        Gives the course the user's next version. Called once a write to the
+        course has matched, so rejected and no-op requests leave it alone.
+        """
+        version = CourseVersion.next(user_id)
+        cls._get_collection().update_one(cls._owner_filter(course_id, user_id), {'$max': {'version': version}})
+        return version
+
+
+class CurriculumSignature(LazyConnectionDocument):
+    """MinHash signature of a generated course request, used to find near-duplicates."""
+    course_id = fields.StringField(required=True)
+    title = fields.StringField(required=True, max_length=255)
+    description = fields.StringField(required=True)
+    category = fields.StringField(required=True)
+    signature = fields.ListField(fields.IntField())
+    band_keys = fields.ListField(fields.StringField())
+    created_at = fields.DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'curriculum_signatures',
+        'ordering': ['-created_at'],
+        'indexes': ['band_keys', 'course_id']
+    }
+
+
+class SubtopicContent(LazyConnectionDocument):
+    """
+    Body of a single lesson, kept out of the course document so outline reads
+    (list, detail outline, toggles) never load it.
+    """
+    course_id = fields.StringField(required=True)
+    module_index = fields.IntField(required=True)
+    subtopic_index = fields.IntField(required=True)
+    # Module.content_key of the bodies' generation; '' (or missing) for the first.
+    content_key = fields.StringField(default='')
+    content = fields.StringField(required=True)
+
+    meta = {
+        'collection': 'subtopic_contents',
+        'indexes': [
+            {'fields': ['course_id', 'module_index', 'subtopic_index', 'content_key'], 'unique': True},
+        ]
+    }
+
+    @classmethod
+    def documents(cls, course_id, modules):
+        return [
+            document
+            for module_index, module in enumerate(modules)
+            for document in cls._module_documents(course_id, module_index, module)
+        ]
+
+    @staticmethod
+    def _module_documents(course_id, module_index, module):
+        return [
+            {
+                'course_id': course_id,
+                'module_index': module_index,
+                'subtopic_index': subtopic_index,
+                'content_key': module.content_key or '',
+                'content': subtopic.content,
+            }
+            for subtopic_index, subtopic in enumerate(module.subtopics)
+        ]
+
+    @classmethod
+    def store(cls, course_id, modules):
+        documents = cls.documents(course_id, modules)
+        if documents:
+            cls._get_collection().insert_many(documents, ordered=False)
+
+    @classmethod
+    def stage_module(cls, course_id, module_index, module):
+        """
+        Writes the bodies of a regenerated module under its new content_key.
+        Readers keep getting the old generation until the course switches.
+        """
+        documents = cls._module_documents(course_id, module_index, module)
+        if documents:
+            cls._get_collection().insert_many(documents, ordered=False)
+
+    @classmethod
+    def drop_generations(cls, course_id, module_index, keep=None, only=None):
+        """Deletes a module's bodies except generation `keep`, or only generation `only`."""
+        query = {'course_id': course_id, 'module_index': module_index}
+        if only is not None:
+            query['content_key'] = only
+        else:
+            query['content_key'] = {'$nin': [keep, None] if keep == '' else [keep]}
+        cls._get_collection().delete_many(query)
+
+    @classmethod
+    def replace_subtopic(cls, course_id, module_index, subtopic_index, content, content_key=''):
+        cls._get_collection().update_one(
+            {
+                'course_id': course_id, 'module_index': module_index, 'subtopic_index': subtopic_index,
+                'content_key': content_key or {'$in': ['', None]},
+            },
+            {'$set': {'content': content, 'content_key': content_key}},
+            upsert=True
+        )
+
+    @staticmethod
+    def select(documents, content_keys):
+        """
+        Maps (module_index, subtopic_index) to content for the documents of
+        each module's current generation; `content_keys` is from content_keys().
+        """
+        return {
+            (doc['module_index'], doc['subtopic_index']): doc['content']
+            for doc in documents
+            if (doc.get('content_key') or '') == content_keys.get(doc['module_index'], '')
+        }
+
+    @classmethod
+    def for_course(cls, course_id, content_keys, lessons=None):
+        """Returns {(module_index, subtopic_index): content}, optionally limited to some lessons."""
+        query = {'course_id': course_id}
+        if lessons is not None:
+            query['$or'] = [
+                {'module_index': module_index, 'subtopic_index': subtopic_index}
+                for module_index, subtopic_index in lessons
+            ] or [{'_id': None}]
+        cursor = cls._get_collection().find(query, CONTENT_PROJECTION)
+        return cls.select(cursor, content_keys)
+
+
+class CourseVersion(LazyConnectionDocument):
+    """
+    Per-user write counter. Every course write takes the next value, so the
+    counter is the user's max course version and changes on any create,
+    update or delete, which makes it a cheap validator for the course list.
+    """
+    user_id = fields.StringField(primary_key=True)
+    version = fields.IntField(default=0)
+
+    meta = {
+        'collection': 'course_versions',
+    }
+
+    @classmethod
+    def next(cls, user_id):
+        document = cls._get_collection().find_one_and_update(
+            {'_id': user_id},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return document['version']
+
+    @classmethod
+    def current(cls, user_id):
+        document = cls._get_collection().find_one({'_id': user_id}, {'version': 1})
+        return document['version'] if document else 0
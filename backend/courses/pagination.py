@@ -0,0 +1,56 @@
+import base64
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(course):
+    if isinstance(course, dict):
+        created_at, course_id = course['created_at'], course['_id']
+    else:
+        created_at, course_id = course.created_at, course.pk
+    raw = f"{created_at.isoformat()}|{course_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, course_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), ObjectId(course_id)
+    except (ValueError, InvalidId, UnicodeDecodeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def get_page_size(value):
+    if value in (None, ''):
+        return settings.COURSE_LIST_PAGE_SIZE
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor('Invalid page_size')
+    return max(1, min(page_size, settings.COURSE_LIST_MAX_PAGE_SIZE))
+
+
+def paginate(queryset, after=None, page_size=None):
+    """
+    Keyset pagination over (created_at, _id), newest first. The page query is
+    a range on the (user_id, -created_at, -_id) index, so deep pages cost the
+    same as the first. Returns (items, next_cursor).
+    """
+    if after:
+        created_at, course_id = decode_cursor(after)
+        queryset = queryset.filter(__raw__={
+            'created_at': {'$lte': created_at},
+            '$or': [{'created_at': {'$lt': created_at}}, {'_id': {'$lt': course_id}}],
+        })
+
+    items = list(queryset.order_by('-created_at', '-id').limit(page_size + 1))
+    next_cursor = encode_cursor(items[page_size - 1]) if len(items) > page_size else None
+    return items[:page_size], next_cursor
@@ -0,0 +1,70 @@
+"""
+Course quotas for signed-in users (User.course_limit). A slot is reserved with
+one conditional UPDATE before any Gemini or YouTube call, so concurrent
+creates cannot both take the last slot, and is released again if the
+generation fails. Demo visitors have no quota; the rate limit covers them.
+"""
+import logging
+
+from users.models import User
+from .models import Course
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, user):
+        super().__init__('Course limit reached')
+        self.courses_created = user.courses_created
+        self.course_limit = user.course_limit
+
+    def data(self):
+        return {
+            'error': str(self),
+            'courses_created': self.courses_created,
+            'course_limit': self.course_limit,
+        }
+
+
+def reserve(user):
+    """
+    Reserves a course slot for `user` and returns the account id to store on
+    the course, or None for anonymous requests. Raises QuotaExceeded.
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    if not user.reserve_course():
+        raise QuotaExceeded(user)
+    return user.pk
+
+
+def release(account_id):
+    if account_id is not None:
+        User.release_course(account_id)
+
+
+def reconcile(user_ids=None):
+    """
+    Sets courses_created to the number of courses each user actually owns,
+    e.g. after a worker died mid-generation holding a slot. Slots held by
+    generations still in flight are not courses yet and are dropped, so run
+    this off-peak. Returns the number of users corrected.
+    """
+    owned = {
+        row['_id']: row['count']
+        for row in Course._get_collection().aggregate([
+            {'$match': {'account_id': {'$ne': None} if user_ids is None else {'$in': list(user_ids)}}},
+            {'$group': {'_id': '$account_id', 'count': {'$sum': 1}}},
+        ])
+    }
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    corrected = 0
+    for user_id, courses_created in users.values_list('pk', 'courses_created'):
+        count = owned.get(user_id, 0)
+        if count != courses_created:
+            # Skipped if the counter moved since it was read.
+            if not User.objects.filter(pk=user_id, courses_created=courses_created).update(courses_created=count):
+                continue
+            logger.info(f"Reconciled course count for user {user_id}: {courses_created} -> {count}")
+            corrected += 1
+    return corrected
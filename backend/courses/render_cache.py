@@ -0,0 +1,81 @@
+import logging
+
+from django.conf import settings
+
+from utils.async_clients import get_async_redis
+from utils.metrics import metrics
+from utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """
+    Redis cache of rendered course JSON, keyed by (course id, version, variant).
+    All variants of a course share one hash, so invalidating a course is a
+    single DEL. Every call is a no-op when Redis is unavailable.
+    """
+
+    def __init__(self):
+        self.prefix = "course_render:"
+        self.ttl = settings.COURSE_RENDER_CACHE_TTL
+
+    def get(self, course_id, version, variant):
+        if not redis_client:
+            return None
+        try:
+            cached = redis_client.hget(self._key(course_id), f"{version}:{variant}")
+        except Exception as e:
+            logger.warning(f"Render cache get error: {e}")
+            return None
+        metrics.incr('render_cache.hits' if cached else 'render_cache.misses')
+        return cached.encode() if isinstance(cached, str) else cached
+
+    def set(self, course_id, version, variant, content):
+        if not redis_client:
+            return
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hset(self._key(course_id), f"{version}:{variant}", content)
+            pipe.expire(self._key(course_id), self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Render cache set error: {e}")
+
+    async def get_async(self, course_id, version, variant):
+        redis = get_async_redis()
+        if not redis:
+            return None
+        try:
+            cached = await redis.hget(self._key(course_id), f"{version}:{variant}")
+        except Exception as e:
+            logger.warning(f"Render cache get error: {e}")
+            return None
+        metrics.incr('render_cache.hits' if cached else 'render_cache.misses')
+        return cached.encode() if isinstance(cached, str) else cached
+
+    async def set_async(self, course_id, version, variant, content):
+        redis = get_async_redis()
+        if not redis:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.hset(self._key(course_id), f"{version}:{variant}", content)
+            pipe.expire(self._key(course_id), self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Render cache set error: {e}")
+
+    def invalidate(self, course_id):
+        if not redis_client:
+            return
+        try:
+            redis_client.delete(self._key(course_id))
+        except Exception as e:
+            logger.warning(f"Render cache invalidate error: {e}")
+
+    def _key(self, course_id):
+        return f"{self.prefix}{course_id}"
+
+
+render_cache = RenderCache()
@@ -34,8 +34,27 @@ class CourseDetailSerializer(serializers.Serializer):
     updated_at = serializers.DateTimeField()
     def get_progress_percentage(self, obj):
         return obj.get_progress_percentage()
+class SubtopicOutlineSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    video_url = serializers.URLField()
+    order = serializers.IntegerField()
+    completed = serializers.BooleanField()
+class ModuleOutlineSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    order = serializers.IntegerField()
+    subtopics = SubtopicOutlineSerializer(many=True)
+class CourseOutlineSerializer(CourseDetailSerializer):
+    modules = ModuleOutlineSerializer(many=True)
+class LessonContentSerializer(serializers.Serializer):
+    module_index = serializers.IntegerField()
+    subtopic_index = serializers.IntegerField()
+    content = serializers.CharField()
 class CourseCreateSerializer(serializers.Serializer):
     title = serializers.CharField(max_length=255)
     description = serializers.CharField()
     category = serializers.ChoiceField(choices=Course.CATEGORY_CHOICES)
-    thumbnail = serializers.URLField(required=False, allow_blank=True)
\ No newline at end of file
+    thumbnail = serializers.URLField(required=False, allow_blank=True)
+    reuse = serializers.BooleanField(required=False, default=True)
+    strategy = serializers.ChoiceField(choices=['single', 'outline'], required=False)
+class RegenerateSerializer(serializers.Serializer):
+    instructions = serializers.CharField(required=False, allow_blank=True, max_length=500, default='')
\ No newline at end of file
@@ -0,0 +1,257 @@
+import time
+import uuid
+
+from django.conf import settings
+
+from .curriculum_cache import course_data_from_modules, curriculum_cache
+from .models import Course, Module, Subtopic, SubtopicContent
+from .render_cache import render_cache
+from .similarity import similarity_index
+from utils.gemini_service import gemini_service
+from utils.metrics import metrics
+from utils.youtube_service import youtube_service
+
+
+def collect_search_terms(course_data):
+    return [
+        subtopic_data['video_url'].replace('search:', '').strip()
+        for module_data in course_data['modules']
+        for subtopic_data in module_data['subtopics']
+        if subtopic_data['video_url'].startswith('search:')
+    ]
+
+
+def resolve_course_videos(course_data):
+    """
+    Collects every "search:" term in the generated course and resolves them
+    in one batch before the course is built.
+    """
+    return youtube_service.search_videos(collect_search_terms(course_data))
+
+
+def build_modules(course_data, videos):
+    return [
+        build_module(module_data, module_index, videos)
+        for module_index, module_data in enumerate(course_data['modules'])
+    ]
+
+
+def build_subtopic(subtopic_data, subtopic_index, videos):
+    video_url = subtopic_data['video_url']
+    if video_url.startswith('search:'):
+        video_url = videos.get(video_url.replace('search:', '').strip(), video_url)
+
+    return Subtopic(
+        title=subtopic_data['title'],
+        video_url=video_url,
+        content=subtopic_data['content'],
+        order=subtopic_index,
+        completed=False
+    )
+
+
+def build_module(module_data, module_index, videos):
+    return Module(
+        title=module_data['title'],
+        order=module_index,
+        subtopics=[
+            build_subtopic(subtopic_data, subtopic_index, videos)
+            for subtopic_index, subtopic_data in enumerate(module_data['subtopics'])
+        ]
+    )
+
+
+def new_course(user_id, title, description, category, thumbnail, modules, account_id=None):
+    """
+    Builds an unsaved Course whose subtopics carry no content; returns it with
+    the per-subtopic bodies, which are stored separately in SubtopicContent.
+    """
+    contents = [[subtopic.content for subtopic in module.subtopics] for module in modules]
+    for module in modules:
+        for subtopic in module.subtopics:
+            subtopic.content = ''
+
+    course = Course(
+        user_id=user_id,  # each browser/session is isolated
+        account_id=account_id,
+        title=title,
+        description=description,
+        category=category,
+        thumbnail=thumbnail,
+        modules=modules,
+        total_subtopics=sum(len(module.subtopics) for module in modules),
+        completed_subtopics=0
+    )
+    return course, contents
+
+
+def restore_contents(course, contents):
+    for module, module_contents in zip(course.modules, contents):
+        for subtopic, content in zip(module.subtopics, module_contents):
+            subtopic.content = content
+
+
+def save_course(user_id, title, description, category, thumbnail, modules, account_id=None):
+    """
+    Saves the course outline and its lesson bodies separately. The returned
+    Course still carries the bodies in memory for the creation response.
+    """
+    course, contents = new_course(user_id, title, description, category, thumbnail, modules, account_id)
+    course.save()
+    # Only once the course is in the list may the list's ETag change.
+    course.version = Course.bump_version(course.pk, user_id)
+
+    restore_contents(course, contents)
+    SubtopicContent.store(str(course.pk), course.modules)
+    return course
+
+
+def find_reusable_curriculum(title, description, category, reuse_similar=True):
+    """
+    Returns resolved course_data for an equivalent request from the curriculum
+    cache or, failing that, from the most similar previously generated course.
+    """
+    cached = curriculum_cache.get(title, description, category)
+    if cached:
+        return cached
+    if reuse_similar and settings.SIMILAR_CURRICULUM_REUSE:
+        return similarity_index.find_curriculum(title, description, category)
+    return None
+
+
+def remember_curriculum(course):
+    curriculum_cache.set(course.title, course.description, course.category,
+                         course_data_from_modules(course.modules))
+    similarity_index.add(course)
+
+
+def generate_course(user_id, title, description, category, thumbnail='', generator=None,
+                    reuse_similar=True, strategy=None, account_id=None):
+    """
+    Runs the full generation pipeline (Gemini, video resolution, save) and
+    returns the stored Course. Curricula already generated for an equivalent
+    or near-duplicate request are reused instead. `generator` defaults to the
+    Gemini service and can be swapped for any object with a compatible
+    generate_course method; `strategy` picks its generation strategy
+    (GEMINI_GENERATION_STRATEGY when None). `account_id` is the signed-in
+    user whose quota slot the course takes.
+    """
+    reused = find_reusable_curriculum(title, description, category, reuse_similar)
+    if reused:
+        modules = build_modules(reused, {})
+    else:
+        generator = generator or gemini_service
+        course_data = generator.generate_course(title, description, category, strategy=strategy)
+        modules = build_modules(course_data, resolve_course_videos(course_data))
+
+    course = save_course(user_id, title, description, category, thumbnail, modules, account_id)
+    if not reused:
+        remember_curriculum(course)
+    return course
+
+
+def stream_course(user_id, title, description, category, thumbnail='', generator=None,
+                  reuse_similar=True, account_id=None):
+    """
+    Streaming variant of generate_course. Yields ('module', Module) as each
+    module is generated and its videos resolved, then ('course', Course) once
+    the complete course has been saved.
+    """
+    started = time.monotonic()
+    modules = []
+
+    reused = find_reusable_curriculum(title, description, category, reuse_similar)
+    if reused:
+        module_stream = iter(reused['modules'])
+    else:
+        generator = generator or gemini_service
+        module_stream = generator.generate_course_stream(title, description, category)
+
+    for module_data in module_stream:
+        videos = {} if reused else resolve_course_videos({'modules': [module_data]})
+        module = build_module(module_data, len(modules), videos)
+        if not modules:
+            metrics.observe('course_stream.time_to_first_module', time.monotonic() - started)
+        modules.append(module)
+        yield 'module', module
+
+    course = save_course(user_id, title, description, category, thumbnail, modules, account_id)
+    if not reused:
+        remember_curriculum(course)
+    metrics.observe('course_stream.total_time', time.monotonic() - started)
+    yield 'course', course
+
+
+def load_outline(course_id, user_id):
+    """Returns the course without lesson bodies; raises DoesNotExist."""
+    return Course.objects.exclude('modules.subtopics.content').get(pk=course_id, user_id=user_id)
+
+
+def outline_data(course):
+    return {
+        'modules': [
+            {'title': module.title, 'subtopics': [{'title': subtopic.title} for subtopic in module.subtopics]}
+            for module in course.modules
+        ]
+    }
+
+
+def regenerate_module(course_id, user_id, module_index, instructions='', generator=None):
+    """
+    Regenerates one module of an existing course in place and returns it
+    with its lesson bodies. Only that module is sent to Gemini and only its
+    video terms are resolved. Raises IndexError for an unknown module.
+    """
+    course = load_outline(course_id, user_id)
+    if not 0 <= module_index < len(course.modules):
+        raise IndexError('Invalid indices')
+
+    generator = generator or gemini_service
+    module_data = generator.regenerate_module(
+        course.title, course.description, course.category, outline_data(course), module_index, instructions
+    )
+    module = build_module(module_data, module_index, resolve_course_videos({'modules': [module_data]}))
+
+    # The new bodies go in under a fresh content_key that readers ignore until
+    # the course update below switches the module to it, in the same write as
+    # the outline. Only then are the old bodies dropped; on failure the new
+    # ones are, and the course is left as it was.
+    course_id = str(course.pk)
+    old_key = course.modules[module_index].content_key or ''
+    module.content_key = uuid.uuid4().hex
+    SubtopicContent.stage_module(course_id, module_index, module)
+    try:
+        switched = Course.replace_module(course.pk, user_id, module_index, module, old_key)
+    except Exception:
+        SubtopicContent.drop_generations(course_id, module_index, only=module.content_key)
+        raise
+    if not switched:
+        SubtopicContent.drop_generations(course_id, module_index, only=module.content_key)
+        raise IndexError('Invalid indices')
+    SubtopicContent.drop_generations(course_id, module_index, keep=module.content_key)
+    render_cache.invalidate(course_id)
+    return module
+
+
+def regenerate_subtopic(course_id, user_id, module_index, subtopic_index, instructions='', generator=None):
+    """Regenerates one lesson of an existing course in place and returns it as a Subtopic."""
+    course = load_outline(course_id, user_id)
+    if not (0 <= module_index < len(course.modules)
+            and 0 <= subtopic_index < len(course.modules[module_index].subtopics)):
+        raise IndexError('Invalid indices')
+
+    generator = generator or gemini_service
+    subtopic_data = generator.regenerate_subtopic(
+        course.title, course.description, course.category, outline_data(course),
+        module_index, subtopic_index, instructions
+    )
+    subtopic = build_subtopic(
+        subtopic_data, course.modules[module_index].subtopics[subtopic_index].order,
+        resolve_course_videos({'modules': [{'subtopics': [subtopic_data]}]})
+    )
+
+    content_key = course.modules[module_index].content_key or ''
+    if not Course.replace_subtopic(course.pk, user_id, module_index, subtopic_index, subtopic, content_key):
+        raise IndexError('Invalid indices')
+    render_cache.invalidate(str(course.pk))
+    return subtopic
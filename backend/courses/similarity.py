@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import random
+
+from django.conf import settings
+
+from utils.metrics import metrics
+from .curriculum_cache import course_data_from_modules, normalize_text
+from .models import Course, CurriculumSignature
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Words that say how a course is pitched rather than what it covers.
+STOPWORDS = {
+    'a', 'an', 'and', 'the', 'of', 'for', 'to', 'in', 'on', 'with', 'from', 'by',
+    'learn', 'learning', 'intro', 'introduction', 'course', 'guide', 'tutorial',
+    'beginner', 'beginners', 'basics', 'fundamentals', 'complete', 'getting', 'started',
+    'how', 'i', 'want', 'me', 'my', 'about',
+}
+
+
+def shingles(title, description):
+    """Unigram and bigram shingles of the topical words in a course request."""
+    words = [
+        word for word in normalize_text(f"{title} {description}").split()
+        if word not in STOPWORDS
+    ]
+    result = set(words)
+    result.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return result
+
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index over previously generated course requests, persisted in
+    the `curriculum_signatures` collection next to `courses`.
+
+    Each request is reduced to a MinHash signature whose bands are stored as
+    indexed keys, so a lookup only fetches requests that share at least one
+    band (scoped by category), most shared bands first, and compares their
+    signatures.
+    """
+
+    def __init__(self, num_perm=64, bands=16, seed=1):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = settings.SIMILAR_CURRICULUM_THRESHOLD
+        self.max_candidates = settings.SIMILAR_CURRICULUM_MAX_CANDIDATES
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randint(1, MERSENNE_PRIME - 1), rng.randint(0, MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, title, description):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+            for shingle in shingles(title, description)
+        ]
+        if not hashes:
+            return []
+        return [
+            min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes)
+            for a, b in self._permutations
+        ]
+
+    def band_keys(self, signature, category):
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+            keys.append(f"{category}:{band}:{digest}")
+        return keys
+
+    def add(self, course):
+        signature = self.signature(course.title, course.description)
+        if not signature:
+            return
+        try:
+            CurriculumSignature(
+                course_id=str(course.pk),
+                title=course.title,
+                description=course.description,
+                category=course.category,
+                signature=signature,
+                band_keys=self.band_keys(signature, course.category)
+            ).save()
+        except Exception as e:
+            logger.warning(f"Failed to index course {course.pk}: {e}")
+
+    def find_similar(self, title, description, category):
+        """Returns (CurriculumSignature, similarity) for the best match above the threshold, or None."""
+        signature = self.signature(title, description)
+        if not signature:
+            return None
+
+        # Requests sharing more bands are likelier to be similar, so only the
+        # max_candidates with the most shared bands are compared, however old.
+        band_keys = self.band_keys(signature, category)
+        candidates = CurriculumSignature._get_collection().aggregate([
+            {'$match': {'band_keys': {'$in': band_keys}}},
+            {'$project': {
+                'course_id': 1, 'title': 1, 'description': 1, 'category': 1, 'signature': 1, 'created_at': 1,
+                'shared_bands': {'$size': {'$setIntersection': ['$band_keys', band_keys]}},
+            }},
+            {'$sort': {'shared_bands': -1, 'created_at': -1}},
+            {'$limit': self.max_candidates},
+        ])
+
+        best, best_score = None, 0.0
+        for document in candidates:
+            document.pop('shared_bands')
+            candidate = CurriculumSignature._from_son(document)
+            matches = sum(1 for mine, theirs in zip(signature, candidate.signature) if mine == theirs)
+            score = matches / self.num_perm
+            if score > best_score:
+                best, best_score = candidate, score
+
+        if best is None or best_score < self.threshold:
+            return None
+        return best, best_score
+
+    def find_curriculum(self, title, description, category):
+        """Returns the resolved course_data of the most similar stored course, or None."""
+        try:
+            match = self.find_similar(title, description, category)
+        except Exception as e:
+            logger.warning(f"Similarity lookup failed: {e}")
+            return None
+        if not match:
+            metrics.incr('similar_curriculum.misses')
+            return None
+
+        candidate, score = match
+        source = Course.objects(pk=candidate.course_id).only('id', 'modules').first()
+        if not source:
+            candidate.delete()
+            metrics.incr('similar_curriculum.misses')
+            return None
+
+        logger.info(f"Reusing curriculum of '{candidate.title}' for '{title}' (similarity {score:.2f})")
+        metrics.incr('similar_curriculum.hits')
+        return course_data_from_modules(source.attach_contents().modules)
+
+
+similarity_index = SimilarityIndex()
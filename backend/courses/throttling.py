@@ -0,0 +1,42 @@
+"""
+Rate limits for the endpoints that call Gemini. Signed-in users get the
+bucket of their plan; demo visitors share the free tier per X-Demo-User id
+(per client IP without one) and, so that rotating the header does not help,
+a bucket per client IP.
+"""
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from users.models import User
+from utils.rate_limit import parse_rate, rate_limiter
+
+PLAN_LIMITS = {
+    plan: parse_rate(settings.COURSE_RATE_LIMITS.get(plan, settings.COURSE_RATE_LIMITS['free']))
+    for plan, _ in User.PLAN_CHOICES
+}
+IP_LIMIT = parse_rate(settings.COURSE_RATE_LIMIT_IP)
+
+
+def generation_buckets(demo_id, ident, user=None):
+    if user is not None and user.is_authenticated:
+        return [(f"user:{user.pk}", PLAN_LIMITS.get(user.plan, PLAN_LIMITS['free']))]
+    if demo_id == 'anonymous':
+        # Requests without X-Demo-User would otherwise all share one bucket.
+        demo_id = f"anonymous:{ident}"
+    return [(f"demo:{demo_id}", PLAN_LIMITS['free']), (f"ip:{ident}", IP_LIMIT)]
+
+
+class CourseGenerationThrottle(BaseThrottle):
+    """Rejects with 429 and Retry-After once a caller's generation bucket is empty."""
+
+    def allow_request(self, request, view):
+        if not settings.COURSE_RATE_LIMIT_ENABLED:
+            return True
+        from .views import get_demo_user_id
+
+        buckets = generation_buckets(get_demo_user_id(request), self.get_ident(request), request.user)
+        self.wait_seconds = rate_limiter.check(buckets)
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
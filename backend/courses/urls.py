@@ -1,18 +1,39 @@
+from django.conf import settings
 from django.urls import path
 
+from . import async_views
+
 from .views import (
     CourseListView,
     CourseDetailView,
     CourseCreateView,
+    CourseJobView,
+    CourseSimilarView,
+    CourseStreamView,
+    LessonContentView,
+    ModuleRegenerateView,
+    SubtopicRegenerateView,
     SubtopicToggleView,
     CourseProgressView
 )
 
 urlpatterns = [
     path('', CourseListView.as_view(), name='course-list'),
-    path('create/', CourseCreateView.as_view(), name='course-create'),
-    path('<str:pk>/', CourseDetailView.as_view(), name='course-detail'),
+    path('create/', async_views.course_create if settings.COURSE_ASYNC_VIEWS else CourseCreateView.as_view(),
+         name='course-create'),
+    path('create/stream/', CourseStreamView.as_view(), name='course-create-stream'),
+    path('similar/', CourseSimilarView.as_view(), name='course-similar'),
+    path('jobs/<str:job_id>/', CourseJobView.as_view(), name='course-job'),
+    path('<str:pk>/', async_views.course_detail if settings.COURSE_ASYNC_VIEWS else CourseDetailView.as_view(),
+         name='course-detail'),
     path('<str:pk>/progress/', CourseProgressView.as_view(), name='course-progress'),
+    path('<str:pk>/content/', LessonContentView.as_view(), name='lesson-content-batch'),
+    path('<str:pk>/module/<int:module_index>/subtopic/<int:subtopic_index>/content/',
+         LessonContentView.as_view(), name='lesson-content'),
+    path('<str:pk>/module/<int:module_index>/regenerate/',
+         ModuleRegenerateView.as_view(), name='module-regenerate'),
+    path('<str:pk>/module/<int:module_index>/subtopic/<int:subtopic_index>/regenerate/',
+         SubtopicRegenerateView.as_view(), name='subtopic-regenerate'),
     path('<str:course_id>/module/<int:module_index>/subtopic/<int:subtopic_index>/toggle/', 
          SubtopicToggleView.as_view(), name='subtopic-toggle'),
 ]
@@ -1,18 +1,36 @@
-from rest_framework import status
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from mongoengine.errors import DoesNotExist
 
-from .models import Course, Module, Subtopic
+from . import fast_serializers, quota
+from .conditional import etag_matches, make_etag, make_list_etag, not_modified, with_etag
+from .models import Course, CourseVersion, SubtopicContent, content_keys
 from .serializers import (
     CourseListSerializer,
     CourseDetailSerializer,
     CourseCreateSerializer,
+    CourseOutlineSerializer,
+    LessonContentSerializer,
+    ModuleSerializer,
+    RegenerateSerializer,
     SubtopicSerializer
 )
-from utils.gemini_service import gemini_service
-from utils.youtube_service import youtube_service
+from .jobs import course_jobs
+from .pagination import InvalidCursor, get_page_size, paginate
+from .render_cache import render_cache
+from .services import generate_course, regenerate_module, regenerate_subtopic, stream_course
+from .similarity import similarity_index
+from .throttling import CourseGenerationThrottle
+
+json_renderer = import_string(settings.JSON_RENDERER)()
 
 
 def get_demo_user_id(request):
@@ -29,9 +47,36 @@ class CourseListView(APIView):
 
     def get(self, request):
         demo_id = get_demo_user_id(request)
-        courses = Course.objects(user_id=demo_id)
-        serializer = CourseListSerializer(courses, many=True)
-        return Response(serializer.data)
+        after = request.query_params.get('after')
+        try:
+            page_size = get_page_size(request.query_params.get('page_size'))
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = make_list_etag(demo_id, CourseVersion.current(demo_id), after, page_size)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        queryset = Course.objects(user_id=demo_id).exclude('modules')
+        if settings.COURSE_FAST_READS:
+            queryset = queryset.as_pymongo()
+        try:
+            courses, next_cursor = paginate(queryset, after=after, page_size=page_size)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if settings.COURSE_FAST_READS:
+            data = [fast_serializers.course_list_item(course) for course in courses]
+        else:
+            data = CourseListSerializer(courses, many=True).data
+        response = with_etag(Response(data), etag)
+        if next_cursor:
+            response['X-Next-Cursor'] = next_cursor
+            next_url = request.build_absolute_uri(
+                f"{request.path}?{urlencode({'after': next_cursor, 'page_size': page_size})}"
+            )
+            response['Link'] = f'<{next_url}>; rel="next"'
+        return response
 
 
 class CourseDetailView(APIView):
@@ -39,18 +84,54 @@ class CourseDetailView(APIView):
 
     def get(self, request, pk):
         demo_id = get_demo_user_id(request)
+        outline = request.query_params.get('outline') in ('1', 'true')
+        variant = 'outline' if outline else 'full'
         try:
-            course = Course.objects.get(pk=pk, user_id=demo_id)
-            serializer = CourseDetailSerializer(course)
-            return Response(serializer.data)
+            version = Course.get_version(pk, demo_id)
+            etag = make_etag(pk, version, variant)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+            content = render_cache.get(pk, version, variant)
+            if content is None:
+                if settings.COURSE_FAST_READS:
+                    version, data = self._read_fast(pk, demo_id, outline)
+                else:
+                    version, data = self._read(pk, demo_id, outline)
+                content = json_renderer.render(data)
+                etag = make_etag(pk, version, variant)
+                render_cache.set(pk, version, variant, content)
+
+            return with_etag(HttpResponse(content, content_type='application/json'), etag)
         except DoesNotExist:
             return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    def _read(self, pk, demo_id, outline):
+        if outline:
+            course = Course.objects.exclude('modules.subtopics.content').get(pk=pk, user_id=demo_id)
+            return course.version, CourseOutlineSerializer(course).data
+        course = Course.objects.get(pk=pk, user_id=demo_id).attach_contents()
+        return course.version, CourseDetailSerializer(course).data
+
+    def _read_fast(self, pk, demo_id, outline):
+        queryset = Course.objects(pk=pk, user_id=demo_id)
+        if outline:
+            queryset = queryset.exclude('modules.subtopics.content')
+        doc = queryset.as_pymongo().first()
+        if doc is None:
+            raise DoesNotExist('Course not found')
+        if outline:
+            return doc.get('version', 0), fast_serializers.course_outline(doc)
+        contents = SubtopicContent.for_course(str(doc['_id']), content_keys(doc.get('modules', [])))
+        return doc.get('version', 0), fast_serializers.course_detail(doc, contents)
+
     def delete(self, request, pk):
         demo_id = get_demo_user_id(request)
         try:
-            course = Course.objects.get(pk=pk, user_id=demo_id)
+            course = Course.objects.only('id', 'user_id', 'account_id').get(pk=pk, user_id=demo_id)
             course.delete()
+            quota.release(course.account_id)
+            render_cache.invalidate(pk)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except DoesNotExist:
             return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -58,6 +139,7 @@ class CourseDetailView(APIView):
 
 class CourseCreateView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [CourseGenerationThrottle]
 
     def post(self, request):
         demo_id = get_demo_user_id(request)
@@ -68,45 +150,25 @@ class CourseCreateView(APIView):
         description = serializer.validated_data['description']
         category = serializer.validated_data['category']
         thumbnail = serializer.validated_data.get('thumbnail', '')
+        reuse = serializer.validated_data['reuse']
+        strategy = serializer.validated_data.get('strategy')
+
+        try:
+            account_id = quota.reserve(request.user)
+        except quota.QuotaExceeded as e:
+            return Response(e.data(), status=status.HTTP_403_FORBIDDEN)
+
+        if request.query_params.get('async') in ('1', 'true'):
+            job = course_jobs.enqueue(
+                demo_id, title, description, category, thumbnail, reuse, strategy, account_id=account_id
+            )
+            return Response(job, status=status.HTTP_202_ACCEPTED)
 
         try:
-            course_data = gemini_service.generate_course(title, description, category)
-            modules = []
-
-            for module_index, module_data in enumerate(course_data['modules']):
-                subtopics = []
-                for subtopic_index, subtopic_data in enumerate(module_data['subtopics']):
-                    video_url = subtopic_data['video_url']
-                    if video_url.startswith('search:'):
-                        search_term = video_url.replace('search:', '').strip()
-                        video_url = youtube_service.search_video(search_term)
-                        print(f"Video found for '{search_term}': {video_url}")
-
-                    subtopic = Subtopic(
-                        title=subtopic_data['title'],
-                        video_url=video_url,
-                        content=subtopic_data['content'],
-                        order=subtopic_index,
-                        completed=False
-                    )
-                    subtopics.append(subtopic)
-
-                module = Module(
-                    title=module_data['title'],
-                    order=module_index,
-                    subtopics=subtopics
-                )
-                modules.append(module)
-
-            course = Course(
-                user_id=demo_id,  # each browser/session is isolated
-                title=title,
-                description=description,
-                category=category,
-                thumbnail=thumbnail,
-                modules=modules
+            course = generate_course(
+                demo_id, title, description, category, thumbnail, reuse_similar=reuse, strategy=strategy,
+                account_id=account_id
             )
-            course.save()
 
             return Response(
                 CourseDetailSerializer(course).data,
@@ -114,51 +176,228 @@ class CourseCreateView(APIView):
             )
 
         except Exception as e:
+            quota.release(account_id)
             return Response(
                 {'error': f'Failed to generate course: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
 
+class CourseStreamView(APIView):
+    """
+    Generates a course and streams it as server-sent events: one `module`
+    event per module as soon as it is ready, then a `course` event with the
+    saved course (or an `error` event).
+    """
+    permission_classes = [AllowAny]
+    throttle_classes = [CourseGenerationThrottle]
+
+    def post(self, request):
+        demo_id = get_demo_user_id(request)
+        serializer = CourseCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            account_id = quota.reserve(request.user)
+        except quota.QuotaExceeded as e:
+            return Response(e.data(), status=status.HTTP_403_FORBIDDEN)
+
+        events = stream_course(
+            demo_id, data['title'], data['description'],
+            data['category'], data.get('thumbnail', ''), reuse_similar=data['reuse'],
+            account_id=account_id
+        )
+        response = StreamingHttpResponse(self._render(events, account_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _render(self, events, account_id=None):
+        saved = False
+        try:
+            for event, obj in events:
+                if event == 'module':
+                    payload = ModuleSerializer(obj).data
+                else:
+                    saved = True
+                    payload = CourseDetailSerializer(obj).data
+                yield self._event(event, payload)
+        except Exception as e:
+            yield self._event('error', {'error': f'Failed to generate course: {str(e)}'})
+        finally:
+            # Also runs when the client disconnects before the course is saved.
+            if not saved:
+                quota.release(account_id)
+
+    def _event(self, event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+class CourseSimilarView(APIView):
+    """
+    Reports whether an existing curriculum would be reused for a course
+    request. The match may be another visitor's request, so its text is
+    not returned.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = CourseCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        match = similarity_index.find_similar(data['title'], data['description'], data['category'])
+        if not match:
+            return Response({'match': None})
+
+        candidate, score = match
+        return Response({
+            'match': {
+                'category': candidate.category,
+                'similarity': round(score, 2),
+            }
+        })
+
+
+class CourseJobView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, job_id):
+        demo_id = get_demo_user_id(request)
+        job = course_jobs.get(job_id)
+        if not job or job['user_id'] != demo_id:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+
+
+class LessonContentView(APIView):
+    """
+    Returns lesson bodies for a course, either one lesson by path or a batch
+    via `?lessons=0.1,0.2` (module.subtopic pairs) for prefetching.
+    """
+    permission_classes = [AllowAny]
+    max_batch = 20
+
+    def get(self, request, pk, module_index=None, subtopic_index=None):
+        demo_id = get_demo_user_id(request)
+        if module_index is not None:
+            lessons = [(int(module_index), int(subtopic_index))]
+        else:
+            lessons = []
+            for pair in request.query_params.get('lessons', '').split(',')[:self.max_batch]:
+                if not pair:
+                    continue
+                indices = pair.split('.')
+                if len(indices) != 2 or not all(index.isdecimal() for index in indices):
+                    return Response({'error': 'Invalid lessons'}, status=status.HTTP_400_BAD_REQUEST)
+                lessons.append((int(indices[0]), int(indices[1])))
+
+        try:
+            contents = Course.get_lesson_contents(pk, demo_id, lessons)
+        except DoesNotExist:
+            return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        results = [
+            {'module_index': lesson[0], 'subtopic_index': lesson[1], 'content': contents[lesson]}
+            for lesson in lessons if lesson in contents
+        ]
+        if module_index is not None:
+            if not results:
+                return Response({'error': 'Invalid indices'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(LessonContentSerializer(results[0]).data)
+        return Response({'lessons': LessonContentSerializer(results, many=True).data})
+
+
 class SubtopicToggleView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request, course_id, module_index, subtopic_index):
         demo_id = get_demo_user_id(request)
         try:
-            course = Course.objects.get(pk=course_id, user_id=demo_id)
-            module_idx = int(module_index)
-            subtopic_idx = int(subtopic_index)
-
-            if module_idx < len(course.modules) and subtopic_idx < len(course.modules[module_idx].subtopics):
-                subtopic = course.modules[module_idx].subtopics[subtopic_idx]
-                subtopic.completed = not subtopic.completed
-                course.save()
-                return Response(SubtopicSerializer(subtopic).data, status=status.HTTP_200_OK)
-            else:
+            subtopic = Course.toggle_subtopic(course_id, demo_id, int(module_index), int(subtopic_index))
+            if subtopic is None:
                 return Response({'error': 'Invalid indices'}, status=status.HTTP_400_BAD_REQUEST)
+            render_cache.invalidate(course_id)
+            if not subtopic.get('content'):
+                lesson = (int(module_index), int(subtopic_index))
+                subtopic['content'] = Course.get_lesson_contents(course_id, demo_id, [lesson]).get(lesson, '')
+            return Response(SubtopicSerializer(subtopic).data, status=status.HTTP_200_OK)
 
         except DoesNotExist:
             return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class CourseProgressView(APIView):
+class ModuleRegenerateView(APIView):
+    """Regenerates one module of a course in place and returns it with its lessons."""
     permission_classes = [AllowAny]
+    throttle_classes = [CourseGenerationThrottle]
 
-    def post(self, request, pk):
+    def post(self, request, pk, module_index):
         demo_id = get_demo_user_id(request)
+        serializer = RegenerateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         try:
-            course = Course.objects.get(pk=pk, user_id=demo_id)
-            module_index = request.data.get('module_index')
-            subtopic_index = request.data.get('subtopic_index')
+            module = regenerate_module(pk, demo_id, int(module_index), serializer.validated_data['instructions'])
+            return Response(ModuleSerializer(module).data, status=status.HTTP_200_OK)
 
-            if module_index is not None:
-                course.current_module_index = module_index
-            if subtopic_index is not None:
-                course.current_subtopic_index = subtopic_index
+        except DoesNotExist:
+            return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
+        except IndexError:
+            return Response({'error': 'Invalid indices'}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to regenerate module: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-            course.save()
-            return Response(CourseDetailSerializer(course).data, status=status.HTTP_200_OK)
 
+class SubtopicRegenerateView(APIView):
+    """Regenerates one lesson of a course in place and returns it."""
+    permission_classes = [AllowAny]
+    throttle_classes = [CourseGenerationThrottle]
+
+    def post(self, request, pk, module_index, subtopic_index):
+        demo_id = get_demo_user_id(request)
+        serializer = RegenerateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            subtopic = regenerate_subtopic(
+                pk, demo_id, int(module_index), int(subtopic_index), serializer.validated_data['instructions']
+            )
+            return Response(SubtopicSerializer(subtopic).data, status=status.HTTP_200_OK)
+
+        except DoesNotExist:
+            return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
+        except IndexError:
+            return Response({'error': 'Invalid indices'}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to regenerate lesson: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class CourseProgressView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request, pk):
+        demo_id = get_demo_user_id(request)
+        try:
+            position = Course.set_position(
+                pk, demo_id,
+                module_index=request.data.get('module_index'),
+                subtopic_index=request.data.get('subtopic_index')
+            )
+            render_cache.invalidate(pk)
+            return Response({
+                'id': str(position['_id']),
+                'current_module_index': position.get('current_module_index', 0),
+                'current_subtopic_index': position.get('current_subtopic_index', 0),
+                'updated_at': serializers.DateTimeField().to_representation(position['updated_at']),
+            }, status=status.HTTP_200_OK)
+
+        except (TypeError, ValueError):
+            return Response({'error': 'Invalid indices'}, status=status.HTTP_400_BAD_REQUEST)
         except DoesNotExist:
             return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models import F
 
 
 class UserManager(BaseUserManager):
@@ -60,12 +61,25 @@ class User(AbstractBaseUser, PermissionsMixin):
     def can_create_course(self):
         return self.courses_created < self.course_limit
     
+    def reserve_course(self):
+        """Takes a course slot with one conditional UPDATE; returns False if none is left."""
+        reserved = User.objects.filter(pk=self.pk, courses_created__lt=F('course_limit')).update(
+            courses_created=F('courses_created') + 1
+        )
+        self.refresh_from_db(fields=['courses_created', 'course_limit'])
+        return bool(reserved)
+    
     def increment_courses(self):
-        self.courses_created += 1
-        self.save()
+        User.objects.filter(pk=self.pk).update(courses_created=F('courses_created') + 1)
+        self.refresh_from_db(fields=['courses_created'])
     
     def decrement_courses(self):
-        if self.courses_created > 0:
-            self.courses_created -= 1
-            self.save()
+        User.release_course(self.pk)
+        self.refresh_from_db(fields=['courses_created'])
+    
+    @staticmethod
+    def release_course(user_id):
+        User.objects.filter(pk=user_id, courses_created__gt=0).update(
+            courses_created=F('courses_created') - 1
+        )
 
@@ -0,0 +1,62 @@
+"""
+Lazily created asyncio clients for the async views: Redis (redis.asyncio),
+MongoDB (motor) and HTTP (httpx). Clients are bound to an event loop, so one
+set is kept per running loop.
+"""
+import asyncio
+import logging
+import weakref
+
+from django.conf import settings
+
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def _loop_clients():
+    loop = asyncio.get_running_loop()
+    clients = _clients.get(loop)
+    if clients is None:
+        clients = _clients[loop] = {}
+    return clients
+
+
+def get_async_redis():
+    """Returns an asyncio Redis client, or None when Redis is unavailable."""
+    if not redis_client:
+        return None
+    clients = _loop_clients()
+    if 'redis' not in clients:
+        import redis.asyncio as aioredis
+        clients['redis'] = aioredis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT
+        )
+    return clients['redis']
+
+
+def get_async_db():
+    """Returns the motor database for MONGODB_URI."""
+    clients = _loop_clients()
+    if 'mongo' not in clients:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        clients['mongo'] = AsyncIOMotorClient(settings.MONGODB_URI, maxPoolSize=settings.ASYNC_MONGO_POOL_SIZE)
+    # Same fallback as mongoengine when the URI names no database.
+    return clients['mongo'].get_default_database('test')
+
+
+def get_http_client():
+    clients = _loop_clients()
+    if 'http' not in clients:
+        import httpx
+        clients['http'] = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=settings.ASYNC_HTTP_MAX_CONNECTIONS)
+        )
+    return clients['http']
@@ -1,25 +1,336 @@
+import asyncio
+import hashlib
 import json
-import re
-import google.generativeai as genai
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from .json_stream import ModuleStreamParser
+from .metrics import metrics
+from .model_json import (
+    ModelJSONError,
+    ParseResult,
+    course_parser,
+    lessons_parser,
+    outline_parser,
+    validate_module,
+    validate_subtopic,
+)
+from .resilience import Dependency
+from .services import services
+from .single_flight import single_flight
+
+logger = logging.getLogger(__name__)
+
+# "single": one completion for the whole course.
+# "outline": a short outline completion, then one completion per module in parallel.
+STRATEGIES = ('single', 'outline')
+# Rough output size of a token, for estimating tokens saved by continuations.
+CHARS_PER_TOKEN = 4
+
+
+def transient_gemini_error(error):
+    """Rate limits, server errors and network failures; not e.g. invalid or blocked prompts."""
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(error, (google_exceptions.TooManyRequests, google_exceptions.ServerError,
+                              ConnectionError, TimeoutError))
 
 
 class GeminiService:
     def __init__(self):
         if not settings.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY is not set in environment variables")
+        # Imported here: the SDK pulls in grpc and protobuf, which most
+        # processes (management commands, read-only workers) never need.
+        import google.generativeai as genai
         genai.configure(api_key=settings.GEMINI_API_KEY)
         self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        # The SDK takes no per-call timeout, so calls run on the dependency's
+        # pool and are abandoned once their timeout passes.
+        self.dependency = Dependency(
+            'gemini',
+            max_timeout=settings.GEMINI_TIMEOUT,
+            min_timeout=settings.GEMINI_TIMEOUT_MIN,
+            retries=settings.GEMINI_RETRIES,
+            backoff_base=1.0,
+            backoff_cap=10.0,
+            hedge=settings.GEMINI_HEDGE,
+            transient=transient_gemini_error,
+            failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.BREAKER_RESET_TIMEOUT,
+            thread_timeouts=True,
+            max_workers=settings.GEMINI_MAX_CONCURRENT_CALLS
+        )
+
+    def _complete(self, prompt, operation):
+        """Returns the text of one completion, through the resilience layer."""
+        return self.dependency.call(lambda timeout: self.model.generate_content(prompt).text, operation)
+
+    async def _complete_async(self, prompt, operation):
+        async def complete(timeout):
+            response = await self.model.generate_content_async(prompt)
+            return response.text
+
+        return await self.dependency.call_async(complete, operation)
+
+    def generate_course(self, title, description, category, strategy=None):
+        strategy = self._strategy(strategy)
+        if strategy == 'outline':
+            prompt = self._build_outline_prompt(title, description, category)
+            generate = lambda: self._generate_outlined(title, description, category, prompt)
+        else:
+            prompt = self._build_course_prompt(title, description, category)
+            generate = lambda: self._generate_single(title, description, category, prompt)
+        try:
+            # Identical prompts from concurrent workers share one generation.
+            return single_flight.do(
+                self._single_flight_key(strategy, prompt),
+                generate,
+                lock_ttl=settings.GEMINI_SINGLE_FLIGHT_TTL
+            )
+        except Exception as e:
+            raise Exception(f"Failed to generate course: {str(e)}")
+
+    async def generate_course_async(self, title, description, category, strategy=None):
+        """asyncio version of generate_course."""
+        strategy = self._strategy(strategy)
+        if strategy == 'outline':
+            prompt = self._build_outline_prompt(title, description, category)
+
+            async def generate():
+                return await self._generate_outlined_async(title, description, category, prompt)
+        else:
+            prompt = self._build_course_prompt(title, description, category)
+
+            async def generate():
+                return await self._generate_single_async(title, description, category, prompt)
 
-    def generate_course(self, title, description, category):
-        prompt = self._build_course_prompt(title, description, category)
         try:
-            response = self.model.generate_content(prompt)
-            course_data = self._parse_response(response.text)
-            return course_data
+            return await single_flight.do_async(
+                self._single_flight_key(strategy, prompt),
+                generate,
+                lock_ttl=settings.GEMINI_SINGLE_FLIGHT_TTL
+            )
         except Exception as e:
             raise Exception(f"Failed to generate course: {str(e)}")
 
+    def _strategy(self, strategy):
+        strategy = strategy or settings.GEMINI_GENERATION_STRATEGY
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown generation strategy: {strategy}")
+        return strategy
+
+    def _single_flight_key(self, strategy, prompt):
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        return f"gemini:{digest}" if strategy == 'single' else f"gemini:{strategy}:{digest}"
+
+    def _generate_single(self, title, description, category, prompt):
+        """
+        Generates the course in one completion. If the response is cut off or
+        breaks partway, the modules parsed so far are kept and continuation
+        requests ask only for the rest, up to GEMINI_CONTINUATION_RETRIES times.
+        """
+        modules, complete = self._parse_response(self._complete(prompt, 'course'))
+        salvaged = list(modules)
+        continuations = 0
+        while not complete and continuations < settings.GEMINI_CONTINUATION_RETRIES:
+            continuations += 1
+            continuation = self._build_continuation_prompt(title, description, category, modules)
+            try:
+                more, complete = self._parse_response(self._complete(continuation, 'continuation'))
+            except Exception as e:
+                self._continuation_failed(e, modules)
+                break
+            modules = modules + more
+        return self._finish_course(modules, salvaged, complete, continuations)
+
+    async def _generate_single_async(self, title, description, category, prompt):
+        modules, complete = self._parse_response(await self._complete_async(prompt, 'course'))
+        salvaged = list(modules)
+        continuations = 0
+        while not complete and continuations < settings.GEMINI_CONTINUATION_RETRIES:
+            continuations += 1
+            continuation = self._build_continuation_prompt(title, description, category, modules)
+            try:
+                more, complete = self._parse_response(await self._complete_async(continuation, 'continuation'))
+            except Exception as e:
+                self._continuation_failed(e, modules)
+                break
+            modules = modules + more
+        return self._finish_course(modules, salvaged, complete, continuations)
+
+    def _continuation_failed(self, error, modules):
+        """
+        A continuation request failed (timeout, open circuit, quota): the
+        course is finished with what was salvaged, or the error is raised if
+        nothing was.
+        """
+        if not modules:
+            raise Exception(f"Failed to generate course: {str(error)}")
+        metrics.incr('gemini.continuation_failures')
+        logger.warning(f"Continuation failed, keeping {len(modules)} salvaged module(s): {error}")
+
+    def _finish_course(self, modules, salvaged, complete, continuations):
+        if not modules:
+            raise ValueError("Gemini response has no complete modules")
+        if continuations:
+            # A full retry would have paid for the salvaged modules again.
+            tokens_saved = len(json.dumps(salvaged)) // CHARS_PER_TOKEN if salvaged else 0
+            metrics.incr('gemini.courses_resumed')
+            metrics.incr('gemini.continuations', continuations)
+            metrics.incr('gemini.continuation_tokens_saved', tokens_saved)
+            metrics.observe('gemini.continuation_tokens_saved_per_course', tokens_saved)
+            logger.info(
+                f"Resumed course after {len(salvaged)} salvaged module(s) with {continuations} "
+                f"continuation(s), ~{tokens_saved} output tokens saved"
+            )
+        if not complete:
+            metrics.incr('gemini.continuations_exhausted')
+            logger.warning(
+                f"Course still incomplete after {continuations} continuation(s), "
+                f"keeping {len(modules)} module(s)"
+            )
+        return {'modules': modules}
+
+    def _generate_outlined(self, title, description, category, outline_prompt):
+        """
+        Generates the outline, then every module's content on a thread pool.
+        A module whose call fails is retried on its own, up to
+        GEMINI_MODULE_RETRIES times, without redoing the others.
+        """
+        outline = self._parse_outline(self._complete(outline_prompt, 'outline'))
+        modules = outline['modules']
+        with ThreadPoolExecutor(max_workers=min(settings.GEMINI_MODULE_WORKERS, len(modules))) as executor:
+            contents = list(executor.map(
+                lambda module: self._generate_module_content(title, description, category, outline, module),
+                modules
+            ))
+        return self._assemble(outline, contents)
+
+    def _generate_module_content(self, title, description, category, outline, module):
+        prompt = self._build_module_prompt(title, description, category, outline, module)
+        for attempt in range(settings.GEMINI_MODULE_RETRIES + 1):
+            try:
+                return self._parse_module_content(self._complete(prompt, 'module'), module)
+            except Exception as e:
+                if attempt == settings.GEMINI_MODULE_RETRIES:
+                    raise
+                logger.warning(f"Module '{module['title']}' attempt {attempt + 1} failed, retrying: {e}")
+
+    async def _generate_outlined_async(self, title, description, category, outline_prompt):
+        outline = self._parse_outline(await self._complete_async(outline_prompt, 'outline'))
+        semaphore = asyncio.Semaphore(settings.GEMINI_MODULE_WORKERS)
+
+        async def generate(module):
+            async with semaphore:
+                return await self._generate_module_content_async(title, description, category, outline, module)
+
+        contents = await asyncio.gather(*(generate(module) for module in outline['modules']))
+        return self._assemble(outline, contents)
+
+    async def _generate_module_content_async(self, title, description, category, outline, module):
+        prompt = self._build_module_prompt(title, description, category, outline, module)
+        for attempt in range(settings.GEMINI_MODULE_RETRIES + 1):
+            try:
+                return self._parse_module_content(await self._complete_async(prompt, 'module'), module)
+            except Exception as e:
+                if attempt == settings.GEMINI_MODULE_RETRIES:
+                    raise
+                logger.warning(f"Module '{module['title']}' attempt {attempt + 1} failed, retrying: {e}")
+
+    def _assemble(self, outline, contents):
+        """Merges the outline and per-module contents into the single-call course_data shape."""
+        return {
+            'modules': [
+                {
+                    'title': module['title'],
+                    'subtopics': [
+                        {
+                            'title': subtopic['title'],
+                            'video_url': subtopic['video_url'],
+                            'content': content,
+                        }
+                        for subtopic, content in zip(module['subtopics'], module_contents)
+                    ],
+                }
+                for module, module_contents in zip(outline['modules'], contents)
+            ]
+        }
+
+    def regenerate_module(self, title, description, category, outline, module_index, instructions=''):
+        """
+        Writes a replacement for one module of an existing course, with the
+        rest of the course outline as context. Returns the module dict.
+        """
+        prompt = self._build_module_regeneration_prompt(
+            title, description, category, outline, module_index, instructions
+        )
+        return self._regenerate(prompt, validate_module, f"module {module_index}")
+
+    def regenerate_subtopic(self, title, description, category, outline, module_index, subtopic_index,
+                            instructions=''):
+        """Writes a replacement for one lesson of an existing course. Returns the subtopic dict."""
+        prompt = self._build_subtopic_regeneration_prompt(
+            title, description, category, outline, module_index, subtopic_index, instructions
+        )
+        return self._regenerate(prompt, validate_subtopic, f"lesson {module_index}.{subtopic_index}")
+
+    def _regenerate(self, prompt, validate, label):
+        for attempt in range(settings.GEMINI_MODULE_RETRIES + 1):
+            try:
+                result = course_parser.parse(self._complete(prompt, 'regeneration'))
+                error = validate(result.data) if result.complete else 'response was cut off'
+                if error:
+                    raise ValueError(error)
+                self._record_parse(result, 'regeneration')
+                return result.data
+            except Exception as e:
+                if attempt == settings.GEMINI_MODULE_RETRIES:
+                    raise Exception(f"Failed to regenerate {label}: {str(e)}")
+                logger.warning(f"Regenerating {label} attempt {attempt + 1} failed, retrying: {e}")
+
+    def generate_course_stream(self, title, description, category):
+        """
+        Yields each module dict as soon as its JSON object has been generated.
+        If the stream is cut off or breaks, the missing modules are requested
+        with continuation prompts like in the single strategy.
+        """
+        prompt = self._build_course_prompt(title, description, category)
+        parser = ModuleStreamParser()
+        modules = []
+        try:
+            # Timed to the first chunk; the rest arrives while iterating.
+            stream = self.dependency.call(
+                lambda timeout: self.model.generate_content(prompt, stream=True), 'stream'
+            )
+            for chunk in stream:
+                for module in parser.feed(chunk.text):
+                    modules.append(module)
+                    yield module
+            error = None
+        except Exception as e:
+            error = str(e)
+            logger.warning(f"Gemini stream broke after {len(modules)} module(s): {e}")
+        self._record_parse(ParseResult(modules, parser.done, parser.repairs, error), 'stream')
+
+        complete = parser.done
+        salvaged = list(modules)
+        continuations = 0
+        while not complete and continuations < settings.GEMINI_CONTINUATION_RETRIES:
+            continuations += 1
+            continuation = self._build_continuation_prompt(title, description, category, modules)
+            try:
+                more, complete = self._parse_response(self._complete(continuation, 'continuation'))
+            except Exception as e:
+                self._continuation_failed(e, modules)
+                break
+            for module in more:
+                modules.append(module)
+                yield module
+
+        if not complete and not modules:
+            raise Exception("Failed to generate course: response ended before any module was complete")
+        self._finish_course(modules, salvaged, complete, continuations)
+
     def _build_course_prompt(self, title, description, category):
         prompt = f"""
 You are an expert curriculum designer. Generate a comprehensive, structured course roadmap for the following course:
@@ -60,40 +371,221 @@ Please create a detailed course with:
 """
         return prompt
 
+    def _build_outline_prompt(self, title, description, category):
+        return f"""
+You are an expert curriculum designer. Generate the outline of a course roadmap for the following course:
+
+**Title:** {title}
+**Category:** {category}
+**Description:** {description}
+
+Please create an outline with:
+- 6-8 modules (main topics)
+- Each module should have 3-5 subtopics (lessons)
+- Each subtopic must include a video_url: a descriptive search term like "python basics tutorial". Format: "search:descriptive search term"
+- Do NOT write any lesson content yet
+
+**IMPORTANT:** Return ONLY valid JSON in this exact format, with no additional text before or after:
+
+{{
+  "modules": [
+    {{
+      "title": "Module Title",
+      "subtopics": [
+        {{
+          "title": "Subtopic Title",
+          "video_url": "search:python tutorial for beginners"
+        }}
+      ]
+    }}
+  ]
+}}
+"""
+
+    def _format_outline(self, outline):
+        return '\n'.join(
+            f"- {module['title']}: " + ', '.join(subtopic['title'] for subtopic in module['subtopics'])
+            for module in outline['modules']
+        )
+
+    def _build_module_prompt(self, title, description, category, outline, module):
+        course_outline = self._format_outline(outline)
+        lessons = '\n'.join(f"{index + 1}. {subtopic['title']}" for index, subtopic in enumerate(module['subtopics']))
+        return f"""
+You are an expert curriculum designer writing one module of the following course:
+
+**Title:** {title}
+**Category:** {category}
+**Description:** {description}
+
+**Course outline:**
+{course_outline}
+
+Write the lessons of the module **{module['title']}**, in this order:
+{lessons}
+
+For each lesson write a 2-3 paragraph explanation of the topic (informative and beginner-friendly) that does not repeat material covered by other modules.
+
+**IMPORTANT:** Return ONLY valid JSON in this exact format, with one entry per lesson in the same order, with no additional text before or after:
+
+{{
+  "subtopics": [
+    {{
+      "title": "Subtopic Title",
+      "content": "Detailed explanation in 2-3 paragraphs..."
+    }}
+  ]
+}}
+
+Ensure all text content uses proper escaping for JSON (use \\n for newlines, escape quotes with \\")
+"""
+
+    def _build_module_regeneration_prompt(self, title, description, category, outline, module_index,
+                                          instructions):
+        module = outline['modules'][module_index]
+        return f"""
+You are an expert curriculum designer improving one module of the following course:
+
+**Title:** {title}
+**Category:** {category}
+**Description:** {description}
+
+**Course outline:**
+{self._format_outline(outline)}
+
+Rewrite module {module_index + 1}, **{module['title']}**, as a better module covering the same part of the course. It should have 3-5 subtopics that do not repeat material covered by the other modules.
+{self._feedback(instructions)}
+Each subtopic must include:
+1. A video_url: a descriptive search term, formatted as "search:descriptive search term" - DO NOT use actual YouTube URLs
+2. A 2-3 paragraph explanation of the topic (informative and beginner-friendly)
+
+**IMPORTANT:** Return ONLY valid JSON in this exact format, with no additional text before or after:
+
+{{
+  "title": "Module Title",
+  "subtopics": [
+    {{
+      "title": "Subtopic Title",
+      "video_url": "search:python tutorial for beginners",
+      "content": "Detailed explanation in 2-3 paragraphs..."
+    }}
+  ]
+}}
+
+Ensure all text content uses proper escaping for JSON (use \\n for newlines, escape quotes with \\")
+"""
+
+    def _build_subtopic_regeneration_prompt(self, title, description, category, outline, module_index,
+                                            subtopic_index, instructions):
+        module = outline['modules'][module_index]
+        lessons = '\n'.join(
+            f"{index + 1}. {subtopic['title']}" + ('  <- rewrite this lesson' if index == subtopic_index else '')
+            for index, subtopic in enumerate(module['subtopics'])
+        )
+        return f"""
+You are an expert curriculum designer improving one lesson of the following course:
+
+**Title:** {title}
+**Category:** {category}
+**Description:** {description}
+
+**Course outline:**
+{self._format_outline(outline)}
+
+The lesson is part of module **{module['title']}**:
+{lessons}
+
+Rewrite lesson {subtopic_index + 1}, **{module['subtopics'][subtopic_index]['title']}**, with a clearer 2-3 paragraph explanation (informative and beginner-friendly) that fits between the lessons around it, and a descriptive video search term formatted as "search:descriptive search term".
+{self._feedback(instructions)}
+**IMPORTANT:** Return ONLY valid JSON in this exact format, with no additional text before or after:
+
+{{
+  "title": "Subtopic Title",
+  "video_url": "search:python tutorial for beginners",
+  "content": "Detailed explanation in 2-3 paragraphs..."
+}}
+
+Ensure all text content uses proper escaping for JSON (use \\n for newlines, escape quotes with \\")
+"""
+
+    def _feedback(self, instructions):
+        return f"Learner feedback to address: {instructions}\n" if instructions else ''
+
+    def _parse_outline(self, response_text):
+        result = outline_parser.parse(response_text)
+        if not result.data.get('modules'):
+            raise ValueError("Outline has no complete modules")
+        self._record_parse(result, 'outline')
+        return result.data
+
+    def _parse_module_content(self, response_text, module):
+        """Returns the lesson bodies of one module, in outline order."""
+        result = lessons_parser.parse(response_text)
+        subtopics = result.data.get('subtopics') or []
+        if len(subtopics) != len(module['subtopics']):
+            raise ValueError(f"Module '{module['title']}' content does not match its outline")
+        self._record_parse(result, 'module')
+        return [subtopic['content'] for subtopic in subtopics]
+
     def _parse_response(self, response_text):
+        """
+        Parses and validates a course response in one pass. Defects are
+        repaired; returns (modules, complete), where complete is False if the
+        response was cut off or broke before the course was closed.
+        """
         try:
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith('```'):
-                json_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', cleaned_text, re.DOTALL)
-                if json_match:
-                    cleaned_text = json_match.group(1)
-                else:
-                    lines = cleaned_text.split('\n')
-                    if lines[0].startswith('```'):
-                        lines = lines[1:]
-                    if lines[-1].startswith('```'):
-                        lines = lines[:-1]
-                    cleaned_text = '\n'.join(lines)
-
-            cleaned_text = cleaned_text.replace('\r', '')
-            cleaned_text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', cleaned_text)
-            course_data = json.loads(cleaned_text, strict=False)
-
-            if 'modules' not in course_data:
-                raise ValueError("Response missing 'modules' key")
-
-            for module in course_data['modules']:
-                if 'title' not in module or 'subtopics' not in module:
-                    raise ValueError("Module missing required fields")
-                for subtopic in module['subtopics']:
-                    if not all(key in subtopic for key in ['title', 'video_url', 'content']):
-                        raise ValueError("Subtopic missing required fields")
-
-            return course_data
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse JSON from Gemini response: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Error processing Gemini response: {str(e)}")
+            result = course_parser.parse(response_text)
+        except ModelJSONError as e:
+            logger.warning(f"Failed to parse JSON from Gemini response: {str(e)}")
+            return [], False
+        self._record_parse(result, 'course')
+        modules = result.data.get('modules')
+        return (modules if isinstance(modules, list) else []), result.complete
+
+    def _build_continuation_prompt(self, title, description, category, modules):
+        written = '\n'.join(f"{index + 1}. {module['title']}" for index, module in enumerate(modules))
+        return f"""
+You are an expert curriculum designer. You were generating a course roadmap for the following course, but the response was cut off:
+
+**Title:** {title}
+**Category:** {category}
+**Description:** {description}
+
+These modules are already complete:
+{written or '(none)'}
+
+Continue the course: write ONLY the remaining modules, so that the whole course has 6-8 modules. Each module should have 3-5 subtopics, and each subtopic a "search:descriptive search term" video_url and a 2-3 paragraph explanation. Do not repeat the modules above. If the course is already complete, return an empty "modules" list.
+
+**IMPORTANT:** Return ONLY valid JSON in this exact format, with no additional text before or after:
+
+{{
+  "modules": [
+    {{
+      "title": "Module Title",
+      "subtopics": [
+        {{
+          "title": "Subtopic Title",
+          "video_url": "search:python tutorial for beginners",
+          "content": "Detailed explanation in 2-3 paragraphs..."
+        }}
+      ]
+    }}
+  ]
+}}
+
+Ensure all text content uses proper escaping for JSON (use \\n for newlines, escape quotes with \\")
+"""
+
+    def _record_parse(self, result, kind):
+        if not result.repaired:
+            return
+        metrics.incr(f'gemini.{kind}_responses_repaired')
+        if not result.complete:
+            metrics.incr(f'gemini.{kind}_responses_truncated')
+        logger.warning(
+            f"Repaired Gemini {kind} response ({'complete' if result.complete else 'truncated'}): "
+            f"{'; '.join(result.repairs[:5] + ([result.error] if result.error else [])) or 'no other repairs'}"
+        )
 
 
-gemini_service = GeminiService()
+gemini_service = services.lazy('gemini')
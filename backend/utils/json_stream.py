@@ -0,0 +1,57 @@
+import re
+
+from .model_json import WHITESPACE, course_parser, validate_module
+
+MODULES_ARRAY_RE = re.compile(r'"modules"\s*:\s*\[')
+
+
+class ModuleStreamParser:
+    """
+    Incrementally extracts module objects from a streamed
+    {"modules": [...]} response. Each call to feed() returns the modules whose
+    JSON object was completed by the new chunk. Modules are parsed and
+    repaired by the tolerant course parser in utils/model_json.py; invalid
+    ones are dropped, and a defect it cannot repair raises ModelJSONError.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.done = False
+        self.repairs = []
+        self._pos = None
+
+    def feed(self, text):
+        self.buffer += text
+        modules = []
+
+        if self._pos is None:
+            match = MODULES_ARRAY_RE.search(self.buffer)
+            if not match:
+                return modules
+            self._pos = match.end()
+        elif '}' not in text and ']' not in text:
+            # Nothing can have been completed by this chunk.
+            return modules
+
+        while not self.done:
+            while self._pos < len(self.buffer) and self.buffer[self._pos] in WHITESPACE + ',':
+                self._pos += 1
+            char = self.buffer[self._pos:self._pos + 1]
+            if not char:
+                break
+            if char == ']':
+                self.done = True
+                break
+
+            parsed = course_parser.parse_value(self.buffer, self._pos)
+            if parsed is None:
+                break
+            module, self._pos, repairs = parsed
+            self.repairs.extend(repairs)
+            error = validate_module(module)
+            if error:
+                self.repairs.append(f"dropped invalid modules item: {error}")
+            else:
+                modules.append(module)
+
+        return modules
@@ -0,0 +1,174 @@
+"""
+Managed Redis client shared by the caches, queues and limiters (as
+utils.redis_client.redis_client).
+
+A ManagedRedis is truthy while Redis is reachable and falsy while it is not,
+so callers keep their `if redis_client:` fallbacks, and caching comes back on
+its own when Redis does:
+
+- nothing connects at import; the first truth test pings Redis;
+- a background thread pings every REDIS_HEALTH_CHECK_INTERVAL seconds and
+  flips availability either way;
+- a command that fails with a connection error marks Redis down at once;
+- connections come from a pool of REDIS_MAX_CONNECTIONS; callers wait up to
+  REDIS_POOL_TIMEOUT for a free one rather than opening more.
+
+Commands are proxied to a redis.Redis client. pipeline() and script() return
+pipelines and Lua scripts whose failures are tracked the same way, and
+stats() reports availability, pool usage and error counters.
+"""
+import logging
+import os
+import threading
+import time
+
+import redis
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(redis.ConnectionError):
+    """No pooled connection became free in time; Redis itself may be fine."""
+
+
+class InstrumentedPool(redis.BlockingConnectionPool):
+    def get_connection(self, command_name, *keys, **options):
+        started = time.monotonic()
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except redis.ConnectionError as e:
+            if str(e) == "No connection available.":
+                metrics.incr('redis.pool_exhausted')
+                raise PoolExhausted(f"No Redis connection free after {self.timeout}s") from e
+            raise
+        metrics.observe('redis.pool_wait', time.monotonic() - started)
+        return connection
+
+    def usage(self):
+        created = len(self._connections)
+        idle = sum(1 for connection in list(self.pool.queue) if connection is not None)
+        return {'max': self.max_connections, 'created': created, 'in_use': created - idle, 'idle': idle}
+
+
+class _Guarded:
+    """Proxy that marks Redis down when a call on the wrapped object fails to connect."""
+
+    def __init__(self, manager, target):
+        self._manager = manager
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        return self._manager._guard(attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._manager._guard(self._target)(*args, **kwargs)
+
+
+class ManagedRedis:
+    def __init__(self, url, max_connections=50, pool_timeout=2, socket_timeout=2,
+                 health_check_interval=5):
+        self.url = url
+        self.health_check_interval = health_check_interval
+        self.pool = InstrumentedPool.from_url(
+            url,
+            max_connections=max_connections,
+            timeout=pool_timeout,
+            decode_responses=True,
+            socket_connect_timeout=socket_timeout,
+            socket_timeout=socket_timeout
+        )
+        self.client = redis.Redis(connection_pool=self.pool)
+        self._available = None
+        self._scripts = {}
+        self._monitor_pid = None
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(('checks', 'check_failures', 'marked_down', 'reconnects'), 0)
+
+    def __bool__(self):
+        self._ensure_monitor()
+        if self._available is None:
+            self.check()
+        return self._available
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+        return self._guard(attr)
+
+    def pipeline(self, transaction=True):
+        return _Guarded(self, self.client.pipeline(transaction=transaction))
+
+    def script(self, source):
+        """Returns a callable Lua script, loaded once and run with EVALSHA."""
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = _Guarded(self, self.client.register_script(source))
+        return script
+
+    def check(self):
+        """Pings Redis and updates availability; returns it."""
+        with self._lock:
+            self._counters['checks'] += 1
+        try:
+            self.client.ping()
+        except Exception as e:
+            with self._lock:
+                self._counters['check_failures'] += 1
+            self._set_available(False, e)
+            return False
+        self._set_available(True)
+        return True
+
+    def _set_available(self, available, error=None):
+        with self._lock:
+            previous = self._available
+            self._available = available
+            if available and previous is False:
+                self._counters['reconnects'] += 1
+            if not available and previous is not False:
+                self._counters['marked_down'] += 1
+        if available and not previous:
+            logger.info("Redis connected successfully.")
+        elif not available and previous is not False:
+            logger.warning(f"Redis not available: {error}. Caching disabled until it recovers.")
+            # Drop sockets to the old server so recovery starts from fresh connections.
+            self.pool.disconnect()
+
+    def _guard(self, fn):
+        def call(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except PoolExhausted:
+                raise
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                self._set_available(False, e)
+                raise
+        return call
+
+    def _ensure_monitor(self):
+        # Threads do not survive fork, so each worker process starts its own.
+        if self._monitor_pid == os.getpid() or not self.health_check_interval:
+            return
+        with self._lock:
+            if self._monitor_pid == os.getpid():
+                return
+            self._monitor_pid = os.getpid()
+        threading.Thread(target=self._monitor, name='redis-health-check', daemon=True).start()
+
+    def _monitor(self):
+        while True:
+            time.sleep(self.health_check_interval)
+            self.check()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['available'] = self._available
+        stats['pool'] = self.pool.usage()
+        return stats
@@ -0,0 +1,59 @@
+import threading
+from collections import deque
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of sorted samples, or None when there are none."""
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(round(percent / 100 * (len(samples) - 1))))]
+
+
+class Metrics:
+    """
+    Lightweight in-process counters and timing samples.
+    Timings keep a bounded window of recent samples for percentile reporting.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._counters = {}
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        with self._lock:
+            samples = self._timings.get(name)
+            if samples is None:
+                samples = self._timings[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, name, percent):
+        with self._lock:
+            samples = sorted(self._timings.get(name, ()))
+        return percentile(samples, percent)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {name: sorted(samples) for name, samples in self._timings.items()}
+
+        summary = {}
+        for name, samples in timings.items():
+            if not samples:
+                continue
+            summary[name] = {
+                'count': len(samples),
+                'avg': round(sum(samples) / len(samples), 4),
+                'p50': round(percentile(samples, 50), 4),
+                'p95': round(percentile(samples, 95), 4),
+                'max': round(samples[-1], 4),
+            }
+        return {'counters': counters, 'timings': summary}
+
+
+metrics = Metrics()
@@ -0,0 +1,312 @@
+"""
+Tolerant single-pass JSON parser for model output.
+
+Model responses are JSON wrapped in prose or code fences, and now and then
+broken: raw newlines or quotes inside strings, trailing or missing commas,
+or a response cut off mid-object. The parser reads the first JSON object
+in the text in one pass, repairs those defects as it meets them, and
+validates array items as soon as each one is complete, dropping invalid
+items instead of rejecting the whole response. When the text ends early or
+hits a defect it cannot repair, everything completed before that point is
+kept and the unfinished items are dropped.
+"""
+import re
+from json import JSONDecodeError
+from json.decoder import scanstring
+from json.scanner import NUMBER_RE
+
+WHITESPACE = ' \t\n\r'
+WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+# A plain key and its colon, the common case that needs no repairs.
+SIMPLE_KEY_RE = re.compile(r'"([^"\\\x00-\x1f]*)"[ \t\n\r]*:[ \t\n\r]*')
+CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0B-\x1F\x7F]')
+LITERALS = {'true': True, 'false': False, 'null': None}
+VALUE_START = '{["-0123456789tfn'
+HEX_DIGITS = '0123456789abcdefABCDEF'
+# What may follow the closing quote of a key, an object value and an array item.
+KEY_END_RE = re.compile(r'\s*:')
+OBJECT_VALUE_END_RE = re.compile(r'\s*(?:,?\s*"(?:[^"\\\n]|\\.)*"\s*:|,\s*[,}]|}\s*(?:[,{}\]`]|$)|$)')
+ARRAY_ITEM_END_RE = re.compile(r'\s*(?:,\s*[\[{"\-0-9tfn,\]]|\]|$)')
+
+
+class ModelJSONError(ValueError):
+    pass
+
+
+class _Stopped(Exception):
+    """
+    Raised when parsing stops inside a value, at the end of the text or at an
+    unrecoverable defect (`error`); carries what was completed.
+    """
+
+    def __init__(self, partial=None, error=None):
+        self.partial = partial
+        self.error = error
+
+
+class ParseResult:
+    def __init__(self, data, complete, repairs, error=None):
+        self.data = data
+        # False when parsing stopped before the top-level object was closed.
+        self.complete = complete
+        self.repairs = repairs
+        # Why parsing stopped early, if not at the end of the text.
+        self.error = error
+
+    @property
+    def repaired(self):
+        return bool(self.repairs) or not self.complete
+
+
+class ModelJSONParser:
+    """
+    `validators` maps an array key to a function that checks one item of
+    that array and returns an error message, or None if the item is valid.
+    """
+
+    def __init__(self, validators=None):
+        self.validators = validators or {}
+
+    def parse(self, text):
+        start = text.find('{')
+        if start == -1:
+            raise ModelJSONError("No JSON object in model output")
+
+        scanner = _Scanner(text, self.validators)
+        try:
+            data, _ = scanner._object(start + 1)
+        except _Stopped as e:
+            return ParseResult(e.partial or {}, False, scanner._repairs, e.error)
+        return ParseResult(data, True, scanner._repairs)
+
+    def parse_value(self, text, pos):
+        """
+        Parses the single value starting at `pos`, e.g. one item of an array
+        that is still being streamed. Returns (value, end, repairs), or None
+        if the text ends before the value does; raises ModelJSONError at a
+        defect it cannot repair.
+        """
+        scanner = _Scanner(text, self.validators)
+        try:
+            value, end = scanner._value(pos)
+        except _Stopped as e:
+            if e.error:
+                raise ModelJSONError(e.error)
+            return None
+        return value, end, scanner._repairs
+
+
+class _Scanner:
+    """State of one parse, so a parser can be shared between threads."""
+
+    def __init__(self, text, validators):
+        self._text = text
+        self.validators = validators
+        self._repairs = []
+
+    def _skip(self, pos):
+        return WHITESPACE_RE.match(self._text, pos).end()
+
+    def _peek(self, pos):
+        char = self._text[pos:pos + 1]
+        if char and char in WHITESPACE:
+            pos = self._skip(pos)
+            char = self._text[pos:pos + 1]
+        return pos, char
+
+    def _value(self, pos, key=None, in_object=False):
+        char = self._text[pos:pos + 1]
+        if char == '"':
+            return self._string(pos + 1, OBJECT_VALUE_END_RE if in_object else ARRAY_ITEM_END_RE)
+        if char == '{':
+            return self._object(pos + 1)
+        if char == '[':
+            return self._array(pos + 1, key)
+        if not char:
+            raise _Stopped()
+
+        match = NUMBER_RE.match(self._text, pos)
+        if match:
+            integer, fraction, exponent = match.groups()
+            if fraction or exponent:
+                return float(integer + (fraction or '') + (exponent or '')), match.end()
+            return int(integer), match.end()
+        for literal, value in LITERALS.items():
+            if self._text.startswith(literal, pos):
+                return value, pos + len(literal)
+        if any(literal.startswith(self._text[pos:]) for literal in LITERALS):
+            raise _Stopped()
+        raise _Stopped(error=f"Unexpected {char!r} at char {pos}")
+
+    def _object(self, pos):
+        result = {}
+        while True:
+            pos, char = self._peek(pos)
+            if char == '}':
+                return result, pos + 1
+            if char == ',':
+                self._repairs.append(f"extra comma at char {pos}")
+                pos += 1
+                continue
+            if char != '"':
+                if not char:
+                    raise _Stopped(result)
+                raise _Stopped(result, f"Expected a key at char {pos}")
+
+            key = None
+            try:
+                match = SIMPLE_KEY_RE.match(self._text, pos)
+                if match:
+                    key, pos = match.group(1), match.end()
+                else:
+                    key, pos = self._string(pos + 1, KEY_END_RE)
+                    pos, char = self._peek(pos)
+                    if char != ':':
+                        if not char:
+                            raise _Stopped()
+                        raise _Stopped(error=f"Expected ':' at char {pos}")
+                    pos = self._skip(pos + 1)
+                value, pos = self._value(pos, key, in_object=True)
+            except _Stopped as e:
+                # Keep the completed items of a cut-off array, e.g. "modules".
+                if key is not None and isinstance(e.partial, list):
+                    result[key] = e.partial
+                raise _Stopped(result, e.error)
+            result[key] = value
+
+            pos, char = self._peek(pos)
+            if char == ',':
+                pos += 1
+            elif char == '"':
+                self._repairs.append(f"missing comma at char {pos}")
+            elif char != '}':
+                if not char:
+                    raise _Stopped(result)
+                raise _Stopped(result, f"Expected ',' or '}}' at char {pos}")
+
+    def _array(self, pos, key):
+        result = []
+        validate = self.validators.get(key)
+        while True:
+            pos, char = self._peek(pos)
+            if char == ']':
+                return result, pos + 1
+            if char == ',':
+                self._repairs.append(f"extra comma at char {pos}")
+                pos += 1
+                continue
+
+            try:
+                item, pos = self._value(pos)
+            except _Stopped as e:
+                raise _Stopped(result, e.error)
+            error = validate(item) if validate else None
+            if error:
+                self._repairs.append(f"dropped invalid {key} item: {error}")
+            else:
+                result.append(item)
+
+            pos, char = self._peek(pos)
+            if char == ',':
+                pos += 1
+            elif char and char in VALUE_START + '"':
+                self._repairs.append(f"missing comma at char {pos}")
+            elif char != ']':
+                if not char:
+                    raise _Stopped(result)
+                raise _Stopped(result, f"Expected ',' or ']' at char {pos}")
+
+    def _string(self, pos, follows):
+        """
+        Decodes a string whose opening quote ends at `pos`. A quote is taken as
+        the closing one only when what follows could come after the string;
+        otherwise it is kept as an unescaped quote inside the string.
+        """
+        parts = []
+        # Strict decoding rejects raw control characters, so a clean string
+        # needs no separate scan for them.
+        strict = True
+        while True:
+            try:
+                chunk, end = scanstring(self._text, pos, strict)
+            except JSONDecodeError as e:
+                if e.msg.startswith('Unterminated'):
+                    raise _Stopped()
+                if e.msg.startswith('Invalid control character'):
+                    strict = False
+                    continue
+                if e.msg.startswith('Invalid \\uXXXX'):
+                    # e.pos is at the 'u'. Fewer than four hex digits before
+                    # the end of the text is a cut-off escape, not a defect.
+                    digits = self._text[e.pos + 1:e.pos + 5]
+                    if len(digits) < 4 and all(char in HEX_DIGITS for char in digits):
+                        raise _Stopped()
+                    raise _Stopped(error=f"Invalid \\u escape at char {e.pos - 1}")
+                # Invalid escape such as \' or \x: keep the escaped character as-is.
+                end = e.pos + 2
+                if end > len(self._text):
+                    raise _Stopped()
+                strict = False
+                try:
+                    parts.append(scanstring(self._text[pos:e.pos] + '"', 0, False)[0])
+                except JSONDecodeError as error:
+                    raise _Stopped(error=f"Undecodable string at char {pos}: {error.msg}")
+                parts.append(self._text[e.pos + 1])
+                self._repairs.append(f"invalid escape at char {e.pos}")
+                pos = end
+                continue
+
+            parts.append(chunk)
+            if follows.match(self._text, end):
+                break
+            self._repairs.append(f"unescaped quote at char {end - 1}")
+            parts.append('"')
+            pos = end
+
+        value = ''.join(parts)
+        if not strict:
+            value = CONTROL_CHARS_RE.sub('', value)
+        return value, end
+
+
+def _check_fields(item, fields, name):
+    if not isinstance(item, dict):
+        return f"{name} is not an object"
+    for field in fields:
+        if not isinstance(item.get(field), str):
+            return f"{name} missing {field}"
+    return None
+
+
+def validate_subtopic(subtopic):
+    return _check_fields(subtopic, ('title', 'video_url', 'content'), 'subtopic')
+
+
+def validate_module(module):
+    error = _check_fields(module, ('title',), 'module')
+    if error:
+        return error
+    if not isinstance(module.get('subtopics'), list) or not module['subtopics']:
+        return f"module '{module['title']}' has no subtopics"
+    return None
+
+
+def validate_outline_subtopic(subtopic):
+    return _check_fields(subtopic, ('title', 'video_url'), 'subtopic')
+
+
+def validate_lesson(subtopic):
+    return _check_fields(subtopic, ('content',), 'subtopic')
+
+
+course_parser = ModelJSONParser({'modules': validate_module, 'subtopics': validate_subtopic})
+outline_parser = ModelJSONParser({'modules': validate_module, 'subtopics': validate_outline_subtopic})
+lessons_parser = ModelJSONParser({'subtopics': validate_lesson})
+
+
+def parse_course(text):
+    """Parses a {"modules": [...]} course response; raises ModelJSONError if no module survives."""
+    result = course_parser.parse(text)
+    if not isinstance(result.data.get('modules'), list) or not result.data['modules']:
+        raise ModelJSONError("Model output has no complete modules")
+    return result
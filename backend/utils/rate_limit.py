@@ -0,0 +1,171 @@
+"""
+Token-bucket rate limiting shared by all workers through Redis.
+
+A request names one or more buckets (e.g. its demo id and its client IP) and
+is allowed only if every bucket has a token left; the tokens are then taken
+from all of them at once. The check runs as a single Lua script, so it costs
+one round trip and concurrent workers cannot both spend the last token. When
+Redis is unavailable each process falls back to its own in-memory buckets.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from .async_clients import get_async_redis
+from .metrics import metrics
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS: bucket keys; ARGV: cost, then capacity and refill rate (tokens per
+# second) for each key. Takes `cost` tokens from every bucket, or from none,
+# and returns 0 when allowed, otherwise the milliseconds until it would be.
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1]) / 1000
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = capacity
+    if bucket[1] then
+        available = math.min(capacity, tonumber(bucket[1]) + math.max(0, now - tonumber(bucket[2])) * rate)
+    end
+    tokens[i] = available
+    if available < cost then
+        wait = math.max(wait, math.ceil((cost - available) / rate))
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1]) / 1000
+    redis.call('HSET', key, 'tokens', tokens[i] - cost, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate))
+end
+return 0
+"""
+
+
+class Limit:
+    """A bucket holding up to `capacity` tokens, refilled at `rate` tokens per second."""
+
+    __slots__ = ('capacity', 'rate')
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+
+    def __repr__(self):
+        return f"Limit(capacity={self.capacity}, rate={self.rate:.6g})"
+
+
+def parse_rate(rate):
+    """
+    Parses a DRF-style rate such as '10/hour': a burst of 10 requests, with
+    the bucket refilling completely over an hour.
+    """
+    count, period = rate.split('/')
+    count = int(count)
+    return Limit(count, count / PERIODS[period.strip()[0]])
+
+
+class LocalBuckets:
+    """In-process token buckets, used while Redis is unavailable. LRU-bounded."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            available = []
+            wait = 0.0
+            for key, limit in buckets:
+                state = self._buckets.get(key)
+                tokens = limit.capacity
+                if state is not None:
+                    tokens = min(limit.capacity, state[0] + (now - state[1]) * limit.rate)
+                available.append(tokens)
+                if tokens < cost:
+                    wait = max(wait, (cost - tokens) / limit.rate)
+            if wait:
+                return wait
+
+            for (key, _), tokens in zip(buckets, available):
+                self._buckets[key] = (tokens - cost, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RateLimiter:
+    """
+    `check()` takes a list of (key, Limit) pairs and returns 0 when the
+    request is allowed, otherwise the seconds to wait before retrying.
+    """
+
+    def __init__(self, prefix='ratelimit:', local_max_keys=10000):
+        self.prefix = prefix
+        self.local = LocalBuckets(local_max_keys)
+
+    def _arguments(self, buckets, cost):
+        keys = [f"{self.prefix}{key}" for key, _ in buckets]
+        args = [cost]
+        for _, limit in buckets:
+            args.extend((limit.capacity, limit.rate))
+        return keys, args
+
+    def _result(self, wait, buckets):
+        if wait:
+            metrics.incr('ratelimit.rejected')
+            logger.info(f"Rate limited {[key for key, _ in buckets]} for {wait:.1f}s")
+        return wait
+
+    def check(self, buckets, cost=1):
+        if redis_client:
+            keys, args = self._arguments(buckets, cost)
+            try:
+                wait = redis_client.script(TOKEN_BUCKET_SCRIPT)(keys=keys, args=args)
+                return self._result(wait / 1000, buckets)
+            except Exception as e:
+                logger.warning(f"Rate limiter Redis error, using local buckets: {e}")
+                metrics.incr('ratelimit.local_fallbacks')
+        return self._result(self.local.take(buckets, cost), buckets)
+
+    async def check_async(self, buckets, cost=1):
+        """asyncio version of check()."""
+        redis = get_async_redis()
+        if redis:
+            keys, args = self._arguments(buckets, cost)
+            try:
+                wait = await redis.register_script(TOKEN_BUCKET_SCRIPT)(keys=keys, args=args)
+                return self._result(wait / 1000, buckets)
+            except Exception as e:
+                logger.warning(f"Rate limiter Redis error, using local buckets: {e}")
+                metrics.incr('ratelimit.local_fallbacks')
+        return self._result(self.local.take(buckets, cost), buckets)
+
+
+def retry_after(wait):
+    """Value of the Retry-After header for a wait in seconds."""
+    return str(max(1, math.ceil(wait)))
+
+
+rate_limiter = RateLimiter()
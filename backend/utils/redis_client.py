@@ -1,27 +1,22 @@
-import redis
-import logging
+"""
+The Redis client shared by the caches, queues and limiters: a
+utils.managed_redis.ManagedRedis, built on first use through utils.services so
+that importing this module neither imports redis-py nor connects.
+"""
 from django.conf import settings
 
-logger = logging.getLogger(__name__)
+from .services import services
 
-def get_redis_client():
-    try:
-        client = redis.from_url(
-            settings.REDIS_URL,
-            decode_responses=True,
-            socket_connect_timeout=2,
-            socket_timeout=2
-        )
-        client.ping()
-        logger.info("Redis connected successfully.")
-        return client
-    except (redis.ConnectionError, redis.TimeoutError) as e:
-        logger.warning(f"Redis not available: {e}. Caching disabled.")
-        return None
-    except Exception as e:
-        logger.error(f"Redis error: {e}")
-        return None
 
+def create_redis_client():
+    from .managed_redis import ManagedRedis
+    return ManagedRedis(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        pool_timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
+    )
 
-redis_client = get_redis_client()
 
+redis_client = services.lazy('redis')
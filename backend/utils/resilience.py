@@ -0,0 +1,350 @@
+"""
+Resilience layer for outbound calls (Gemini, YouTube).
+
+Each Dependency wraps its calls with:
+- a circuit breaker that fails fast after repeated transient failures and
+  lets a single probe through once `reset_timeout` has passed;
+- timeouts adapted from the observed latency of successful calls (p99 times
+  a multiplier, clamped between `min_timeout` and `max_timeout`), tracked per
+  operation since e.g. a whole course takes far longer than one module;
+- retries with full-jitter exponential backoff for transient errors;
+- optionally, a hedged second request once the first has been running
+  longer than the operation's p95; whichever answers first wins.
+
+Calls are functions taking the attempt's timeout in seconds. Clients that
+cannot take a timeout (the Gemini SDK) use `thread_timeouts`: the attempt
+runs on the dependency's pool and is abandoned when its timeout passes.
+An abandoned call keeps its pool thread until it returns, so the pool
+(`max_workers`) can fill up when calls hang; hedges are only sent while a
+thread is free, and attempts queued behind a full pool time out and count
+against the breaker like any other timeout.
+State is per process; stats() and dependency_stats() expose it.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+_registry = {}
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class DependencyTimeout(TimeoutError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. While open, calls
+    are rejected until `reset_timeout` has passed; then one probe call is let
+    through (half-open), which closes the circuit on success or reopens it.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Raises CircuitOpen unless a call may go ahead."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpen(f"{self.name} circuit is open")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"{self.name} circuit opened after {self.failures} failure(s)")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+            }
+
+
+class LatencyTracker:
+    """A bounded window of recent successful call latencies."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, percent):
+        with self._lock:
+            samples = sorted(self._samples)
+        return percentile(samples, percent)
+
+
+class Dependency:
+    def __init__(self, name, max_timeout, min_timeout=1.0, timeout_multiplier=3.0, min_samples=20,
+                 retries=2, backoff_base=0.2, backoff_cap=5.0, hedge=False, transient=None,
+                 failure_threshold=5, reset_timeout=30, thread_timeouts=False, max_workers=32):
+        self.name = name
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge = hedge
+        # Whether an error means the dependency is unhealthy: only those are
+        # retried and counted by the breaker. Defaults to every error.
+        self.transient = transient or (lambda error: True)
+        self.thread_timeouts = thread_timeouts
+        self.max_workers = max_workers
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self._latency = {}
+        self._counters = dict.fromkeys(
+            ('calls', 'successes', 'failures', 'timeouts', 'rejected', 'retries', 'hedges', 'hedge_wins'), 0
+        )
+        self._executor = None
+        self._running = 0
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def timeout(self, operation='default'):
+        tracker = self._tracker(operation)
+        if len(tracker) < self.min_samples:
+            return self.max_timeout
+        adaptive = tracker.percentile(99) * self.timeout_multiplier
+        return min(self.max_timeout, max(self.min_timeout, adaptive))
+
+    def hedge_delay(self, operation='default'):
+        """Seconds after which a hedged request is sent, or None when not hedging."""
+        tracker = self._tracker(operation)
+        if not self.hedge or len(tracker) < self.min_samples:
+            return None
+        return tracker.percentile(95)
+
+    def call(self, fn, operation='default'):
+        """Calls fn(timeout) under the breaker, retrying transient failures."""
+        for attempt in range(self.retries + 1):
+            timeout, started = self._begin(operation)
+            try:
+                result = self._attempt(fn, timeout, self.hedge_delay(operation))
+            except Exception as e:
+                if not self._failed(e, attempt):
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            self._succeeded(operation, started)
+            return result
+
+    async def call_async(self, fn, operation='default'):
+        """asyncio version of call(); fn(timeout) returns an awaitable."""
+        for attempt in range(self.retries + 1):
+            timeout, started = self._begin(operation)
+            try:
+                result = await self._attempt_async(fn, timeout, self.hedge_delay(operation))
+            except Exception as e:
+                if not self._failed(e, attempt):
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self._succeeded(operation, started)
+            return result
+
+    def _begin(self, operation):
+        try:
+            self.breaker.acquire()
+        except CircuitOpen:
+            self._count('rejected')
+            raise
+        self._count('calls')
+        return self.timeout(operation), time.monotonic()
+
+    def _succeeded(self, operation, started):
+        self._tracker(operation).add(time.monotonic() - started)
+        self._count('successes')
+        self.breaker.record_success()
+
+    def _failed(self, error, attempt):
+        """Records a failed attempt; returns True if it should be retried."""
+        if isinstance(error, DependencyTimeout):
+            self._count('timeouts')
+        elif not self.transient(error):
+            # The dependency answered; the request itself was bad.
+            self.breaker.record_success()
+            return False
+        self._count('failures')
+        self.breaker.record_failure()
+        if attempt == self.retries:
+            return False
+        self._count('retries')
+        logger.warning(f"{self.name} attempt {attempt + 1} failed, retrying: {error}")
+        return True
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _attempt(self, fn, timeout, hedge_delay):
+        if not (self.thread_timeouts or hedge_delay is not None):
+            return fn(timeout)
+
+        executor = self._get_executor()
+        started = time.monotonic()
+        deadline = started + timeout
+        hedge_at = None if hedge_delay is None else started + hedge_delay
+        primary = self._submit(executor, fn, timeout)
+        pending = {primary}
+        error = None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            until = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = wait(pending, timeout=until - now, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._count('hedge_wins')
+                    return future.result()
+                error = future.exception()
+            if pending and hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                # A hedge queued behind abandoned calls could not win.
+                if self._running < self.max_workers:
+                    self._count('hedges')
+                    pending.add(self._submit(executor, fn, max(0.0, deadline - time.monotonic())))
+        if error is not None and not pending:
+            raise error
+        raise DependencyTimeout(f"{self.name} call timed out after {timeout:.1f}s")
+
+    async def _attempt_async(self, fn, timeout, hedge_delay):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout
+        hedge_at = None if hedge_delay is None else started + hedge_delay
+        primary = asyncio.ensure_future(fn(timeout))
+        pending = {primary}
+        error = None
+        try:
+            while pending:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                until = deadline if hedge_at is None else min(deadline, hedge_at)
+                done, pending = await asyncio.wait(pending, timeout=until - now, return_when=FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._count('hedge_wins')
+                        return task.result()
+                    error = task.exception()
+                if pending and hedge_at is not None and loop.time() >= hedge_at:
+                    hedge_at = None
+                    self._count('hedges')
+                    pending.add(asyncio.ensure_future(fn(max(0.0, deadline - loop.time()))))
+        finally:
+            for task in pending:
+                task.cancel()
+        if error is not None and not pending:
+            raise error
+        raise DependencyTimeout(f"{self.name} call timed out after {timeout:.1f}s")
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=f'{self.name}-call'
+                )
+            return self._executor
+
+    def _submit(self, executor, fn, timeout):
+        with self._lock:
+            self._running += 1
+        future = executor.submit(fn, timeout)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self._running -= 1
+
+    def _tracker(self, operation):
+        tracker = self._latency.get(operation)
+        if tracker is None:
+            with self._lock:
+                tracker = self._latency.setdefault(operation, LatencyTracker())
+        return tracker
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['running'] = self._running
+        stats['breaker'] = self.breaker.stats()
+        stats['operations'] = {}
+        for operation, tracker in list(self._latency.items()):
+            p50, p95, p99 = (tracker.percentile(p) for p in (50, 95, 99))
+            stats['operations'][operation] = {
+                'samples': len(tracker),
+                'p50': p50 and round(p50, 4),
+                'p95': p95 and round(p95, 4),
+                'p99': p99 and round(p99, 4),
+                'timeout': round(self.timeout(operation), 4),
+            }
+        return stats
+
+
+def transient_http_error(error):
+    """Timeouts, connection errors, 429 and 5xx; other HTTP errors are the request's fault."""
+    status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+def dependency_stats():
+    return {name: dependency.stats() for name, dependency in _registry.items()}
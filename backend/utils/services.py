@@ -0,0 +1,179 @@
+"""
+Registry of the process-wide services: MongoDB, Redis, Gemini and YouTube.
+
+Nothing is imported, constructed or connected until first use, so importing
+the app (a worker booting, a management command starting) pays only for
+Django itself. Modules hand out `services.lazy(name)` proxies that build the
+service the first time an attribute is read:
+
+    gemini_service = services.lazy('gemini')
+    gemini_service.generate_course(...)   # constructs GeminiService here
+
+Pre-forked servers can move that cost out of the first request:
+
+- `services.preload()` imports the service modules and their client
+  libraries without constructing anything. It is fork-safe, so it can run in
+  a master process that loads the app before forking (gunicorn --preload).
+- `services.warm_up()` constructs the services and checks their
+  connections. Run it in each worker after the fork (gunicorn post_fork),
+  or set WARM_UP_SERVICES to have core.wsgi / core.asgi run it on load.
+"""
+import importlib
+import logging
+import threading
+import time
+
+from django.utils.module_loading import import_string
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Service:
+    __slots__ = ('name', 'factory', 'modules', 'check', 'instance', 'init_seconds')
+
+    def __init__(self, name, factory, modules=(), check=None):
+        self.name = name
+        self.factory = factory
+        self.modules = modules
+        self.check = check
+        self.instance = None
+        self.init_seconds = None
+
+
+class ServiceRegistry:
+    def __init__(self):
+        self._services = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, factory, modules=(), check=None):
+        """
+        `factory` is a callable or its dotted path, called with no arguments.
+        `modules` are imported by preload(); `check(instance)` is run by
+        warm_up() to open and verify connections.
+        """
+        self._services[name] = Service(name, factory, tuple(modules), check)
+
+    def get(self, name):
+        service = self._services[name]
+        if service.instance is not None:
+            return service.instance
+        with self._lock:
+            if service.instance is None:
+                started = time.perf_counter()
+                factory = service.factory
+                if isinstance(factory, str):
+                    factory = import_string(factory)
+                # A failed construction is not cached; the next use retries it.
+                instance = factory()
+                service.init_seconds = time.perf_counter() - started
+                service.instance = instance
+                metrics.observe(f'services.{name}.init', service.init_seconds)
+                logger.info(f"Initialized {name} service in {service.init_seconds * 1000:.0f} ms")
+        return service.instance
+
+    def lazy(self, name):
+        return LazyService(self, name)
+
+    def initialized(self, name):
+        return self._services[name].instance is not None
+
+    def _names(self, names):
+        if names is None:
+            return list(self._services)
+        if isinstance(names, str):
+            names = names.split(',')
+        return [name.strip() for name in names if name.strip()]
+
+    def preload(self, names=None):
+        """Imports the modules behind `names` (default: all) without constructing anything."""
+        for name in self._names(names):
+            service = self._services[name]
+            for module in service.modules:
+                importlib.import_module(module)
+            if isinstance(service.factory, str):
+                import_string(service.factory)
+
+    def warm_up(self, names=None):
+        """
+        Constructs `names` (default: all) and runs their checks. A service
+        that fails is logged and left to initialize on first use; returns
+        {name: error} for those.
+        """
+        failures = {}
+        for name in self._names(names):
+            try:
+                instance = self.get(name)
+                check = self._services[name].check
+                if check:
+                    check(instance)
+            except Exception as e:
+                metrics.incr('services.warm_up_failures')
+                logger.warning(f"Could not warm up {name} service: {e}")
+                failures[name] = str(e)
+        return failures
+
+    def stats(self):
+        return {
+            name: {'initialized': service.instance is not None, 'init_seconds': service.init_seconds}
+            for name, service in self._services.items()
+        }
+
+
+class LazyService:
+    """Stands in for a registered service, constructing it on first use."""
+
+    __slots__ = ('_registry', '_name')
+
+    def __init__(self, registry, name):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+
+    def _resolve(self):
+        return self._registry.get(self._name)
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._resolve(), name)
+
+    def __bool__(self):
+        return bool(self._resolve())
+
+    def __repr__(self):
+        state = 'initialized' if self._registry.initialized(self._name) else 'not initialized'
+        return f"<LazyService {self._name} ({state})>"
+
+
+def connect_mongo():
+    """Registers and opens mongoengine's default connection to MONGODB_URI."""
+    from django.conf import settings
+    if not settings.MONGODB_URI:
+        raise ValueError("MONGODB_URI is not set in environment variables")
+    import mongoengine
+    return mongoengine.connect(host=settings.MONGODB_URI)
+
+
+def ping_mongo(client):
+    client.admin.command('ping')
+
+
+def ping_redis(client):
+    # Truth-testing pings Redis and starts this process's health-check thread.
+    if not client:
+        raise ConnectionError("Redis did not answer PING")
+
+
+services = ServiceRegistry()
+services.register('mongo', connect_mongo, modules=('mongoengine', 'pymongo'), check=ping_mongo)
+services.register('redis', 'utils.redis_client.create_redis_client', modules=('redis', 'utils.managed_redis'), check=ping_redis)
+services.register(
+    'gemini', 'utils.gemini_service.GeminiService',
+    modules=('google.generativeai', 'google.api_core.exceptions')
+)
+services.register('youtube', 'utils.youtube_service.YouTubeService', modules=('requests',))
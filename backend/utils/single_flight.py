@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from .async_clients import get_async_redis
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Deletes the lock only if it is still held by the caller's token.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Extends the lock only if it is still held by the caller's token.
+RENEW_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Cross-worker request coalescing backed by Redis.
+
+    The first caller for a key takes a short lock, runs the work and publishes
+    the JSON-encoded result. Concurrent callers for the same key wait for that
+    result instead of repeating the work. The leader renews the lock every
+    third of `lock_ttl` for as long as the work runs, so the lock expires only
+    `lock_ttl` after a worker crashes; waiters then take over, as they do if
+    the leader fails. Waiters give up and run the work locally after
+    `wait_timeout` if one is given. Without Redis the work simply runs locally.
+    """
+
+    def __init__(self, prefix="singleflight:", result_ttl=60, poll_interval=0.1):
+        self.prefix = prefix
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+
+    def do(self, key, fn, lock_ttl=30, wait_timeout=None):
+        if not redis_client:
+            return fn()
+
+        lock_key = f"{self.prefix}lock:{key}"
+        result_key = f"{self.prefix}result:{key}"
+        deadline = None if wait_timeout is None else time.monotonic() + wait_timeout
+        token = uuid.uuid4().hex
+
+        while True:
+            try:
+                published = redis_client.get(result_key)
+                if published is not None:
+                    logger.info(f"Single-flight result reused: {key}")
+                    return json.loads(published)
+                acquired = redis_client.set(lock_key, token, nx=True, ex=lock_ttl)
+            except Exception as e:
+                logger.warning(f"Single-flight unavailable for {key}: {e}")
+                return fn()
+
+            if acquired:
+                return self._run_as_leader(key, fn, lock_key, result_key, token, lock_ttl)
+
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"Single-flight wait timed out for {key}, running locally")
+                return fn()
+
+            time.sleep(self.poll_interval)
+
+    def _run_as_leader(self, key, fn, lock_key, result_key, token, lock_ttl):
+        stop = threading.Event()
+        threading.Thread(
+            target=self._renew, args=(key, lock_key, token, lock_ttl, stop),
+            name='single-flight-renew', daemon=True
+        ).start()
+        try:
+            result = fn()
+            try:
+                redis_client.setex(result_key, self.result_ttl, json.dumps(result))
+            except Exception as e:
+                logger.warning(f"Single-flight publish error for {key}: {e}")
+            return result
+        finally:
+            stop.set()
+            try:
+                redis_client.script(RELEASE_LOCK_SCRIPT)(keys=[lock_key], args=[token])
+            except Exception as e:
+                logger.warning(f"Single-flight release error for {key}: {e}")
+
+    def _renew(self, key, lock_key, token, lock_ttl, stop):
+        while not stop.wait(lock_ttl / 3):
+            try:
+                redis_client.script(RENEW_LOCK_SCRIPT)(keys=[lock_key], args=[token, int(lock_ttl * 1000)])
+            except Exception as e:
+                logger.warning(f"Single-flight renew error for {key}: {e}")
+
+    async def _renew_async(self, redis, key, lock_key, token, lock_ttl):
+        while True:
+            await asyncio.sleep(lock_ttl / 3)
+            try:
+                await redis.eval(RENEW_LOCK_SCRIPT, 1, lock_key, token, int(lock_ttl * 1000))
+            except Exception as e:
+                logger.warning(f"Single-flight renew error for {key}: {e}")
+
+    async def do_async(self, key, fn, lock_ttl=30, wait_timeout=None):
+        """asyncio version of do(); `fn` is a zero-argument coroutine function."""
+        redis = get_async_redis()
+        if not redis:
+            return await fn()
+
+        lock_key = f"{self.prefix}lock:{key}"
+        result_key = f"{self.prefix}result:{key}"
+        deadline = None if wait_timeout is None else time.monotonic() + wait_timeout
+        token = uuid.uuid4().hex
+
+        while True:
+            try:
+                published = await redis.get(result_key)
+                if published is not None:
+                    logger.info(f"Single-flight result reused: {key}")
+                    return json.loads(published)
+                acquired = await redis.set(lock_key, token, nx=True, ex=lock_ttl)
+            except Exception as e:
+                logger.warning(f"Single-flight unavailable for {key}: {e}")
+                return await fn()
+
+            if acquired:
+                renewal = asyncio.ensure_future(self._renew_async(redis, key, lock_key, token, lock_ttl))
+                try:
+                    result = await fn()
+                    try:
+                        await redis.setex(result_key, self.result_ttl, json.dumps(result))
+                    except Exception as e:
+                        logger.warning(f"Single-flight publish error for {key}: {e}")
+                    return result
+                finally:
+                    renewal.cancel()
+                    try:
+                        await redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                    except Exception as e:
+                        logger.warning(f"Single-flight release error for {key}: {e}")
+
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"Single-flight wait timed out for {key}, running locally")
+                return await fn()
+
+            await asyncio.sleep(self.poll_interval)
+
+
+single_flight = SingleFlight()
@@ -1,74 +1,293 @@
-import requests
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
 from django.conf import settings
+from .async_clients import get_async_redis, get_http_client
+from .local_cache import LocalCache
 from .redis_client import redis_client
+from .resilience import CircuitOpen, Dependency, transient_http_error
+from .services import services
+from .single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
+# Marker cached for terms YouTube returned nothing for (or failed on),
+# so repeated lookups of a bad term skip the HTTP path for a while.
+NO_RESULT = "__no_result__"
+
 class YouTubeService:
     def __init__(self):
         self.api_key = settings.YOUTUBE_API_KEY
-        self.base_url = "https://www.googleapis.com/youtube/v3/search"
+        self.base_url = settings.YOUTUBE_SEARCH_URL
         self.cache_ttl = settings.YOUTUBE_CACHE_TTL
         self.cache_prefix = "youtube:"
+        self.max_workers = settings.YOUTUBE_MAX_WORKERS
+        self.resolve_deadline = settings.YOUTUBE_RESOLVE_DEADLINE
+        self.negative_cache_ttl = settings.YOUTUBE_NEGATIVE_CACHE_TTL
+        self.single_flight_ttl = settings.YOUTUBE_SINGLE_FLIGHT_TTL
+        self.local_cache = LocalCache(
+            max_size=settings.YOUTUBE_LOCAL_CACHE_SIZE,
+            default_ttl=settings.YOUTUBE_LOCAL_CACHE_TTL
+        )
+        self.dependency = Dependency(
+            'youtube',
+            max_timeout=settings.YOUTUBE_TIMEOUT,
+            min_timeout=settings.YOUTUBE_TIMEOUT_MIN,
+            retries=settings.YOUTUBE_RETRIES,
+            hedge=settings.YOUTUBE_HEDGE,
+            transient=transient_http_error,
+            failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.BREAKER_RESET_TIMEOUT,
+            max_workers=self.max_workers * 2
+        )
+
+    def _cache_key(self, search_term):
+        return f"{self.cache_prefix}{search_term.lower().strip()}"
 
     def search_video(self, search_term, max_results=1):
-        if not self.api_key:
-            logger.warning("YOUTUBE_API_KEY not set. Returning search term.")
-            return f"search:{search_term}"
+        search_term = search_term.strip()
+        return self.search_videos([search_term]).get(search_term, f"search:{search_term}")
+
+    def search_videos(self, search_terms):
+        """
+        Batch lookup that returns a {term: video_url} dict.
+        Terms are served from the in-process cache first, then from Redis with a
+        single MGET; only the remaining misses go to YouTube, and their results
+        (including "no result" entries) are written back in one pipelined batch.
+        """
+        terms, videos = self._prepare_terms(search_terms)
+        if not terms:
+            return videos
+
+        misses = self._lookup_local(terms, videos)
+
+        if misses and redis_client:
+            try:
+                cached_urls = redis_client.mget([self._cache_key(term) for term in misses])
+                misses = self._apply_cached(misses, cached_urls, videos)
+            except Exception as e:
+                logger.warning(f"Redis mget error: {e}")
+
+        if not misses:
+            return videos
+
+        fetched = self._fetch_videos(misses)
+        self._apply_fetched(fetched, videos)
+
+        if redis_client and fetched:
+            try:
+                pipe = redis_client.pipeline(transaction=False)
+                self._queue_cache_writes(pipe, fetched)
+                pipe.execute()
+                logger.info(f"Cached {len(fetched)} video lookup(s)")
+            except Exception as e:
+                logger.warning(f"Redis pipeline error: {e}")
 
-        cache_key = f"{self.cache_prefix}{search_term.lower().strip()}"
+        return videos
 
-        if redis_client:
+    async def search_videos_async(self, search_terms):
+        """asyncio version of search_videos using redis.asyncio and httpx."""
+        terms, videos = self._prepare_terms(search_terms)
+        if not terms:
+            return videos
+
+        misses = self._lookup_local(terms, videos)
+        redis = get_async_redis()
+
+        if misses and redis:
+            try:
+                cached_urls = await redis.mget([self._cache_key(term) for term in misses])
+                misses = self._apply_cached(misses, cached_urls, videos)
+            except Exception as e:
+                logger.warning(f"Redis mget error: {e}")
+
+        if not misses:
+            return videos
+
+        fetched = await self._fetch_videos_async(misses)
+        self._apply_fetched(fetched, videos)
+
+        if redis and fetched:
             try:
-                cached_url = redis_client.get(cache_key)
-                if cached_url:
-                    logger.info(f"Cache hit: {search_term}")
-                    return cached_url
-                logger.info(f"Cache miss: {search_term}")
+                pipe = redis.pipeline(transaction=False)
+                self._queue_cache_writes(pipe, fetched)
+                await pipe.execute()
+                logger.info(f"Cached {len(fetched)} video lookup(s)")
             except Exception as e:
-                logger.warning(f"Redis get error: {e}")
+                logger.warning(f"Redis pipeline error: {e}")
+
+        return videos
+
+    def _prepare_terms(self, search_terms):
+        terms = list(dict.fromkeys(term.strip() for term in search_terms if term.strip()))
+        videos = {term: f"search:{term}" for term in terms}
+        if terms and not self.api_key:
+            logger.warning("YOUTUBE_API_KEY not set. Returning search terms.")
+            return [], videos
+        return terms, videos
 
+    def _lookup_local(self, terms, videos):
+        misses = []
+        for term in terms:
+            cached_url = self.local_cache.get(self._cache_key(term))
+            if cached_url is None:
+                misses.append(term)
+            elif cached_url != NO_RESULT:
+                videos[term] = cached_url
+        return misses
+
+    def _apply_cached(self, misses, cached_urls, videos):
+        remaining = []
+        for term, cached_url in zip(misses, cached_urls):
+            if not cached_url:
+                remaining.append(term)
+                continue
+            ttl = self.negative_cache_ttl if cached_url == NO_RESULT else None
+            self.local_cache.set(self._cache_key(term), cached_url, ttl=ttl)
+            if cached_url != NO_RESULT:
+                videos[term] = cached_url
+        logger.info(f"Redis cache hits: {len(misses) - len(remaining)}/{len(misses)}")
+        return remaining
+
+    def _apply_fetched(self, fetched, videos):
+        for term, video_url in fetched.items():
+            if video_url:
+                videos[term] = video_url
+                self.local_cache.set(self._cache_key(term), video_url)
+            else:
+                self.local_cache.set(self._cache_key(term), NO_RESULT, ttl=self.negative_cache_ttl)
+
+    def _queue_cache_writes(self, pipe, fetched):
+        for term, video_url in fetched.items():
+            if video_url:
+                pipe.setex(self._cache_key(term), self.cache_ttl, video_url)
+            else:
+                pipe.setex(self._cache_key(term), self.negative_cache_ttl, NO_RESULT)
+
+    def cache_stats(self):
+        return self.local_cache.stats()
+
+    def _fetch_videos(self, terms):
+        """
+        Fetches terms from YouTube on a bounded thread pool. Terms that fail map
+        to None; terms still pending when the deadline passes, or rejected by
+        the open circuit, are left out so they are not cached as misses.
+        """
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(terms)))
         try:
-            params = {
-                'part': 'snippet',
-                'q': search_term,
-                'type': 'video',
-                'maxResults': max_results,
-                'key': self.api_key,
-                'videoEmbeddable': 'true',
-                'videoSyndicated': 'true',
-                'relevanceLanguage': 'en',
-                'safeSearch': 'strict',
-                'order': 'relevance'
-            }
-
-            response = requests.get(self.base_url, params=params, timeout=10)
+            futures = {executor.submit(self._fetch_video_once, term): term for term in terms}
+            done, pending = wait(futures, timeout=self.resolve_deadline)
+
+            for future in done:
+                if future.exception() is None:
+                    results[futures[future]] = future.result()
+
+            if pending:
+                logger.warning(
+                    f"Video resolution deadline ({self.resolve_deadline}s) hit, "
+                    f"{len(pending)} term(s) unresolved"
+                )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+    def _fetch_video_once(self, search_term):
+        """Fetches a term, coalescing identical in-flight lookups across workers."""
+        return single_flight.do(
+            self._cache_key(search_term),
+            lambda: self._fetch_video(search_term),
+            lock_ttl=self.single_flight_ttl
+        )
+
+    async def _fetch_videos_async(self, terms):
+        """asyncio version of _fetch_videos, bounded by a semaphore instead of a pool."""
+        client = get_http_client()
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def fetch(term):
+            async with semaphore:
+                video_url = await single_flight.do_async(
+                    self._cache_key(term),
+                    lambda: self._fetch_video_async(client, term),
+                    lock_ttl=self.single_flight_ttl
+                )
+                return term, video_url
+
+        tasks = [asyncio.ensure_future(fetch(term)) for term in terms]
+        done, pending = await asyncio.wait(tasks, timeout=self.resolve_deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(
+                f"Video resolution deadline ({self.resolve_deadline}s) hit, "
+                f"{len(pending)} term(s) unresolved"
+            )
+        return dict(task.result() for task in done if not task.exception())
+
+    async def _fetch_video_async(self, client, search_term, max_results=1):
+        logger.info(f"Fetching from YouTube: {search_term}")
+
+        async def request(timeout):
+            response = await client.get(
+                self.base_url, params=self._search_params(search_term, max_results), timeout=timeout
+            )
             response.raise_for_status()
-            data = response.json()
+            return response.json()
+
+        try:
+            return self._video_url(search_term, await self.dependency.call_async(request))
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            logger.error(f"YouTube API error: {e}")
+            return None
 
-            if 'items' in data and len(data['items']) > 0:
-                video_id = data['items'][0]['id']['videoId']
-                video_url = f"https://www.youtube.com/watch?v={video_id}"
+    def _search_params(self, search_term, max_results):
+        return {
+            'part': 'snippet',
+            'q': search_term,
+            'type': 'video',
+            'maxResults': max_results,
+            'key': self.api_key,
+            'videoEmbeddable': 'true',
+            'videoSyndicated': 'true',
+            'relevanceLanguage': 'en',
+            'safeSearch': 'strict',
+            'order': 'relevance'
+        }
 
-                if redis_client:
-                    try:
-                        redis_client.setex(cache_key, self.cache_ttl, video_url)
-                        logger.info(f"Cached: {search_term} -> {video_url} (TTL: {self.cache_ttl}s)")
-                    except Exception as e:
-                        logger.warning(f"Redis set error: {e}")
+    def _video_url(self, search_term, data):
+        if 'items' in data and len(data['items']) > 0:
+            video_id = data['items'][0]['id']['videoId']
+            return f"https://www.youtube.com/watch?v={video_id}"
 
-                return video_url
-            else:
-                logger.warning(f"No videos found for: {search_term}")
-                return f"search:{search_term}"
+        logger.warning(f"No videos found for: {search_term}")
+        return None
+
+    def _fetch_video(self, search_term, max_results=1):
+        import requests
+        logger.info(f"Fetching from YouTube: {search_term}")
+
+        def request(timeout):
+            response = requests.get(
+                self.base_url, params=self._search_params(search_term, max_results), timeout=timeout
+            )
+            response.raise_for_status()
+            return response.json()
+
+        try:
+            return self._video_url(search_term, self.dependency.call(request))
 
+        except CircuitOpen:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"YouTube API error: {e}")
-            return f"search:{search_term}"
+            return None
         except Exception as e:
             logger.error(f"Error searching YouTube: {e}")
-            return f"search:{search_term}"
+            return None
 
 
-youtube_service = YouTubeService()
+youtube_service = services.lazy('youtube')
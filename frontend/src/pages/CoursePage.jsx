@@ -11,14 +11,21 @@ const CoursePage = () => {
   const [error, setError] = useState('');
   const [currentModuleIndex, setCurrentModuleIndex] = useState(0);
   const [currentSubtopicIndex, setCurrentSubtopicIndex] = useState(0);
+  const [contents, setContents] = useState({});
+  const [regenerating, setRegenerating] = useState(false);
 
   useEffect(() => {
+    setContents({});
     loadCourse();
   }, [id]);
 
+  useEffect(() => {
+    if (course) loadLessonContents(currentModuleIndex, currentSubtopicIndex);
+  }, [course, currentModuleIndex, currentSubtopicIndex]);
+
   const loadCourse = async () => {
     try {
-      const response = await coursesAPI.getCourse(id);
+      const response = await coursesAPI.getCourse(id, { outline: 1 });
       const courseData = response.data;
       setCourse(courseData);
       setCurrentModuleIndex(courseData.current_module_index || 0);
@@ -31,6 +38,33 @@ const CoursePage = () => {
     }
   };
 
+  // Fetches the current lesson body plus the next one so navigation feels instant.
+  const loadLessonContents = async (moduleIndex, subtopicIndex) => {
+    const lessons = [[moduleIndex, subtopicIndex]];
+    const module = course.modules[moduleIndex];
+    if (module && subtopicIndex + 1 < module.subtopics.length) {
+      lessons.push([moduleIndex, subtopicIndex + 1]);
+    } else if (course.modules[moduleIndex + 1]) {
+      lessons.push([moduleIndex + 1, 0]);
+    }
+
+    const missing = lessons.map(([m, s]) => `${m}.${s}`).filter((key) => !(key in contents));
+    if (missing.length === 0) return;
+
+    try {
+      const response = await coursesAPI.getLessonContents(id, missing);
+      setContents((prevContents) => {
+        const newContents = { ...prevContents };
+        response.data.lessons.forEach((lesson) => {
+          newContents[`${lesson.module_index}.${lesson.subtopic_index}`] = lesson.content;
+        });
+        return newContents;
+      });
+    } catch (err) {
+      console.error('Failed to load lesson content:', err);
+    }
+  };
+
   const getCurrentSubtopic = () => {
     if (!course || !course.modules[currentModuleIndex]) return null;
     return course.modules[currentModuleIndex].subtopics[currentSubtopicIndex];
@@ -67,6 +101,29 @@ const CoursePage = () => {
     }
   };
 
+  const handleRegenerateSubtopic = async () => {
+    if (!getCurrentSubtopic() || regenerating) return;
+
+    const moduleIndex = currentModuleIndex;
+    const subtopicIndex = currentSubtopicIndex;
+    setRegenerating(true);
+    try {
+      const response = await coursesAPI.regenerateSubtopic(id, moduleIndex, subtopicIndex);
+      const { content, ...subtopic } = response.data;
+
+      setCourse((prevCourse) => {
+        const newCourse = { ...prevCourse };
+        newCourse.modules[moduleIndex].subtopics[subtopicIndex] = subtopic;
+        return newCourse;
+      });
+      setContents((prevContents) => ({ ...prevContents, [`${moduleIndex}.${subtopicIndex}`]: content }));
+    } catch (err) {
+      console.error('Failed to regenerate lesson:', err);
+    } finally {
+      setRegenerating(false);
+    }
+  };
+
   const getVideoEmbedUrl = (url) => {
     if (url.startsWith('search:')) {
       const searchTerm = url.replace('search:', '').trim();
@@ -240,38 +297,47 @@ const CoursePage = () => {
                     <h1 className="text-2xl font-bold text-gray-900">
                       {currentSubtopic.title}
                     </h1>
-                    <button
-                      onClick={handleToggleComplete}
-                      className={`px-4 py-2 rounded-lg font-medium transition-colors ${
-                        currentSubtopic.completed
-                          ? 'bg-green-100 text-green-700 hover:bg-green-200'
-                          : 'bg-primary-600 text-white hover:bg-primary-700'
-                      }`}
-                    >
-                      {currentSubtopic.completed ? (
-                        <span className="flex items-center">
-                          <svg
-                            className="w-5 h-5 mr-2"
-                            fill="currentColor"
-                            viewBox="0 0 20 20"
-                          >
-                            <path
-                              fillRule="evenodd"
-                              d="M16.707 5.293a1 1 0 010 1.414l-8 8a1 1 0 01-1.414 0l-4-4a1 1 0 011.414-1.414L8 12.586l7.293-7.293a1 1 0 011.414 0z"
-                              clipRule="evenodd"
-                            />
-                          </svg>
-                          Completed
-                        </span>
-                      ) : (
-                        'Mark as Complete'
-                      )}
-                    </button>
+                    <div className="flex items-center gap-2">
+                      <button
+                        onClick={handleRegenerateSubtopic}
+                        disabled={regenerating}
+                        className="px-4 py-2 rounded-lg font-medium border border-gray-300 text-gray-700 hover:bg-gray-100 disabled:opacity-50"
+                      >
+                        {regenerating ? 'Regenerating...' : 'Regenerate lesson'}
+                      </button>
+                      <button
+                        onClick={handleToggleComplete}
+                        className={`px-4 py-2 rounded-lg font-medium transition-colors ${
+                          currentSubtopic.completed
+                            ? 'bg-green-100 text-green-700 hover:bg-green-200'
+                            : 'bg-primary-600 text-white hover:bg-primary-700'
+                        }`}
+                      >
+                        {currentSubtopic.completed ? (
+                          <span className="flex items-center">
+                            <svg
+                              className="w-5 h-5 mr-2"
+                              fill="currentColor"
+                              viewBox="0 0 20 20"
+                            >
+                              <path
+                                fillRule="evenodd"
+                                d="M16.707 5.293a1 1 0 010 1.414l-8 8a1 1 0 01-1.414 0l-4-4a1 1 0 011.414-1.414L8 12.586l7.293-7.293a1 1 0 011.414 0z"
+                                clipRule="evenodd"
+                              />
+                            </svg>
+                            Completed
+                          </span>
+                        ) : (
+                          'Mark as Complete'
+                        )}
+                      </button>
+                    </div>
                   </div>
 
                   <div className="prose max-w-none">
                     <p className="text-gray-700 whitespace-pre-line leading-relaxed">
-                      {currentSubtopic.content}
+                      {contents[`${currentModuleIndex}.${currentSubtopicIndex}`] ?? 'Loading lesson...'}
                     </p>
                   </div>
                 </div>
@@ -6,6 +6,7 @@ import { useAuth } from '../context/AuthContext';
 
 const Dashboard = () => {
   const [courses, setCourses] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [backendAwake, setBackendAwake] = useState(false);
   const [showPopup, setShowPopup] = useState(false);
   const navigate = useNavigate();
@@ -33,6 +34,7 @@ const Dashboard = () => {
       const response = await coursesAPI.listCourses();
       console.log("Fetched courses:", response.data);
       setCourses(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (err) {
       console.error("Failed to load courses:", err);
     }
@@ -42,6 +44,16 @@ const Dashboard = () => {
 }, []);
 
 
+  const loadMoreCourses = async () => {
+    try {
+      const response = await coursesAPI.listCourses({ after: nextCursor });
+      setCourses((prevCourses) => [...prevCourses, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (err) {
+      console.error("Failed to load more courses:", err);
+    }
+  };
+
   const handleDeleteCourse = async (courseId) => {
     if (!window.confirm('Are you sure you want to delete this course?')) return;
 
@@ -237,6 +249,14 @@ const Dashboard = () => {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="flex justify-center mt-8">
+            <button onClick={loadMoreCourses} className="btn-primary">
+              Load more
+            </button>
+          </div>
+        )}
       </div>
 
       {showPopup && (
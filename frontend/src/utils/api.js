@@ -72,13 +72,19 @@ export const authAPI = {
 };
 
 export const coursesAPI = {
-  listCourses: () => api.get('/api/courses/'),
-  getCourse: (id) => api.get(`/api/courses/${id}/`),
+  listCourses: (params) => api.get('/api/courses/', { params }),
+  getCourse: (id, params) => api.get(`/api/courses/${id}/`, { params }),
+  getLessonContents: (id, lessons) =>
+    api.get(`/api/courses/${id}/content/`, { params: { lessons: lessons.join(',') } }),
   createCourse: (data) => api.post('/api/courses/create/', data),
   deleteCourse: (id) => api.delete(`/api/courses/${id}/`),
   updateProgress: (id, data) => api.post(`/api/courses/${id}/progress/`, data),
   toggleSubtopic: (courseId, moduleIndex, subtopicIndex) =>
     api.post(`/api/courses/${courseId}/module/${moduleIndex}/subtopic/${subtopicIndex}/toggle/`),
+  regenerateModule: (courseId, moduleIndex, data) =>
+    api.post(`/api/courses/${courseId}/module/${moduleIndex}/regenerate/`, data),
+  regenerateSubtopic: (courseId, moduleIndex, subtopicIndex, data) =>
+    api.post(`/api/courses/${courseId}/module/${moduleIndex}/subtopic/${subtopicIndex}/regenerate/`, data),
 };
 
 export default api;